@@ -1,9 +1,33 @@
+import time
+
+# Antes dos demais imports: num processo novo, a primeira pintura inclui o custo deles
+INICIO_SCRIPT = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import numpy as np
+import functools
+import json
+import os
+
+from afastamentos.concorrencia import AGRUPAMENTOS, COLUNA_TOTAL, picos, serie_diaria
+from afastamentos.conflitos import LIMITE_PARES, conflitos_por_diretoria, detectar_conflitos
+from afastamentos.consultas import MOTOR_DUCKDB, MOTOR_PANDAS, MotorDuckDB, motores_disponiveis
+from afastamentos.cache_compartilhado import carregar_ou_construir
+from afastamentos.cubo import Cubo, construir_cubo, fatiar
+from afastamentos.incremental import EstadoIncremental, atualizar_paises
+from afastamentos.exportacao import FORMATOS, exportar
+from afastamentos.figuras import CacheFiguras
+from afastamentos.filtros import COLUNA_TEMPO, IndiceFiltros
+from afastamentos.grade import COLUNAS_PADRAO, TAMANHOS_PAGINA, GradePaginada
+from afastamentos.ingestao import HISTORICO_DIR, FonteAba, gravar_historico, ler_historico, ler_manifesto
+from afastamentos.metricas import ResultadosCubo, SnapshotMetricas, localizar_snapshot_metricas, opcoes_filtro
+from afastamentos.mapa import MODOS_MAPA, blocos_html, figura_base, figura_leve, tamanho_payload
+from afastamentos.paises import ISO_MAPPING, RESOLVEDOR, paises_nao_resolvidos, resolver_valores
+from afastamentos.perfil import PerfilExecucao, etapa, marcar_falha_cache, perfil_atual
+from afastamentos.preprocessamento import preparar_dados
+from afastamentos.snapshot import carregar_snapshot, identificar_fonte
 
 # Configuração da página
 st.set_page_config(
@@ -13,9 +37,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Cores do tema IBAMA
-CORES_IBAMA = ['#006600', '#FFCC00', '#0066CC', '#009933', '#FF9900', '#003366']
-
 # Título principal
 st.markdown("""
     <style>
@@ -49,215 +70,902 @@ st.markdown("""
         margin: 1rem 0;
         border-left: 5px solid #FF4500;
     }
+    .map-tiles {
+        display: grid;
+        grid-template-columns: repeat(auto-fill, minmax(160px, 1fr));
+        gap: 0.5rem;
+    }
+    .map-tile {
+        border: 1px solid #CCE0CC;
+        border-radius: 8px;
+        padding: 0.5rem;
+    }
+    .map-tile-rank {
+        color: #666666;
+    }
+    .map-tile-value {
+        font-size: 1.5rem;
+        color: #006600;
+        font-weight: bold;
+    }
+    .map-tile-bar {
+        height: 4px;
+        background: #009933;
+    }
     </style>
     <h1 class="main-header">🌍 Dashboard de Afastamentos 2025 - IBAMA</h1>
 """, unsafe_allow_html=True)
 
 # Carregar os dados
-@st.cache_data
-def load_data():
-    file_path = "DATA Afastamentos 2025.xlsx"
-    df = pd.read_excel(file_path, sheet_name="Afastamentos 2025")
+FILE_PATH = "DATA Afastamentos 2025.xlsx"
+SHEET_NAME = "Afastamentos 2025"
+
+@st.cache_data(max_entries=2)
+def load_data(source_key):
+    """Lê os dados brutos; ``source_key`` identifica a fonte e invalida o cache quando ela muda
+    
+    - ``('planilha', chave_snapshot)``: aba da planilha via snapshot Arrow
+    - ``('historico', versao, anos)``: só as partições dos anos pedidos no histórico Parquet
+    """
+    marcar_falha_cache()
+    with etapa('leitura') as registro:
+        if source_key[0] == 'historico':
+            df = ler_historico(HISTORICO_DIR, anos=list(source_key[2]))
+        else:
+            df, _ = carregar_snapshot(FILE_PATH, SHEET_NAME)
+        registro['linhas_saida'] = len(df)
     return df
 
-def safe_date_conversion(date_series):
-    """Conversão segura de datas com múltiplos formatos"""
-    result = pd.to_datetime(date_series, errors='coerce')
-    
-    mask_na = result.isna()
-    if mask_na.any():
-        result[mask_na] = pd.to_datetime(
-            date_series[mask_na], 
-            dayfirst=True, 
-            errors='coerce'
+@st.cache_resource
+def load_incremental_state(file_path, sheet_name):
+    """Estado da planilha mantido entre edições: só as linhas alteradas são reprocessadas"""
+    return EstadoIncremental()
+
+@st.cache_data(max_entries=2)
+def load_country_values(source_key):
+    """Valores distintos de ``País`` no histórico, lidos sem as demais colunas"""
+    marcar_falha_cache()
+    paises = ler_historico(HISTORICO_DIR, anos=list(source_key[2]), colunas=['País'])['País']
+    return paises.dropna().astype(str).str.strip().drop_duplicates()
+
+def resolver_paises_fonte(source_key):
+    """Resolve os países do histórico antes de ler a versão da tabela de países
+    
+    Assim a versão não muda durante o preparo. Na planilha, o estado
+    incremental resolve ao sincronizar e lê a versão depois.
+    """
+    if source_key[0] == 'historico':
+        resolver_valores(load_country_values(source_key))
+
+def chave_dataset(source_key):
+    """``source_key`` mais a versão da tabela de países, lida depois da resolução: chave dos caches do dataset"""
+    return (*source_key, RESOLVEDOR.versao())
+
+def build_history_tables(source_key, base=None):
+    """Prepara o dataset e o cubo do histórico para o cache compartilhado em disco
+    
+    Com ``base`` (dataset, relatório e cubo já carregados), só a resolução de
+    países é refeita, sem reler nem preparar o histórico.
+    """
+    marcar_falha_cache()
+    if base is not None:
+        df, relatorio, cubo, _ = atualizar_paises(*base)
+    else:
+        df, relatorio = preparar_dados(load_data(source_key))
+        with etapa('cubo', lambda: len(df)) as registro:
+            cubo = construir_cubo(df)
+            registro['linhas_saida'] = len(cubo.celulas)
+    return {'dataset': df, 'celulas': cubo.celulas, 'servidores': cubo.servidores}, relatorio
+
+@st.cache_resource(max_entries=2)
+def load_history_dataset(source_key, versao_paises, _base=None):
+    """Dataset preparado e cubo do histórico, compartilhados entre sessões e entre processos do host
+    
+    Só o primeiro processo a pedir a versão monta o dataset; os demais mapeiam
+    os mesmos arquivos Arrow (somente leitura) em vez de guardar uma cópia.
+    ``versao_paises`` é a da tabela de países depois de resolver a fonte; ao
+    aceitar um alias, ``_base`` monta a versão nova a partir da carregada.
+    """
+    marcar_falha_cache()
+    with etapa('cache_compartilhado', cacheavel=True):
+        tabelas, relatorio, _ = carregar_ou_construir(
+            [source_key, versao_paises], lambda: build_history_tables(source_key, _base)
         )
+    return tabelas['dataset'], relatorio, Cubo(tabelas['celulas'], tabelas['servidores'])
+
+def load_dataset(source_key):
+    """Dataset preparado, relatório e cubo da fonte; tratar como somente leitura"""
+    with etapa('dataset', cacheavel=True) as registro:
+        if source_key[0] == 'historico':
+            resolver_paises_fonte(source_key)
+            resultado = load_history_dataset(source_key, RESOLVEDOR.versao())
+        else:
+            estado = load_incremental_state(FILE_PATH, SHEET_NAME)
+            resultado = estado.sincronizar(source_key, lambda: load_data(source_key))
+        registro['linhas_saida'] = len(resultado[0])
+    return resultado
+
+@st.cache_resource(max_entries=2)
+def load_metric_snapshot(diretorio):
+    """Métricas e conjuntos pré-calculados por ``python -m afastamentos.metricas``"""
+    marcar_falha_cache()
+    return SnapshotMetricas(diretorio)
+
+@st.cache_resource(max_entries=2)
+def load_filter_index(chave_dados, _df):
+    """Índice de posições por valor das dimensões filtráveis"""
+    marcar_falha_cache()
+    return IndiceFiltros(_df)
+
+@st.cache_resource(max_entries=2)
+def load_data_grid(chave_dados, _df):
+    """Grade paginada do dataset, com ordenações reaproveitadas entre sessões"""
+    marcar_falha_cache()
+    return GradePaginada(_df)
+
+@st.cache_resource(max_entries=2)
+def load_conflicts(chave_dados, _df):
+    """Pares de viagens sobrepostas do mesmo servidor no dataset inteiro"""
+    marcar_falha_cache()
+    with etapa('deteccao_conflitos', lambda: len(_df)) as registro:
+        pares = detectar_conflitos(_df)
+        registro['linhas_saida'] = len(pares)
+    return pares
+
+@st.cache_resource(max_entries=2)
+def load_query_engine(chave_dados):
+    """Motor DuckDB sobre as partições dos anos do histórico; nenhuma linha fica em memória"""
+    marcar_falha_cache()
+    return MotorDuckDB(HISTORICO_DIR, chave_dados[2])
+
+@st.cache_resource(max_entries=16)
+def load_query_results(chave_dados, filter_key, _filtros):
+    """Métricas e conjuntos de um estado de filtros, servidos pelo motor DuckDB"""
+    marcar_falha_cache()
+    return load_query_engine(chave_dados).resultados(_filtros)
+
+@st.cache_resource(max_entries=8)
+def load_period_cube(chave_dados, periodo, _indice_filtros):
+    """Cubo só das viagens iniciadas no período: a faixa contígua do índice temporal"""
+    marcar_falha_cache()
+    linhas = _indice_filtros.selecionar({COLUNA_TEMPO: periodo})
+    with etapa('cubo_periodo', lambda: len(linhas)) as registro:
+        cubo = construir_cubo(linhas)
+        registro['linhas_saida'] = len(cubo.celulas)
+    return cubo
+
+def chave_filtros(filtros):
+    """Estado dos filtros como tupla hashable, para chaves de cache"""
+    return tuple(
+        (dim, tuple(sorted(valor)) if isinstance(valor, (list, set)) else valor)
+        for dim, valor in sorted(filtros.items())
+    )
+
+@st.cache_resource
+def load_figure_cache():
+    """Cache LRU de figuras compartilhado por todas as sessões do processo"""
+    return CacheFiguras()
+
+@st.cache_resource
+def load_startup_record():
+    """Primeira pintura da primeira execução do processo (a que paga imports e caches frios)"""
+    return {}
+
+@st.cache_resource
+def load_map_base():
+    """Geografia base do mapa leve, montada uma vez por processo"""
+    return figura_base()
+
+def obter_figura(chart_id, contexto):
+    """Figura do gráfico para o estado de filtros e a versão do dataset atuais"""
+    # Plotly Express só é importado quando a primeira figura é montada, depois dos cards
+    from afastamentos.graficos import FIGURAS
+    
+    chave = (chart_id, chave_filtros(contexto['filtros']), contexto['chave_dados'])
+    with etapa(f'figura {chart_id}', cacheavel=True):
+        spec = load_figure_cache().obter(chave, lambda: FIGURAS[chart_id](contexto['resultados']))
+    # st.plotly_chart recusa dict sem traços (seleção vazia); só esse caso volta a ser go.Figure
+    if not spec['data']:
+        import plotly.graph_objects as go
+        return go.Figure(spec)
+    return spec
+
+@st.cache_data(max_entries=16)
+def load_concurrency(chave_dados, filter_key, grupo, _df):
+    """Servidores afastados por dia, por estado de filtro e agrupamento; ``_df`` é a seleção"""
+    marcar_falha_cache()
+    with etapa('varredura', lambda: len(_df)) as registro:
+        serie = serie_diaria(_df, grupo)
+        registro['linhas_saida'] = len(serie)
+    return serie
+
+# Execuções guardadas no histórico de perfil da sessão (modo debug)
+HISTORICO_PERFIL = 50
+
+def registrar_perfil(perfil):
+    """Guarda a execução no histórico da sessão, mantendo só as mais recentes"""
+    historico = st.session_state.setdefault('historico_perfil', [])
+    historico.append(perfil.como_dict())
+    del historico[:-HISTORICO_PERFIL]
+
+def perfilar_secao(secao):
+    """Mede a seção como etapa da execução; uma re-execução só do fragmento vira uma execução própria"""
+    @functools.wraps(secao)
+    def executar(contexto):
+        if perfil_atual() is not None or not contexto['debug_mode']:
+            with etapa(secao.__name__):
+                return secao(contexto)
+        perfil = PerfilExecucao(f"fragmento {secao.__name__}").iniciar()
+        perfil.ligar_memoria()
+        try:
+            with etapa(secao.__name__):
+                return secao(contexto)
+        finally:
+            registrar_perfil(perfil.finalizar())
+    return executar
+
+# =============================================================================
+# MAPA MUNDI
+# =============================================================================
+
+@st.fragment
+@perfilar_secao
+def secao_mapa_mundi(contexto):
+    """Mapa mundi de viagens por país"""
+    viagens_por_pais = contexto['resultados'].conjunto('paises')
+    modo_mapa = contexto['modo_mapa']
     
-    return result
-
-# ✅ MAPEAMENTO SIMPLIFICADO E TESTADO
-COUNTRY_MAPPING = {
-    'EUA': 'United States',
-    'Suíça': 'Switzerland',
-    'Bolívia': 'Bolivia',
-    'Itália': 'Italy',
-    'China': 'China',
-    'Reino Unido': 'United Kingdom',
-    'Peru': 'Peru',
-    'França': 'France',
-    'Espanha': 'Spain',
-    'Bélgica': 'Belgium',
-    'Japão': 'Japan',
-    'Trinidad e Tobago': 'Trinidad and Tobago',
-    'Equador': 'Ecuador',
-    'Grécia': 'Greece',
-    'Argentina': 'Argentina',
-    'Alemanha': 'Germany',
-    'Costa Rica': 'Costa Rica',
-    'Países Baixos': 'Netherlands',
-    'Áustria': 'Austria',
-    'Dinamarca': 'Denmark',
-    'Noruega': 'Norway',
-    'República Tcheca': 'Czechia',
-    'Panamá': 'Panama',
-    'Uruguai': 'Uruguay',
-    'Coreia do Sul': 'South Korea',
-    'Tailândia': 'Thailand',
-    'Chile': 'Chile',
-    'Colômbia': 'Colombia',
-    'Indonésia': 'Indonesia',
-    'África do Sul': 'South Africa',
-    'México': 'Mexico',
-    'Canadá': 'Canada',
-    'Guiana Francesa': 'French Guiana',
-    'Quênia': 'Kenya',
-    'Portugal': 'Portugal',
-    'Uzbequistão': 'Uzbekistan',
-    'Suriname': 'Suriname',
-    'Antártida': 'Antarctica',
-    'Brasil': 'Brazil',
-}
+    st.header("🗺️ Mapa Mundi - Países Visitados")
+    
+    if modo_mapa == 'Blocos' and not viagens_por_pais.empty:
+        inicio = time.perf_counter()
+        html_blocos = blocos_html(viagens_por_pais)
+        st.markdown(html_blocos, unsafe_allow_html=True)
+        if contexto['debug_mode']:
+            st.caption(f"🔍 Blocos: {len(html_blocos.encode('utf-8')) / 1024:.1f} KB, "
+                       f"montagem em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    elif not viagens_por_pais.empty and not viagens_por_pais['ISO_Code'].isna().all():
+        try:
+            inicio = time.perf_counter()
+            
+            # O modo leve só troca os valores da geografia base; não passa pelo cache de figuras
+            if modo_mapa == 'Leve':
+                fig_mapa_mundi = figura_leve(load_map_base(), viagens_por_pais)
+            else:
+                fig_mapa_mundi = obter_figura('mapa_mundi', contexto)
+            montagem = time.perf_counter() - inicio
+            st.plotly_chart(fig_mapa_mundi, use_container_width=True)
+            
+            if contexto['debug_mode']:
+                st.caption(f"🔍 Mapa ({modo_mapa}): payload {tamanho_payload(fig_mapa_mundi) / 1024:.1f} KB, "
+                           f"montagem {montagem * 1000:.1f} ms, serialização {(time.perf_counter() - inicio - montagem) * 1000:.1f} ms")
+            
+        except Exception as e:
+            st.warning(f"⚠️ Erro ao gerar mapa mundi: {str(e)}")
+    else:
+        st.warning("⚠️ Não foi possível gerar o mapa mundi. Verifique os dados de países.")
 
-# Mapeamento de códigos ISO para países
-ISO_MAPPING = {
-    'United States': 'USA',
-    'Switzerland': 'CHE',
-    'Bolivia': 'BOL',
-    'Italy': 'ITA',
-    'China': 'CHN',
-    'United Kingdom': 'GBR',
-    'Peru': 'PER',
-    'France': 'FRA',
-    'Spain': 'ESP',
-    'Belgium': 'BEL',
-    'Japan': 'JPN',
-    'Trinidad and Tobago': 'TTO',
-    'Ecuador': 'ECU',
-    'Greece': 'GRC',
-    'Argentina': 'ARG',
-    'Germany': 'DEU',
-    'Costa Rica': 'CRI',
-    'Netherlands': 'NLD',
-    'Austria': 'AUT',
-    'Denmark': 'DNK',
-    'Norway': 'NOR',
-    'Czechia': 'CZE',
-    'Panama': 'PAN',
-    'Uruguay': 'URY',
-    'South Korea': 'KOR',
-    'Thailand': 'THA',
-    'Chile': 'CHL',
-    'Colombia': 'COL',
-    'Indonesia': 'IDN',
-    'South Africa': 'ZAF',
-    'Mexico': 'MEX',
-    'Canada': 'CAN',
-    'French Guiana': 'GUF',
-    'Kenya': 'KEN',
-    'Portugal': 'PRT',
-    'Uzbekistan': 'UZB',
-    'Suriname': 'SUR',
-    'Antarctica': 'ATA',
-    'Brazil': 'BRA',
-}
 
-try:
-    df = load_data()
+# =============================================================================
+# ANÁLISE DETALHADA POR PAÍS
+# =============================================================================
+
+@st.fragment
+@perfilar_secao
+def secao_paises(contexto):
+    """Top países, viagens × duração e tabela por país"""
+    viagens_por_pais = contexto['resultados'].conjunto('paises')
     
-    # =============================================================================
-    # PRÉ-PROCESSAMENTO DOS DADOS
-    # =============================================================================
+    st.header("🌍 Análise Detalhada por País")
     
-    st.sidebar.header("🔧 Configurações de Processamento")
-    debug_mode = st.sidebar.checkbox("Modo Debug (mostrar dados processados)")
+    if not viagens_por_pais.empty:
+        fig_mapa = obter_figura('mapa', contexto)
+        st.plotly_chart(fig_mapa, use_container_width=True)
+        
+        st.subheader("📍 Análise de Viagens vs Duração Média")
+        
+        try:
+            fig_scatter = obter_figura('scatter', contexto)
+            st.plotly_chart(fig_scatter, use_container_width=True)
+        except Exception:
+            st.info("Gráfico de scatter indisponível")
+        
+        st.subheader("📋 Detalhes Completos por País")
+        
+        df_paises_display = viagens_por_pais.sort_values('Total_Viagens', ascending=False).copy()
+        df_paises_display = df_paises_display.drop('ISO_Code', axis=1)
+        df_paises_display.columns = ['País', 'Total de Viagens', 'Servidores Únicos', 'Duração Média (dias)']
+        df_paises_display['Total de Viagens'] = df_paises_display['Total de Viagens'].astype(int)
+        df_paises_display['Servidores Únicos'] = df_paises_display['Servidores Únicos'].astype(int)
+        df_paises_display['Duração Média (dias)'] = df_paises_display['Duração Média (dias)'].round(1)
+        
+        st.dataframe(df_paises_display, use_container_width=True)
+
+
+# =============================================================================
+# ANÁLISE TEMPORAL
+# =============================================================================
+
+@st.fragment
+@perfilar_secao
+def secao_temporal(contexto):
+    """Viagens por mês de início"""
+    viagens_por_mes = contexto['resultados'].conjunto('meses')
     
-    # Mostrar colunas disponíveis em debug
-    if debug_mode:
-        st.sidebar.write("🔍 Colunas disponíveis:", df.columns.tolist())
+    st.header("📈 Análise Temporal")
+    
+    if not viagens_por_mes.empty:
+        fig_mes = obter_figura('mes', contexto)
+        st.plotly_chart(fig_mes, use_container_width=True)
+    else:
+        st.info("Não há dados para o gráfico mensal")
+
+
+# =============================================================================
+# AFASTAMENTOS SIMULTÂNEOS
+# =============================================================================
+
+@st.fragment
+@perfilar_secao
+def secao_concorrencia(contexto):
+    """Servidores afastados ao mesmo tempo por dia e dias de pico"""
+    from afastamentos.graficos import concorrencia_diaria, picos_concorrencia
+    
+    filtros = contexto['filtros']
+    source_key = contexto['source_key']
+    
+    st.header("👥 Afastamentos Simultâneos")
+    
+    agrupamento = st.radio("Agrupar por:", ["Total"] + AGRUPAMENTOS, horizontal=True)
+    grupo = None if agrupamento == "Total" else agrupamento
+    
+    # Precisa das datas de cada viagem: as linhas são carregadas só aqui
+    df, _, _ = load_dataset(source_key)
+    chave_dados = chave_dataset(source_key)
+    indice_filtros = load_filter_index(chave_dados, df)
+    selecao = indice_filtros.selecionar(filtros)
+    with etapa('concorrencia', cacheavel=True):
+        serie = load_concurrency(chave_dados, chave_filtros(filtros), grupo, selecao)
+        total = serie if grupo is None else load_concurrency(chave_dados, chave_filtros(filtros), None, selecao)
+    
+    if serie.empty:
+        st.info("Não há afastamentos com datas para os filtros selecionados")
+        return
+    
+    afastados = total[COLUNA_TOTAL]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Pico de servidores afastados", int(afastados.max()))
+    col2.metric("Dia do pico", afastados.idxmax().strftime('%d/%m/%Y'))
+    col3.metric("Média diária", f"{afastados.mean():.1f}")
+    
+    st.plotly_chart(concorrencia_diaria(serie), use_container_width=True)
+    
+    tabela_picos = picos(serie)
+    if grupo is not None:
+        st.plotly_chart(picos_concorrencia(tabela_picos), use_container_width=True)
+    
+    st.subheader("📅 Dias de Pico")
+    tabela_picos['Dia_Pico'] = tabela_picos['Dia_Pico'].dt.strftime('%d/%m/%Y')
+    tabela_picos.columns = [tabela_picos.columns[0], 'Pico (servidores)', 'Dia do Pico', 'Dias no Pico', 'Média Diária']
+    st.dataframe(tabela_picos.round(1), hide_index=True, use_container_width=True)
+
+
+# =============================================================================
+# CONFLITOS DE AFASTAMENTO
+# =============================================================================
+
+# Pares exibidos na tabela; o download traz todos
+LIMITE_PARES_TABELA = 500
+
+@st.fragment
+@perfilar_secao
+def secao_conflitos(contexto):
+    """Viagens sobrepostas do mesmo servidor, por Diretoria e par a par"""
+    from afastamentos.graficos import conflitos_diretoria
+    
+    filtros = contexto['filtros']
+    source_key = contexto['source_key']
+    
+    st.header("⚠️ Conflitos de Afastamento")
+    st.caption("Viagens do mesmo servidor que dividem ao menos um dia: em geral erro de digitação ou marcação em dobro.")
+    
+    df, _, _ = load_dataset(source_key)
+    chave_dados = chave_dataset(source_key)
+    indice_filtros = load_filter_index(chave_dados, df)
+    with etapa('conflitos', cacheavel=True):
+        pares = load_conflicts(chave_dados, df)
+    if len(pares) >= LIMITE_PARES:
+        st.warning(f"⚠️ Só os primeiros {LIMITE_PARES:,} pares foram montados; contagens abaixo são parciais. "
+                   "Verifique nomes genéricos repetidos na coluna Servidor.")
+    
+    # Detectados uma vez no dataset inteiro: ficam os pares com alguma viagem na seleção
+    selecionadas = indice_filtros.posicoes(filtros)
+    if selecionadas is not None:
+        pares = pares[np.isin(pares['Posicao_A'], selecionadas) | np.isin(pares['Posicao_B'], selecionadas)]
+    
+    if pares.empty:
+        st.success("✅ Nenhuma viagem sobreposta para os filtros selecionados")
+        return
+    
+    por_diretoria = conflitos_por_diretoria(pares, df)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Pares em conflito", len(pares))
+    col2.metric("Viagens envolvidas", int(por_diretoria['Viagens_em_Conflito'].sum()))
+    col3.metric("Servidores", pares['Servidor'].nunique())
+    
+    st.plotly_chart(conflitos_diretoria(por_diretoria), use_container_width=True)
+    
+    st.subheader("🏢 Conflitos por Diretoria")
+    por_diretoria_display = por_diretoria[['Diretoria', 'Viagens_em_Conflito', 'Pares', 'Servidores']].copy()
+    por_diretoria_display.columns = ['Diretoria', 'Viagens em Conflito', 'Pares', 'Servidores']
+    st.dataframe(por_diretoria_display, hide_index=True, use_container_width=True)
+    
+    st.subheader("🔁 Pares de Viagens Sobrepostas")
+    pares_display = (
+        pares.drop(columns=['Posicao_A', 'Posicao_B'])
+        .sort_values('Dias_Sobrepostos', ascending=False, kind='stable')
+        .rename(columns={'Dias_Sobrepostos': 'Dias Sobrepostos'})
+    )
+    if len(pares_display) > LIMITE_PARES_TABELA:
+        st.caption(f"Mostrando os {LIMITE_PARES_TABELA} pares com mais dias sobrepostos de {len(pares_display)}")
+    st.dataframe(pares_display.head(LIMITE_PARES_TABELA), hide_index=True, use_container_width=True)
+    
+    st.download_button(
+        label=f"📥 Download dos {len(pares_display)} pares (CSV)",
+        data=lambda: exportar(pares_display, 'CSV'),
+        file_name=f"conflitos_afastamentos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv"
+    )
+
+
+# =============================================================================
+# 🎯 ANÁLISE DE EQUIDADE E ASPECTOS NEGLIGENCIADOS
+# =============================================================================
+
+@st.fragment
+@perfilar_secao
+def secao_equidade(contexto):
+    """Distribuição de gênero por tipo de viagem e diretoria"""
+    st.header("🎯 Análise de Equidade e Aspectos Negligenciados")
+    
+    # 1. DISTRIBUIÇÃO DE GÊNERO POR TIPO DE VIAGEM
+    st.subheader("👥 Distribuição de Gênero por Tipo de Viagem")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig_genero_tipo = obter_figura('genero_tipo', contexto)
+        st.plotly_chart(fig_genero_tipo, use_container_width=True)
+    
+    with col2:
+        fig_genero_tipo_pct = obter_figura('genero_tipo_pct', contexto)
+        st.plotly_chart(fig_genero_tipo_pct, use_container_width=True)
     
-    # Filtrar viagens não canceladas
-    df_original = df.copy()
-    df = df[df['Cancelada?'] == 'Não']
+   
+    # =============================================================================
+    # 2. DURAÇÃO MÉDIA POR GÊNERO (APENAS GRÁFICO)
+    # =============================================================================
     
-    # Conversão robusta de datas
-    date_columns = ['Data entrada na DAI', 'Início do Afastamento', 'Final do Afastamento']
+    st.subheader("⏱️ Duração Média de Viagens por Gênero")
     
-    for col in date_columns:
-        df[col] = safe_date_conversion(df[col])
+    fig_duracao_gen = obter_figura('duracao_gen', contexto)
+    st.plotly_chart(fig_duracao_gen, use_container_width=True)
     
-    # Remover linhas com datas de início ou fim inválidas
-    df = df.dropna(subset=['Início do Afastamento', 'Final do Afastamento'])
+    # =============================================================================
+    # 3. REPRESENTATIVIDADE POR DIRETORIA E GÊNERO
+    # =============================================================================
     
-    # Calcular duração (garantindo valores positivos)
-    df['Duração (dias)'] = (df['Final do Afastamento'] - df['Início do Afastamento']).dt.days
+    st.subheader("🏢 Diversidade por Diretoria: Distribuição de Gênero")
     
-    # Verificar e corrigir durações negativas
-    duracoes_negativas = (df['Duração (dias)'] < 0).sum()
-    if duracoes_negativas > 0:
-        mask_neg = df['Duração (dias)'] < 0
-        df.loc[mask_neg, ['Início do Afastamento', 'Final do Afastamento']] = \
-            df.loc[mask_neg, ['Final do Afastamento', 'Início do Afastamento']].values
-        df['Duração (dias)'] = (df['Final do Afastamento'] - df['Início do Afastamento']).dt.days
+    fig_diversity = obter_figura('diversity', contexto)
+    st.plotly_chart(fig_diversity, use_container_width=True)
+
+
+# =============================================================================
+# 📋 ANÁLISE DE PLANEJAMENTO (ANTECEDÊNCIA)
+# =============================================================================
+
+@st.fragment
+@perfilar_secao
+def secao_planejamento(contexto):
+    """Antecedência e combinações Tipo de Viagem × Diretoria"""
+    from afastamentos.graficos import top_tipo_diretoria
+    
+    resultados = contexto['resultados']
+    metricas = contexto['metricas']
+    st.header("📋 Análise de Planejamento e Governança")
     
-    # Calcular antecedência
-    df['Antecedência (dias)'] = (df['Início do Afastamento'] - df['Data entrada na DAI']).dt.days
-    df = df[df['Antecedência (dias)'] >= 0]
+    st.subheader("📅 Qualidade do Planejamento: Categorização de Antecedência")
     
-    # ✅ CONVERSÃO SEGURA DE CUSTO
-    if 'Custo' in df.columns:
-        df['Custo'] = pd.to_numeric(df['Custo'], errors='coerce')
+    col1, col2 = st.columns(2)
     
-    # Indicadores de planejamento
-    df['Bem_Planejado'] = df['Antecedência (dias)'] >= 30
+    with col1:
+        fig_antec_dist = obter_figura('antec_dist', contexto)
+        st.plotly_chart(fig_antec_dist, use_container_width=True)
     
-    # Classificação de duração
-    df['Tipo_Duracao'] = pd.cut(df['Duração (dias)'], 
-                                bins=[0, 5, 10, 30, 365], 
-                                labels=['Muito Curta (≤5d)', 'Curta (6-10d)', 'Média (11-30d)', 'Longa (>30d)'])
+    with col2:
+        fig_antec_pie = obter_figura('antec_pie', contexto)
+        st.plotly_chart(fig_antec_pie, use_container_width=True)
     
-    # Classificação de antecedência
-    df['Categoria_Antecedencia'] = pd.cut(df['Antecedência (dias)'],
-                                          bins=[0, 15, 30, 365],
-                                          labels=['Urgência (0-15d)', 'Aviso Prévio (15-30d)', 'Bem Planejada (30+d)'])
+    pct_urgencia = metricas['pct_urgencia']
+    pct_aviso = metricas['pct_aviso']
+    pct_bem = metricas['pct_bem']
+    # Insight
+    st.markdown(f"""
+        <div class="alert-box">
+        <b>🎯 Indicador de Governança:</b> 
+        <br>• <b>{pct_urgencia:.1f}%</b> em URGÊNCIA (0-15 dias)
+        <br>• <b>{pct_aviso:.1f}%</b> com aviso prévio (15-30 dias)
+        <br>• <b>{pct_bem:.1f}%</b> bem planejadas (30+ dias) - Ideal para gestão eficiente
+        <br>💡 Aumentar para 70-80% com planejamento antecipado
+        </div>
+    """, unsafe_allow_html=True)
     
     # =============================================================================
-    # PROCESSAMENTO DE PAÍSES
+    # 🆕 GRÁFICO: ANÁLISE POR TIPO DE VIAGEM
     # =============================================================================
     
-    df['País'] = df['País'].astype(str).str.strip()
+    st.subheader("🎯 Prioridades por Tipo de Viagem e Diretoria")
+    
+    tipo_viagem_dir_top = top_tipo_diretoria(resultados)
+    fig_tipo_dir = obter_figura('tipo_dir', contexto)
+    st.plotly_chart(fig_tipo_dir, use_container_width=True)
+    
+    # Insight
+    if len(tipo_viagem_dir_top) > 0:
+        top_combo = tipo_viagem_dir_top.iloc[0]
+        st.markdown(f"""
+            <div class="insight-box">
+            <b>🎯 Foco Principal:</b> A combinação "<b>{top_combo['Tipo de Viagem']}</b>" da diretoria "<b>{top_combo['Diretoria']}</b>" representa <b>{top_combo['Viagens']}</b> viagens.
+            <br>💡 Oportunidade: Otimizar processos para esta categoria de alta demanda.
+            </div>
+        """, unsafe_allow_html=True)
+
+
+# =============================================================================
+# ANÁLISE POR DIRETORIA
+# =============================================================================
+
+@st.fragment
+@perfilar_secao
+def secao_diretorias(contexto):
+    """Viagens e duração média por diretoria"""
+    st.header("🏢 Análise de Recursos por Diretoria")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig_diretoria = obter_figura('diretoria', contexto)
+        st.plotly_chart(fig_diretoria, use_container_width=True)
+    
+    with col2:
+        fig_dur_dir = obter_figura('dur_dir', contexto)
+        st.plotly_chart(fig_dur_dir, use_container_width=True)
+
+
+# =============================================================================
+# ANÁLISE DE TIPOS DE VIAGEM
+# =============================================================================
+
+@st.fragment
+@perfilar_secao
+def secao_tipos_viagem(contexto):
+    """Distribuição e duração por tipo de viagem"""
+    resultados = contexto['resultados']
+    st.header("✈️ Análise de Tipos de Viagem")
+    
+    col1, col2 = st.columns(2)
+    
+    tipos = resultados.conjunto('tipos')
+    
+    with col1:
+        if not tipos.empty:
+            fig_tipo = obter_figura('tipo', contexto)
+            st.plotly_chart(fig_tipo, use_container_width=True)
+    
+    with col2:
+        if not tipos.empty:
+            fig_duracao_tipo_detail = obter_figura('duracao_tipo_detail', contexto)
+            st.plotly_chart(fig_duracao_tipo_detail, use_container_width=True)
+
+
+# =============================================================================
+# DADOS DETALHADOS
+# =============================================================================
+
+@st.fragment
+@perfilar_secao
+def secao_dados_detalhados(contexto):
+    """Tabela filtrada, estatísticas e exportação"""
+    metricas = contexto['metricas']
+    filtros = contexto['filtros']
+    source_key = contexto['source_key']
+    
+    # As linhas só são carregadas aqui, mesmo quando o resto vem do snapshot de métricas
+    df, _, _ = load_dataset(source_key)
+    chave_dados = chave_dataset(source_key)
+    indice_filtros = load_filter_index(chave_dados, df)
+    st.header("📋 Dados Detalhados")
+    
+    with st.expander("Visualizar dados processados"):
+        grade = load_data_grid(chave_dados, indice_filtros.df)
+        todas_colunas = indice_filtros.df.columns.tolist()
+        
+        # Só a página atual, com as colunas escolhidas, vai para o navegador
+        colunas_grade = st.multiselect(
+            "Colunas exibidas:",
+            options=todas_colunas,
+            default=[c for c in COLUNAS_PADRAO if c in todas_colunas]
+        ) or todas_colunas
+        
+        col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+        
+        with col1:
+            busca = st.text_input("🔎 Buscar:", placeholder="Servidor, país, processo...")
+        
+        with col2:
+            ordenar_por = st.selectbox("Ordenar por:", options=["(ordem original)"] + colunas_grade)
+        
+        with col3:
+            crescente = st.radio("Ordem:", ["↑", "↓"], horizontal=True) == "↑"
+        
+        with col4:
+            tamanho_pagina = st.selectbox("Linhas/página:", options=TAMANHOS_PAGINA, index=1)
+        
+        with etapa('consulta_grade', lambda: len(grade.df)) as registro:
+            selecionadas = grade.consultar(
+                indice_filtros.posicoes(filtros),
+                busca=busca,
+                colunas_busca=colunas_grade,
+                ordenar_por=None if ordenar_por == "(ordem original)" else ordenar_por,
+                crescente=crescente
+            )
+            registro['linhas_saida'] = len(selecionadas)
+        total_paginas = grade.total_paginas(len(selecionadas), tamanho_pagina)
+        
+        col1, col2 = st.columns([1, 3])
+        
+        with col1:
+            numero_pagina = st.number_input("Página:", min_value=1, max_value=total_paginas, value=1, step=1)
+        
+        pagina = grade.pagina(selecionadas, colunas_grade, int(numero_pagina), tamanho_pagina)
+        
+        with col2:
+            inicio_pagina = (int(numero_pagina) - 1) * tamanho_pagina
+            st.caption(
+                f"Linhas {min(inicio_pagina + 1, len(selecionadas))}–{inicio_pagina + len(pagina)} "
+                f"de {len(selecionadas)} · página {int(numero_pagina)} de {total_paginas}"
+            )
+        
+        st.dataframe(pagina, hide_index=True)
+        
+        st.subheader("Estatísticas Descritivas")
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Duração Média", f"{metricas['duracao_media']:.1f} dias")
+            st.metric("Duração Mínima", f"{metricas['duracao_min']:.0f} dias")
+        
+        with col2:
+            st.metric("Duração Máxima", f"{metricas['duracao_max']:.0f} dias")
+            st.metric("Antecedência Média", f"{metricas['antecedencia_media']:.1f} dias")
+        
+        with col3:
+            st.metric("Total de Países", f"{metricas['total_paises']}")
+            st.metric("Total de Diretorias", f"{metricas['total_diretorias']}")
+        
+        st.subheader("📥 Exportação")
+        col1, col2 = st.columns([1, 3])
+        
+        with col1:
+            formato_export = st.selectbox("Formato:", options=list(FORMATOS))
+        
+        with col2:
+            colunas_export = st.multiselect(
+                "Colunas (vazio = todas):",
+                options=todas_colunas
+            )
+        
+        extensao, mime_export = FORMATOS[formato_export]
+        
+        # O arquivo só é gerado quando o botão é clicado, e não fica em cache
+        st.download_button(
+            label=f"📥 Download dos dados filtrados ({formato_export})",
+            data=lambda: exportar(indice_filtros.selecionar(filtros), formato_export, colunas_export),
+            file_name=f"afastamentos_ibama_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extensao}",
+            mime=mime_export
+        )
+
+
+# =============================================================================
+# PERFIL DE EXECUÇÃO (MODO DEBUG)
+# =============================================================================
+
+def painel_perfil(perfil):
+    """Cascata da execução atual e histórico das últimas execuções da sessão"""
+    from afastamentos.graficos import cascata_perfil
     
-    def mapear_pais(pais_input):
-        if pd.isna(pais_input) or str(pais_input).lower() in ['nan', 'none', 'null', '']:
-            return None
+    with st.expander("⏱️ Perfil de execução", expanded=True):
+        etapas = pd.DataFrame(perfil.etapas)
         
-        pais_input_str = str(pais_input).strip()
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Tempo total", f"{perfil.total_segundos * 1000:.0f} ms")
+        col2.metric("Primeira pintura",
+                    f"{perfil.primeira_pintura_s * 1000:.0f} ms" if perfil.primeira_pintura_s is not None else "-")
+        col3.metric("Etapas", len(etapas))
+        col4.metric("Acertos de cache", int((etapas['cache'] == 'acerto').sum()))
+        col5.metric("Falhas de cache", int((etapas['cache'] == 'falha').sum()))
         
-        if pais_input_str in COUNTRY_MAPPING:
-            return COUNTRY_MAPPING[pais_input_str]
+        st.plotly_chart(cascata_perfil(perfil.etapas), use_container_width=True)
+        st.caption("Memória = pico de alocações da etapa (tracemalloc). Com a medição de memória "
+                   "ligada, os tempos do modo debug ficam maiores que os de produção.")
         
-        for pais_pt, pais_en in COUNTRY_MAPPING.items():
-            if pais_pt.lower() == pais_input_str.lower():
-                return pais_en
+        tabela = etapas.assign(
+            etapa=['· ' * n + e for n, e in zip(etapas['nivel'], etapas['etapa'])],
+            ms=etapas['segundos'] * 1000,
+            memoria_kb=etapas['memoria_bytes'] / 1024
+        )[['etapa', 'ms', 'linhas_entrada', 'linhas_saida', 'memoria_kb', 'cache']]
+        st.dataframe(tabela.round(1), hide_index=True, use_container_width=True)
         
-        return None
+        st.subheader("Histórico da sessão")
+        historico = st.session_state.get('historico_perfil', [])
+        resumo = []
+        for execucao in historico:
+            principais = [e for e in execucao['etapas'] if e['nivel'] == 0]
+            mais_lenta = max(principais, key=lambda e: e['segundos'] or 0) if principais else None
+            resumo.append({
+                'início': execucao['iniciado_em'],
+                'execução': execucao['descricao'],
+                'total_ms': execucao['total_segundos'] * 1000,
+                'pintura_ms': (execucao['primeira_pintura_s'] * 1000
+                               if execucao['primeira_pintura_s'] is not None else None),
+                'etapa mais lenta': mais_lenta['etapa'] if mais_lenta else '-',
+                'ms da mais lenta': (mais_lenta['segundos'] or 0) * 1000 if mais_lenta else 0,
+                'falhas de cache': sum(e['cache'] == 'falha' for e in execucao['etapas']),
+            })
+        st.dataframe(pd.DataFrame(resumo).round(1), hide_index=True, use_container_width=True)
+        
+        st.download_button(
+            label=f"📥 Histórico de perfil ({len(historico)} execuções, JSON)",
+            data=json.dumps(historico, ensure_ascii=False, indent=2),
+            file_name=f"perfil_dashboard_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json"
+        )
+
+
+# Seções carregadas sob demanda, na ordem de exibição
+SECOES = {
+    '🗺️ Mapa Mundi': secao_mapa_mundi,
+    '🌍 Países': secao_paises,
+    '📈 Temporal': secao_temporal,
+    '👥 Simultâneos': secao_concorrencia,
+    '⚠️ Conflitos': secao_conflitos,
+    '🎯 Equidade': secao_equidade,
+    '📋 Planejamento': secao_planejamento,
+    '🏢 Diretorias': secao_diretorias,
+    '✈️ Tipos de Viagem': secao_tipos_viagem,
+    '📋 Dados Detalhados': secao_dados_detalhados,
+}
+
+# Todas visíveis por padrão, como antes das seções sob demanda; esconder é opção de quem usa
+SECOES_PADRAO = list(SECOES)
+
+
+# Toda execução é cronometrada (custo desprezível); memória e painel só no modo debug
+perfil = PerfilExecucao("execução completa").iniciar(INICIO_SCRIPT)
+
+try:
+    # =============================================================================
+    # PRÉ-PROCESSAMENTO DOS DADOS
+    # =============================================================================
+    
+    st.sidebar.header("🔧 Configurações de Processamento")
     
-    df['País_Inglês'] = df['País'].apply(mapear_pais)
+    # O histórico multi-ano só é oferecido depois de gerado por afastamentos.ingestao
+    with etapa('manifesto_historico'):
+        manifesto_historico = ler_manifesto(HISTORICO_DIR)
+    fonte_dados = "Planilha 2025"
+    motor_consultas = MOTOR_PANDAS
+    if manifesto_historico:
+        fonte_dados = st.sidebar.radio("Fonte de dados:", ["Planilha 2025", "Histórico (Parquet)"])
+    
+    if fonte_dados == "Histórico (Parquet)":
+        anos_disponiveis = sorted(int(ano) for ano in manifesto_historico['linhas_por_ano'])
+        anos_selecionados = st.sidebar.multiselect(
+            "Anos:",
+            options=anos_disponiveis,
+            default=anos_disponiveis[-1:]
+        )
+        if not anos_selecionados:
+            st.warning("⚠️ Selecione ao menos um ano do histórico.")
+            st.stop()
+        source_key = ('historico', manifesto_historico['versao'], tuple(sorted(anos_selecionados)))
+        # Antes de qualquer chave: daqui em diante a versão da tabela de países não muda nesta execução
+        with etapa('resolver_paises'):
+            resolver_paises_fonte(source_key)
+        # Com o DuckDB, cards e gráficos saem de SQL sobre o Parquet, sem carregar as linhas
+        if MOTOR_DUCKDB in motores_disponiveis():
+            motor_consultas = st.sidebar.radio("Motor de consultas:", motores_disponiveis(), horizontal=True)
+        
+        # Relê as planilhas de origem do manifesto, uma aba por núcleo
+        if st.sidebar.button("🔄 Reingerir planilhas do histórico"):
+            fontes = [FonteAba(**fonte) for fonte in manifesto_historico['fontes']]
+            barra = st.sidebar.progress(0.0, text=f"Lendo {len(fontes)} abas...")
+            with etapa('ingestao'):
+                gravar_historico(
+                    fontes, HISTORICO_DIR, processos=os.cpu_count() or 1,
+                    progresso=lambda feitas, total, fonte: barra.progress(
+                        feitas / total, text=f"{feitas}/{total} abas ({fonte.aba})")
+                )
+            st.rerun()
+    else:
+        with etapa('identificar_fonte'):
+            source_key = ('planilha', identificar_fonte(FILE_PATH, SHEET_NAME).chave)
     
+    debug_mode = st.sidebar.checkbox("Modo Debug (mostrar dados processados)")
     if debug_mode:
-        st.sidebar.write("🔍 Debug - Países em inglês únicos:", sorted(df['País_Inglês'].dropna().unique()))
-        st.sidebar.write("📊 Contagem:", df['País_Inglês'].value_counts())
+        perfil.ligar_memoria()
     
-    # =============================================================================
-    # TRATAMENTO DE OUTROS CAMPOS - APENAS COLUNAS QUE EXISTEM
-    # =============================================================================
+    # "Leve" e "Blocos" são para máquinas com pouca capacidade de renderização
+    modo_mapa = st.sidebar.radio("Visualização do mapa:", MODOS_MAPA, horizontal=True)
     
-    df['Diretoria'] = df['Diretoria'].fillna('Não Informado')
-    df['Tipo de Viagem'] = df['Tipo de Viagem'].fillna('Não Informado')
-    df['Gênero'] = df['Gênero'].fillna('Não Informado')
-    df['Mês_Início'] = df['Início do Afastamento'].dt.month_name()
-    df['Trimestre'] = 'T' + df['Início do Afastamento'].dt.quarter.astype(str)
+    # Mostrar colunas disponíveis em debug
+    if debug_mode:
+        st.sidebar.write("🔍 Colunas disponíveis:", load_data(source_key).columns.tolist())
     
-    meses_ordem = ['January', 'February', 'March', 'April', 'May', 'June', 
-                   'July', 'August', 'September', 'October', 'November', 'December']
+    # Com métricas pré-calculadas para esta fonte, o dataset nem é carregado
+    # para montar cards e gráficos
+    with etapa('snapshot_metricas', cacheavel=True) as registro:
+        diretorio_metricas = localizar_snapshot_metricas(source_key)
+        snapshot_metricas = load_metric_snapshot(diretorio_metricas) if diretorio_metricas else None
+        if snapshot_metricas is None:
+            registro['cache'] = None
+    
+    if debug_mode:
+        df, relatorio_preparo, cubo = load_dataset(source_key)
+        if snapshot_metricas is not None:
+            st.sidebar.write(f"⚡ Métricas pré-calculadas em {snapshot_metricas.gerado_em}")
+        st.sidebar.write("🔍 Relatório de pré-processamento:",
+                         {k: v for k, v in relatorio_preparo.items() if k != 'memoria'})
+        
+        # Memória por coluna antes/depois da compactação de tipos
+        memoria = pd.DataFrame.from_dict(relatorio_preparo['memoria'], orient='index')
+        memoria.loc['Total'] = ['', '', memoria['bytes_antes'].sum(), memoria['bytes_depois'].sum()]
+        memoria['reducao_%'] = (1 - memoria['bytes_depois'] / memoria['bytes_antes'].replace(0, np.nan)) * 100
+        st.sidebar.write("💾 Memória do dataset preparado:")
+        st.sidebar.dataframe(memoria.round(1))
+        st.sidebar.write("🔍 Debug - Países em inglês únicos:", sorted(df['País_Inglês'].dropna().unique()))
+        st.sidebar.write("📊 Contagem:", df['País_Inglês'].value_counts())
+        
+        # Valores de País que ficaram fora do mapa, com a melhor sugestão do índice de trigramas
+        nao_resolvidos = paises_nao_resolvidos(df)
+        if not nao_resolvidos.empty:
+            st.sidebar.write("🌐 Países não resolvidos (fora do mapa):")
+            st.sidebar.dataframe(nao_resolvidos, hide_index=True)
+            valor_alias = st.sidebar.selectbox("Grafia:", nao_resolvidos['País'])
+            sugestao = nao_resolvidos.set_index('País').at[valor_alias, 'Sugestão']
+            paises_mapa = sorted(ISO_MAPPING)
+            pais_alias = st.sidebar.selectbox(
+                "Corresponde a:", paises_mapa,
+                index=paises_mapa.index(sugestao) if sugestao in paises_mapa else 0
+            )
+            if st.sidebar.button("✅ Aceitar alias"):
+                RESOLVEDOR.aceitar(valor_alias, pais_alias)
+                # Só a resolução de países é refeita sobre o dataset carregado (a planilha, ao sincronizar)
+                if source_key[0] == 'historico':
+                    resolver_paises_fonte(source_key)
+                    load_history_dataset(source_key, RESOLVEDOR.versao(), _base=(df, relatorio_preparo, cubo))
+                st.rerun()
+        
+        # Achados pela busca aproximada: já valem no painel, mas só vão para o arquivo confirmados aqui
+        automaticos = RESOLVEDOR.automaticos()
+        if automaticos:
+            st.sidebar.write("🤖 Aliases automáticos (não gravados):")
+            st.sidebar.dataframe(pd.DataFrame(automaticos, columns=['País', 'Corresponde a', 'Similaridade']),
+                                 hide_index=True)
+            if st.sidebar.button("💾 Gravar aliases automáticos"):
+                gravados = RESOLVEDOR.gravar_automaticos()
+                st.sidebar.success(f"{gravados} alias(es) gravado(s) em {RESOLVEDOR.arquivo}.")
     
     # =============================================================================
     # SIDEBAR COM FILTROS
@@ -265,9 +973,17 @@ try:
     
     st.sidebar.header("🔧 Filtros")
     
-    diretorias_disponiveis = sorted([d for d in df['Diretoria'].unique() if d not in ['Não Informado', 'nan']])
-    tipos_viagem_disponiveis = sorted([t for t in df['Tipo de Viagem'].unique() if t not in ['Não Informado', 'nan']])
-    
+    if snapshot_metricas is not None:
+        opcoes = snapshot_metricas.opcoes
+    elif motor_consultas == MOTOR_DUCKDB:
+        with etapa('opcoes_filtro'):
+            opcoes = load_query_engine(chave_dataset(source_key)).opcoes_filtro()
+    else:
+        cubo = load_dataset(source_key)[2]
+        with etapa('opcoes_filtro'):
+            opcoes = opcoes_filtro(cubo)
+    diretorias_disponiveis = opcoes['diretorias']
+    tipos_viagem_disponiveis = opcoes['tipos']
     tipo_selecionado = st.sidebar.selectbox(
         "Tipo de Viagem:",
         options=["Todos"] + tipos_viagem_disponiveis
@@ -278,52 +994,73 @@ try:
         options=["Todas"] + diretorias_disponiveis
     )
     
-    df_filtrado = df.copy()
-    
-    if tipo_selecionado != 'Todos':
-        df_filtrado = df_filtrado[df_filtrado['Tipo de Viagem'] == tipo_selecionado]
-    
-    if diretoria_selecionada != 'Todas':
-        df_filtrado = df_filtrado[df_filtrado['Diretoria'] == diretoria_selecionada]
-    
-    # =============================================================================
-    # AGREGAÇÕES PARA OS MAPAS
-    # =============================================================================
-    
-    df_com_pais = df_filtrado[df_filtrado['País_Inglês'].notna()].copy()
-    
-    viagens_por_pais = df_com_pais.groupby('País_Inglês').agg({
-        'País': 'count',
-        'Servidor': 'nunique',
-        'Duração (dias)': 'mean'
-    }).reset_index()
-    viagens_por_pais.columns = ['País', 'Total_Viagens', 'Servidores_Unicos', 'Duração_Media']
-    viagens_por_pais['ISO_Code'] = viagens_por_pais['País'].map(ISO_MAPPING)
-    
-    viagens_por_mes = df_filtrado.groupby('Mês_Início').size().reset_index(name='Viagens')
-    viagens_por_mes['Mês_Início'] = pd.Categorical(
-        viagens_por_mes['Mês_Início'], 
-        categories=meses_ordem, 
-        ordered=True
-    )
-    viagens_por_mes = viagens_por_mes.sort_values('Mês_Início')
+    # Vazio = sem filtro na dimensão
+    generos_selecionados = st.sidebar.multiselect("Gênero:", options=opcoes['generos'])
+    paises_selecionados = st.sidebar.multiselect("País:", options=opcoes['paises'])
+    trimestres_selecionados = st.sidebar.multiselect("Trimestre:", options=opcoes['trimestres'])
+    
+    periodo = None
+    if opcoes['periodo']:
+        periodo_min, periodo_max = (date.fromisoformat(d) for d in opcoes['periodo'])
+        periodo_escolhido = st.sidebar.date_input(
+            "Período (início do afastamento):",
+            value=(periodo_min, periodo_max),
+            min_value=periodo_min,
+            max_value=periodo_max,
+            format="DD/MM/YYYY"
+        )
+        # Enquanto só a primeira data foi escolhida, o período ainda não vale
+        if len(periodo_escolhido) == 2 and tuple(periodo_escolhido) != (periodo_min, periodo_max):
+            periodo = tuple(periodo_escolhido)
+    
+    filtros = {
+        'Tipo de Viagem': None if tipo_selecionado == 'Todos' else tipo_selecionado,
+        'Diretoria': None if diretoria_selecionada == 'Todas' else diretoria_selecionada,
+        'Gênero': generos_selecionados or None,
+        'País_Inglês': paises_selecionados or None,
+        'Trimestre': trimestres_selecionados or None,
+        COLUNA_TEMPO: periodo,
+    }
+    filtros_cubo = {dim: valor for dim, valor in filtros.items() if dim != COLUNA_TEMPO}
+    so_tipo_diretoria = all(filtros[dim] is None for dim in ['Gênero', 'País_Inglês', 'Trimestre', COLUNA_TEMPO])
+    
+    # Métricas e conjuntos dos gráficos: do snapshot pré-calculado quando há
+    # (só Tipo × Diretoria), senão do motor DuckDB ou do cubo fatiado
+    # (calculados sob demanda pelas seções). Com período, o cubo é montado só
+    # com as linhas do período.
+    resultados = None
+    if snapshot_metricas is not None and so_tipo_diretoria:
+        resultados = snapshot_metricas.resultados(filtros['Tipo de Viagem'], filtros['Diretoria'])
+    if resultados is None and motor_consultas == MOTOR_DUCKDB:
+        resultados = load_query_results(chave_dataset(source_key), chave_filtros(filtros), filtros)
+    if resultados is None:
+        df, _, cubo = load_dataset(source_key)
+        if periodo is not None:
+            chave_dados = chave_dataset(source_key)
+            cubo = load_period_cube(chave_dados, periodo, load_filter_index(chave_dados, df))
+        with etapa('fatiar_cubo', lambda: len(cubo.celulas)) as registro:
+            resultados = ResultadosCubo(fatiar(cubo, filtros_cubo))
+            registro['linhas_saida'] = len(resultados.cubo.celulas)
+    with etapa('metricas'):
+        metricas = resultados.metricas()
+    # Lida depois de os resultados saírem do snapshot, do motor ou do dataset já resolvido
+    chave_dados = chave_dataset(source_key)
+    
+    # Visão sem filtros: figuras pré-montadas por afastamentos.aquecimento, se houver
+    if snapshot_metricas is not None and all(valor is None for valor in filtros.values()):
+        for chart_id, spec in snapshot_metricas.figuras.items():
+            load_figure_cache().semear((chart_id, chave_filtros(filtros), chave_dados), spec)
     
     # =============================================================================
     # MÉTRICAS PRINCIPAIS
     # =============================================================================
     
-    total_viagens = df_filtrado.shape[0]
-    total_servidores = df_filtrado['Servidor'].nunique()
-    duracao_media = df_filtrado['Duração (dias)'].mean()
-    antecedencia_media = df_filtrado['Antecedência (dias)'].mean()
-    total_paises = df_com_pais['País_Inglês'].nunique()
-    
-    custo_total = 0
-    custo_medio = 0
-    if 'Custo' in df_filtrado.columns:
-        custo_total = df_filtrado['Custo'].sum() if pd.notna(df_filtrado['Custo'].sum()) else 0
-        custo_medio = df_filtrado['Custo'].mean() if pd.notna(df_filtrado['Custo'].mean()) else 0
-    
+    total_viagens = metricas['total_viagens']
+    total_servidores = metricas['total_servidores']
+    duracao_media = metricas['duracao_media']
+    antecedencia_media = metricas['antecedencia_media']
+    total_paises = metricas['total_paises']
+    custo_total = metricas['custo_total']
     st.header("📊 Métricas Principais")
     
     col1, col2, col3, col4 = st.columns(4)
@@ -360,6 +1097,10 @@ try:
             </div>
         """, unsafe_allow_html=True)
     
+    # Cards principais enviados: primeiro conteúdo útil da página
+    perfil.marcar_primeira_pintura()
+    load_startup_record().setdefault('primeira_pintura_s', perfil.primeira_pintura_s)
+    
     # =============================================================================
     # MÉTRICAS AVANÇADAS
     # =============================================================================
@@ -377,7 +1118,7 @@ try:
         """, unsafe_allow_html=True)
     
     with col2:
-        max_viagens_mes = viagens_por_mes['Viagens'].max() if not viagens_por_mes.empty else 0
+        max_viagens_mes = metricas['pico_viagens_mes']
         st.markdown(f"""
             <div class="metric-card" style="background: linear-gradient(135deg, #FFD93D, #FF9F43);">
                 <h3>{max_viagens_mes:.0f}</h3>
@@ -386,7 +1127,7 @@ try:
         """, unsafe_allow_html=True)
     
     with col3:
-        duracao_total = df_filtrado['Duração (dias)'].sum()
+        duracao_total = metricas['duracao_total']
         st.markdown(f"""
             <div class="metric-card" style="background: linear-gradient(135deg, #A8E6CF, #56CCF2);">
                 <h3>{duracao_total:.0f}</h3>
@@ -395,11 +1136,10 @@ try:
         """, unsafe_allow_html=True)
     
     # Segunda linha de métricas
-    if 'Custo' in df_filtrado.columns and custo_total > 0:
+    if custo_total > 0:
         col1, col2, col3 = st.columns(3)
         
-        custo_por_viagem = custo_total / total_viagens if total_viagens > 0 else 0
-        
+        custo_por_viagem = metricas['custo_por_viagem']
         with col1:
             st.markdown(f"""
                 <div class="metric-card" style="background: linear-gradient(135deg, #11998E, #38EF7D);">
@@ -417,7 +1157,7 @@ try:
             """, unsafe_allow_html=True)
         
         with col3:
-            pct_bem_planejado = (df_filtrado['Bem_Planejado'].sum() / total_viagens * 100) if total_viagens > 0 else 0
+            pct_bem_planejado = metricas['pct_bem_planejado']
             st.markdown(f"""
                 <div class="metric-card" style="background: linear-gradient(135deg, #4158D0, #C850C0);">
                     <h3>{pct_bem_planejado:.0f}%</h3>
@@ -426,425 +1166,46 @@ try:
             """, unsafe_allow_html=True)
     
     # =============================================================================
-    # MAPA MUNDI
-    # =============================================================================
-    
-    st.header("🗺️ Mapa Mundi - Países Visitados")
-    
-    if not viagens_por_pais.empty and not viagens_por_pais['ISO_Code'].isna().all():
-        try:
-            fig_mapa_mundi = px.choropleth(
-                viagens_por_pais,
-                locations='ISO_Code',
-                color='Total_Viagens',
-                hover_name='País',
-                hover_data={
-                    'ISO_Code': False,
-                    'Total_Viagens': True,
-                    'Servidores_Unicos': True,
-                    'Duração_Media': ':.1f'
-                },
-                color_continuous_scale='Greens',
-                title='Distribuição de Viagens por País',
-                labels={
-                    'Total_Viagens': 'Viagens',
-                    'Servidores_Unicos': 'Servidores',
-                    'Duração_Media': 'Duração Média'
-                }
-            )
-            
-            fig_mapa_mundi.update_layout(
-                geo=dict(
-                    showframe=True,
-                    showcoastlines=True,
-                    projection_type='natural earth',
-                    bgcolor='rgba(255, 255, 255, 1)'
-                ),
-                height=600,
-                hovermode='closest',
-                coloraxis_colorbar=dict(
-                    title="Número de Viagens",
-                    thickness=15,
-                    len=0.7
-                )
-            )
-            
-            st.plotly_chart(fig_mapa_mundi, use_container_width=True)
-            
-        except Exception as e:
-            st.warning(f"⚠️ Erro ao gerar mapa mundi: {str(e)}")
-    else:
-        st.warning("⚠️ Não foi possível gerar o mapa mundi. Verifique os dados de países.")
-    
-    # =============================================================================
-    # ANÁLISE DETALHADA POR PAÍS
-    # =============================================================================
-    
-    st.header("🌍 Análise Detalhada por País")
-    
-    if not viagens_por_pais.empty:
-        fig_mapa = px.bar(
-            viagens_por_pais.sort_values('Total_Viagens', ascending=True).tail(15),
-            x='Total_Viagens',
-            y='País',
-            orientation='h',
-            title='Top 15 Países com Mais Viagens',
-            color='Total_Viagens',
-            color_continuous_scale='Greens',
-            height=500,
-            hover_data={'Servidores_Unicos': True, 'Duração_Media': ':.1f'}
-        )
-        fig_mapa.update_layout(
-            xaxis_title="Número de Viagens",
-            yaxis_title="País",
-            hovermode='closest'
-        )
-        st.plotly_chart(fig_mapa, use_container_width=True)
-        
-        st.subheader("📍 Análise de Viagens vs Duração Média")
-        
-        try:
-            fig_scatter = go.Figure(data=[
-                go.Scatter(
-                    x=viagens_por_pais['Total_Viagens'],
-                    y=viagens_por_pais['Duração_Media'],
-                    mode='markers+text',
-                    marker=dict(
-                        size=viagens_por_pais['Servidores_Unicos'] * 2,
-                        color=viagens_por_pais['Total_Viagens'],
-                        colorscale='Greens',
-                        showscale=True,
-                        colorbar=dict(title="Viagens"),
-                        line=dict(width=1, color='white')
-                    ),
-                    text=viagens_por_pais['País'],
-                    textposition="top center",
-                    hovertemplate='<b>%{text}</b><br>Viagens: %{x}<br>Duração Média: %{y:.1f} dias<extra></extra>'
-                )
-            ])
-            
-            fig_scatter.update_layout(
-                title='Análise de Viagens vs Duração Média por País<br><sub>Tamanho da bolha = Servidores únicos</sub>',
-                xaxis_title='Número de Viagens',
-                yaxis_title='Duração Média (dias)',
-                height=500,
-                hovermode='closest',
-                template='plotly_white'
-            )
-            
-            st.plotly_chart(fig_scatter, use_container_width=True)
-        except Exception:
-            st.info("Gráfico de scatter indisponível")
-        
-        st.subheader("📋 Detalhes Completos por País")
-        
-        df_paises_display = viagens_por_pais.sort_values('Total_Viagens', ascending=False).copy()
-        df_paises_display = df_paises_display.drop('ISO_Code', axis=1)
-        df_paises_display.columns = ['País', 'Total de Viagens', 'Servidores Únicos', 'Duração Média (dias)']
-        df_paises_display['Total de Viagens'] = df_paises_display['Total de Viagens'].astype(int)
-        df_paises_display['Servidores Únicos'] = df_paises_display['Servidores Únicos'].astype(int)
-        df_paises_display['Duração Média (dias)'] = df_paises_display['Duração Média (dias)'].round(1)
-        
-        st.dataframe(df_paises_display, use_container_width=True)
-    
-    # =============================================================================
-    # ANÁLISE TEMPORAL
-    # =============================================================================
-    
-    st.header("📈 Análise Temporal")
-    
-    if not viagens_por_mes.empty:
-        fig_mes = px.bar(
-            viagens_por_mes, 
-            x='Mês_Início', 
-            y='Viagens',
-            title='Viagens por Mês (mês de início)',
-            color='Viagens',
-            color_continuous_scale='Viridis'
-        )
-        st.plotly_chart(fig_mes, use_container_width=True)
-    else:
-        st.info("Não há dados para o gráfico mensal")
-    
-    # =============================================================================
-    # 🎯 ANÁLISE DE EQUIDADE E ASPECTOS NEGLIGENCIADOS
-    # =============================================================================
-    
-    st.header("🎯 Análise de Equidade e Aspectos Negligenciados")
-    
-    # 1. DISTRIBUIÇÃO DE GÊNERO POR TIPO DE VIAGEM
-    st.subheader("👥 Distribuição de Gênero por Tipo de Viagem")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        genero_tipo = df_filtrado.groupby(['Tipo de Viagem', 'Gênero']).size().reset_index(name='Viagens')
-        
-        fig_genero_tipo = px.bar(
-            genero_tipo,
-            x='Tipo de Viagem',
-            y='Viagens',
-            color='Gênero',
-            barmode='group',
-            title='Acesso por Gênero: Quem viaja para qual tipo de evento?',
-            color_discrete_map={'Masculino': '#0066CC', 'Feminino': '#FF6B9D', 'Não Informado': '#CCCCCC'}
-        )
-        st.plotly_chart(fig_genero_tipo, use_container_width=True)
-    
-    with col2:
-        genero_tipo_pct = df_filtrado.groupby('Tipo de Viagem')['Gênero'].value_counts(normalize=True).unstack(fill_value=0) * 100
-        
-        fig_genero_tipo_pct = px.bar(
-            genero_tipo_pct.reset_index().melt(id_vars='Tipo de Viagem'),
-            x='Tipo de Viagem',
-            y='value',
-            color='Gênero',
-            barmode='stack',
-            title='Composição de Gênero por Tipo de Viagem (%)',
-            labels={'value': 'Percentual (%)'},
-            color_discrete_map={'Masculino': '#0066CC', 'Feminino': '#FF6B9D', 'Não Informado': '#CCCCCC'}
-        )
-        st.plotly_chart(fig_genero_tipo_pct, use_container_width=True)
-    
-   
-    # =============================================================================
-    # 2. DURAÇÃO MÉDIA POR GÊNERO (APENAS GRÁFICO)
-    # =============================================================================
-    
-    st.subheader("⏱️ Duração Média de Viagens por Gênero")
-    
-    duracao_gen_detail = df_filtrado.groupby('Gênero').agg({
-        'Duração (dias)': 'mean'
-    }).reset_index()
-    
-    fig_duracao_gen = px.bar(
-        duracao_gen_detail,
-        x='Gênero',
-        y='Duração (dias)',
-        color='Gênero',
-        color_discrete_map={'Masculino': '#0066CC', 'Feminino': '#FF6B9D', 'Não Informado': '#CCCCCC'},
-        title='Duração Média de Viagens por Gênero',
-        labels={'Duração (dias)': 'Duração Média (dias)'},
-        text_auto='.1f'
-    )
-    fig_duracao_gen.update_traces(textposition='outside')
-    st.plotly_chart(fig_duracao_gen, use_container_width=True)
-    
-    # =============================================================================
-    # 3. REPRESENTATIVIDADE POR DIRETORIA E GÊNERO
+    # SEÇÕES DE ANÁLISE
     # =============================================================================
     
-    st.subheader("🏢 Diversidade por Diretoria: Distribuição de Gênero")
-    
-    genero_diretoria = df_filtrado.groupby(['Diretoria', 'Gênero']).size().reset_index(name='Viagens')
-    
-    fig_diversity = px.bar(
-        genero_diretoria,
-        x='Diretoria',
-        y='Viagens',
-        color='Gênero',
-        barmode='stack',
-        title='Composição de Gênero por Diretoria',
-        color_discrete_map={'Masculino': '#0066CC', 'Feminino': '#FF6B9D', 'Não Informado': '#CCCCCC'}
+    # Só as seções selecionadas montam agregações e figuras (todas, por padrão);
+    # cada seção é um fragmento, então seus widgets internos re-executam apenas ela mesma
+    secoes_visiveis = st.pills(
+        "Análises exibidas:",
+        options=list(SECOES),
+        selection_mode="multi",
+        default=SECOES_PADRAO,
+        key="secoes_visiveis"
     )
-    st.plotly_chart(fig_diversity, use_container_width=True)
-    
-    # =============================================================================
-    # 📋 ANÁLISE DE PLANEJAMENTO (ANTECEDÊNCIA)
-    # =============================================================================
-    
-    st.header("📋 Análise de Planejamento e Governança")
     
-    st.subheader("📅 Qualidade do Planejamento: Categorização de Antecedência")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        dist_antec = df_filtrado['Categoria_Antecedencia'].value_counts().reset_index(name='Viagens')
-        dist_antec.columns = ['Categoria', 'Viagens']
-        
-        # Ordenar corretamente
-        ordem_antec = ['Urgência (0-15d)', 'Aviso Prévio (15-30d)', 'Bem Planejada (30+d)']
-        dist_antec['Categoria'] = pd.Categorical(dist_antec['Categoria'], categories=ordem_antec, ordered=True)
-        dist_antec = dist_antec.sort_values('Categoria')
-        
-        fig_antec_dist = px.bar(
-            dist_antec,
-            x='Categoria',
-            y='Viagens',
-            color='Categoria',
-            color_discrete_map={
-                'Urgência (0-15d)': '#FF6B6B',
-                'Aviso Prévio (15-30d)': '#FFD93D',
-                'Bem Planejada (30+d)': '#6BCB77'
-            },
-            title='Distribuição de Planejamento: Tempo de Antecedência',
-            labels={'Viagens': 'Número de Viagens'},
-            text_auto='value'
-        )
-        st.plotly_chart(fig_antec_dist, use_container_width=True)
-    
-    with col2:
-        pct_urgencia = (df_filtrado['Categoria_Antecedencia'] == 'Urgência (0-15d)').sum() / len(df_filtrado) * 100 if len(df_filtrado) > 0 else 0
-        pct_aviso = (df_filtrado['Categoria_Antecedencia'] == 'Aviso Prévio (15-30d)').sum() / len(df_filtrado) * 100 if len(df_filtrado) > 0 else 0
-        pct_bem = (df_filtrado['Categoria_Antecedencia'] == 'Bem Planejada (30+d)').sum() / len(df_filtrado) * 100 if len(df_filtrado) > 0 else 0
-        
-        fig_antec_pie = px.pie(
-            values=[pct_urgencia, pct_aviso, pct_bem],
-            names=['Urgência (0-15d)', 'Aviso Prévio (15-30d)', 'Bem Planejada (30+d)'],
-            title='% de Viagens por Categoria de Planejamento',
-            color_discrete_map={
-                'Urgência (0-15d)': '#FF6B6B',
-                'Aviso Prévio (15-30d)': '#FFD93D',
-                'Bem Planejada (30+d)': '#6BCB77'
-            }
-        )
-        st.plotly_chart(fig_antec_pie, use_container_width=True)
-    
-    # Insight
-    st.markdown(f"""
-        <div class="alert-box">
-        <b>🎯 Indicador de Governança:</b> 
-        <br>• <b>{pct_urgencia:.1f}%</b> em URGÊNCIA (0-15 dias)
-        <br>• <b>{pct_aviso:.1f}%</b> com aviso prévio (15-30 dias)
-        <br>• <b>{pct_bem:.1f}%</b> bem planejadas (30+ dias) - Ideal para gestão eficiente
-        <br>💡 Aumentar para 70-80% com planejamento antecipado
-        </div>
-    """, unsafe_allow_html=True)
-    
-    # =============================================================================
-    # 🆕 GRÁFICO: ANÁLISE POR TIPO DE VIAGEM
-    # =============================================================================
-    
-    st.subheader("🎯 Prioridades por Tipo de Viagem e Diretoria")
-    
-    tipo_viagem_dir = df_filtrado.groupby(['Tipo de Viagem', 'Diretoria']).size().reset_index(name='Viagens')
-    tipo_viagem_dir_top = tipo_viagem_dir[tipo_viagem_dir['Viagens'] >= 2].sort_values('Viagens', ascending=False).head(15)
-    
-    fig_tipo_dir = px.bar(
-        tipo_viagem_dir_top,
-        x='Viagens',
-        y='Tipo de Viagem',
-        color='Diretoria',
-        orientation='h',
-        title='Top 15 Combinações: Tipo de Viagem × Diretoria',
-        labels={'Viagens': 'Número de Viagens'}
-    )
-    st.plotly_chart(fig_tipo_dir, use_container_width=True)
-    
-    # Insight
-    if len(tipo_viagem_dir_top) > 0:
-        top_combo = tipo_viagem_dir_top.iloc[0]
-        st.markdown(f"""
-            <div class="insight-box">
-            <b>🎯 Foco Principal:</b> A combinação "<b>{top_combo['Tipo de Viagem']}</b>" da diretoria "<b>{top_combo['Diretoria']}</b>" representa <b>{top_combo['Viagens']}</b> viagens.
-            <br>💡 Oportunidade: Otimizar processos para esta categoria de alta demanda.
-            </div>
-        """, unsafe_allow_html=True)
-           
-    # =============================================================================
-    # ANÁLISE POR DIRETORIA
-    # =============================================================================
-    
-    st.header("🏢 Análise de Recursos por Diretoria")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        viagens_diretoria = df_filtrado['Diretoria'].value_counts().reset_index()
-        viagens_diretoria.columns = ['Diretoria', 'Viagens']
-        
-        fig_diretoria = px.bar(
-            viagens_diretoria,
-            x='Diretoria',
-            y='Viagens',
-            title='Distribuição de Viagens por Diretoria',
-            color='Viagens',
-            color_continuous_scale='Blues'
-        )
-        st.plotly_chart(fig_diretoria, use_container_width=True)
-    
-    with col2:
-        duracao_diretoria = df_filtrado.groupby('Diretoria')['Duração (dias)'].mean().sort_values(ascending=False).reset_index()
-        duracao_diretoria.columns = ['Diretoria', 'Duração Média']
-        
-        fig_dur_dir = px.bar(
-            duracao_diretoria,
-            x='Diretoria',
-            y='Duração Média',
-            title='Duração Média de Afastamento por Diretoria',
-            color='Duração Média',
-            color_continuous_scale='Oranges'
-        )
-        st.plotly_chart(fig_dur_dir, use_container_width=True)
-    
-    # =============================================================================
-    # ANÁLISE DE TIPOS DE VIAGEM
-    # =============================================================================
-    
-    st.header("✈️ Análise de Tipos de Viagem")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        distrib_tipo = df_filtrado['Tipo de Viagem'].value_counts()
-        if not distrib_tipo.empty:
-            fig_tipo = px.pie(
-                values=distrib_tipo.values, 
-                names=distrib_tipo.index,
-                title='Distribuição por Tipo de Viagem',
-                color_discrete_sequence=CORES_IBAMA
-            )
-            fig_tipo.update_traces(textposition='inside', textinfo='percent+label')
-            st.plotly_chart(fig_tipo, use_container_width=True)
-    
-    with col2:
-        duracao_tipo = df_filtrado.groupby('Tipo de Viagem')['Duração (dias)'].agg(['mean', 'count']).reset_index()
-        if not duracao_tipo.empty:
-            fig_duracao_tipo_detail = px.bar(
-                duracao_tipo,
-                x='Tipo de Viagem',
-                y='mean',
-                title='Duração Média por Tipo de Viagem',
-                color='mean',
-                color_continuous_scale='Blues',
-                labels={'mean': 'Duração Média (dias)'}
-            )
-            st.plotly_chart(fig_duracao_tipo_detail, use_container_width=True)
-    
-    # =============================================================================
-    # DADOS DETALHADOS
-    # =============================================================================
+    contexto = {
+        'source_key': source_key,
+        'chave_dados': chave_dados,
+        'filtros': filtros,
+        'resultados': resultados,
+        'metricas': metricas,
+        'modo_mapa': modo_mapa,
+        'debug_mode': debug_mode,
+    }
     
-    st.header("📋 Dados Detalhados")
+    for nome_secao, secao in SECOES.items():
+        if nome_secao in (secoes_visiveis or []):
+            secao(contexto)
     
-    with st.expander("Visualizar dados processados"):
-        st.dataframe(df_filtrado)
-        
-        st.subheader("Estatísticas Descritivas")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Duração Média", f"{df_filtrado['Duração (dias)'].mean():.1f} dias")
-            st.metric("Duração Mínima", f"{df_filtrado['Duração (dias)'].min():.0f} dias")
-        
-        with col2:
-            st.metric("Duração Máxima", f"{df_filtrado['Duração (dias)'].max():.0f} dias")
-            st.metric("Antecedência Média", f"{df_filtrado['Antecedência (dias)'].mean():.1f} dias")
-        
-        with col3:
-            st.metric("Total de Países", f"{df_com_pais['País_Inglês'].nunique()}")
-            st.metric("Total de Diretorias", f"{df_filtrado['Diretoria'].nunique()}")
-        
-        csv = df_filtrado.to_csv(index=False)
-        st.download_button(
-            label="📥 Download dos dados filtrados (CSV)",
-            data=csv,
-            file_name=f"afastamentos_ibama_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+    # Estatísticas ao final, já incluindo as figuras desta execução
+    if debug_mode:
+        st.sidebar.write("🧮 Cache de figuras:", load_figure_cache().estatisticas())
+        st.sidebar.write("🚀 Primeira pintura (ms):", {
+            'esta execução': round(perfil.primeira_pintura_s * 1000),
+            'primeira execução do processo': round(load_startup_record()['primeira_pintura_s'] * 1000),
+        })
+        registrar_perfil(perfil.finalizar())
+        painel_perfil(perfil)
 
 except Exception as e:
     st.error(f"Erro ao processar os dados: {str(e)}")
     import traceback
     st.code(traceback.format_exc())
+finally:
+    perfil.finalizar()
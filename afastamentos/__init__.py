@@ -0,0 +1 @@
+"""Pipeline de dados do Dashboard de Afastamentos - IBAMA."""
@@ -0,0 +1,69 @@
+"""Aquecimento do dashboard antes do primeiro acesso.
+
+Num processo novo, o primeiro visitante pagaria a leitura do .xlsx, o
+pré-processamento, o cubo e a primeira montagem de cada figura. Rodado no
+deploy, antes de ``streamlit run``, este módulo deixa tudo isso em disco:
+o snapshot Arrow da planilha, o snapshot de métricas (com a visão
+Todos/Todas e as demais combinações Tipo × Diretoria) e as specs das
+figuras da visão sem filtros, que o dashboard usa para semear o cache de
+figuras. O primeiro acesso então não lê a planilha nem monta o dataset.
+
+Uso no deploy::
+
+    python -m afastamentos.aquecimento && streamlit run DashV2.py
+    python -m afastamentos.aquecimento --historico --anos 2025
+"""
+
+import argparse
+import json
+import os
+
+from .metricas import ARQUIVO_FIGURAS, METRICAS_DIR, SnapshotMetricas, _carregar_fonte, gravar_snapshot_metricas
+from .perfil import PerfilExecucao, etapa
+
+
+def gravar_figuras_padrao(diretorio):
+    """Grava no snapshot as specs de todas as figuras da visão Todos/Todas."""
+    # Só aqui: o Plotly Express é o import mais pesado do painel
+    from .graficos import FIGURAS
+
+    resultados = SnapshotMetricas(diretorio).resultados(None, None)
+    specs = {chart_id: construir(resultados).to_json() for chart_id, construir in FIGURAS.items()}
+    with open(os.path.join(diretorio, ARQUIVO_FIGURAS), "w", encoding="utf-8") as f:
+        json.dump(specs, f)
+    return specs
+
+
+def aquecer(args):
+    """Monta fonte, snapshot de métricas e figuras padrão; retorna ``(diretorio, perfil)``."""
+    with PerfilExecucao("aquecimento") as perfil:
+        with etapa('fonte'):
+            source_key, cubo = _carregar_fonte(args)
+        with etapa('snapshot_metricas'):
+            diretorio = gravar_snapshot_metricas(cubo, source_key, args.destino, args.processos)
+        with etapa('figuras_padrao'):
+            gravar_figuras_padrao(diretorio)
+    return diretorio, perfil
+
+
+def main(argv=None):
+    from .ingestao import HISTORICO_DIR
+
+    parser = argparse.ArgumentParser(description="Aquecimento do dashboard de afastamentos antes do primeiro acesso.")
+    parser.add_argument("--planilha", default="DATA Afastamentos 2025.xlsx")
+    parser.add_argument("--aba", default="Afastamentos 2025")
+    parser.add_argument("--historico", action="store_true", help="aquecer o histórico Parquet em vez da planilha")
+    parser.add_argument("--historico-dir", default=HISTORICO_DIR)
+    parser.add_argument("--anos", type=int, nargs="+", help="anos do histórico (padrão: o mais recente)")
+    parser.add_argument("--destino", default=METRICAS_DIR)
+    parser.add_argument("--processos", type=int, default=None, help="processos paralelos (padrão: todos os núcleos)")
+    args = parser.parse_args(argv)
+
+    diretorio, perfil = aquecer(args)
+    print(f"{diretorio}: aquecido em {perfil.total_segundos:.2f} s")
+    for registro in perfil.etapas:
+        print(f"{'  ' * (registro['nivel'] + 1)}{registro['etapa']}: {registro['segundos'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Cache em disco compartilhado pelos processos do Streamlit de um host.
+
+``st.cache_data`` e ``st.cache_resource`` valem por processo: com várias
+réplicas atrás do balanceador, cada uma prepararia o mesmo dataset e
+guardaria sua própria cópia. Aqui o dataset preparado e as tabelas do cubo
+são gravados uma vez por versão da fonte, em arquivos Arrow IPC sem
+compressão, e cada processo os abre por memory-map: as páginas vêm do page
+cache do sistema e são as mesmas para todas as réplicas.
+
+As colunas são gravadas de forma que o pandas as use sem cópia: categóricas
+como códigos inteiros (categorias nos metadados), datas como int64,
+booleanos como uint8 e números sem máscara de nulos (NaN e NaT ficam no
+próprio valor). Os DataFrames lidos apontam para o arquivo e são somente
+leitura.
+
+Cada versão é um diretório gravado num temporário e renomeado de uma vez.
+Um lock de arquivo (``fcntl.flock``, onde existe) faz com que só um processo
+construa a versão enquanto os outros esperam por ela.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .snapshot import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock, cada processo constrói e o último rename vale
+    fcntl = None
+
+COMPARTILHADO_DIR = os.path.join(CACHE_DIR, "compartilhado")
+ARQUIVO_METADADOS = "metadados.json"
+
+# Incrementar quando a codificação das colunas mudar
+VERSAO_FORMATO = 1
+
+# Versões mantidas em disco; as mais antigas são apagadas a cada gravação
+MANTER_VERSOES = 4
+
+_CHAVE_CODIFICACAO = b"codificacao"
+_CHAVE_INDICE = b"indice"
+
+
+def versao_chave(chave):
+    """Nome do diretório da versão para ``chave`` (por exemplo, o ``source_key``)."""
+    bruto = json.dumps([VERSAO_FORMATO, chave], default=list)
+    return hashlib.sha256(bruto.encode()).hexdigest()[:16]
+
+
+# =============================================================================
+# CODIFICAÇÃO DAS COLUNAS
+# =============================================================================
+
+def _codificar_coluna(serie):
+    """``(array Arrow, codificação)`` de uma coluna, no formato lido sem cópia."""
+    dtype = serie.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codificacao = {'tipo': 'categoria', 'categorias': dtype.categories.tolist(), 'ordenada': dtype.ordered}
+        return pa.array(serie.cat.codes.to_numpy()), codificacao
+    if dtype == bool:
+        return pa.array(serie.to_numpy().view(np.uint8)), {'tipo': 'numpy', 'dtype': 'bool'}
+    if dtype.kind == 'M' and getattr(dtype, 'tz', None) is None:
+        return pa.array(serie.to_numpy().view(np.int64)), {'tipo': 'numpy', 'dtype': str(dtype)}
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iuf':
+        # A partir do numpy o Arrow não cria máscara: NaN continua sendo valor
+        return pa.array(serie.to_numpy()), {'tipo': 'numpy', 'dtype': str(dtype)}
+    return pa.array(serie, from_pandas=True), {'tipo': 'arrow'}
+
+
+def _decodificar_coluna(coluna, codificacao):
+    if codificacao['tipo'] == 'arrow':
+        # O array, não a Series: uma Series seria realinhada ao índice do DataFrame
+        return coluna.to_pandas().array
+    valores = coluna.to_numpy(zero_copy_only=True)
+    if codificacao['tipo'] == 'categoria':
+        dtype = pd.CategoricalDtype(codificacao['categorias'], ordered=codificacao['ordenada'])
+        return pd.Categorical.from_codes(valores, dtype=dtype, validate=False)
+    return valores.view(np.dtype(codificacao['dtype']))
+
+
+def codificar(df):
+    """Tabela Arrow de ``df`` (índice incluído) com a codificação de cada coluna nos metadados."""
+    nomes_indice = list(df.index.names)
+    colunas = {f'__indice_{i}__': df.index.get_level_values(i).to_series(index=df.index)
+               for i in range(df.index.nlevels)}
+    colunas.update(df.items())
+
+    campos, arrays = [], []
+    for nome, serie in colunas.items():
+        array, codificacao = _codificar_coluna(serie)
+        campos.append(pa.field(nome, array.type, metadata={_CHAVE_CODIFICACAO: json.dumps(codificacao)}))
+        arrays.append(array)
+    schema = pa.schema(campos, metadata={_CHAVE_INDICE: json.dumps(nomes_indice)})
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def decodificar(tabela):
+    """DataFrame que aponta para os buffers de ``tabela``, sem copiar as colunas numéricas."""
+    tabela = tabela.combine_chunks()
+    nomes_indice = json.loads(tabela.schema.metadata[_CHAVE_INDICE])
+    colunas = {}
+    for campo, coluna in zip(tabela.schema, tabela.columns):
+        codificacao = json.loads(campo.metadata[_CHAVE_CODIFICACAO])
+        colunas[campo.name] = _decodificar_coluna(coluna.chunk(0) if coluna.num_chunks else coluna, codificacao)
+
+    niveis = [colunas.pop(f'__indice_{i}__') for i in range(len(nomes_indice))]
+    if len(niveis) == 1:
+        indice = pd.Index(niveis[0], name=nomes_indice[0], copy=False)
+    else:
+        indice = pd.MultiIndex.from_arrays(niveis, names=nomes_indice)
+    # copy=False: sem consolidar as colunas em blocos, que copiaria tudo
+    return pd.DataFrame(colunas, index=indice, copy=False)
+
+
+# =============================================================================
+# VERSÕES EM DISCO
+# =============================================================================
+
+def gravar_tabelas(diretorio, tabelas, metadados):
+    """Grava ``tabelas`` (nome -> DataFrame) e ``metadados`` (JSON) em ``diretorio``."""
+    os.makedirs(diretorio)
+    for nome, df in tabelas.items():
+        tabela = codificar(df)
+        # Sem compressão: o arquivo precisa ser mapeável diretamente em memória
+        with pa.OSFile(os.path.join(diretorio, f"{nome}.arrow"), "wb") as sink, \
+                pa.ipc.new_file(sink, tabela.schema) as writer:
+            writer.write_table(tabela)
+    with open(os.path.join(diretorio, ARQUIVO_METADADOS), "w", encoding="utf-8") as f:
+        json.dump({'tabelas': list(tabelas), 'metadados': metadados}, f, ensure_ascii=False, default=str)
+
+
+def ler_tabelas(diretorio):
+    """``(tabelas, metadados)`` de uma versão, com as tabelas mapeadas em memória."""
+    with open(os.path.join(diretorio, ARQUIVO_METADADOS), encoding="utf-8") as f:
+        documento = json.load(f)
+    tabelas = {}
+    for nome in documento['tabelas']:
+        # O mapa continua vivo enquanto algum buffer da tabela estiver em uso
+        with pa.memory_map(os.path.join(diretorio, f"{nome}.arrow"), "r") as fonte:
+            tabelas[nome] = decodificar(pa.ipc.open_file(fonte).read_all())
+    return tabelas, documento['metadados']
+
+
+@contextlib.contextmanager
+def _lock(caminho):
+    if fcntl is None:
+        yield
+        return
+    with open(caminho, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _limpar_versoes(destino, manter=MANTER_VERSOES):
+    """Apaga as versões mais antigas; processos que ainda as mapeiam não são afetados (POSIX)."""
+    versoes = sorted(
+        (entrada for entrada in os.scandir(destino)
+         if entrada.is_dir() and os.path.exists(os.path.join(entrada.path, ARQUIVO_METADADOS))),
+        key=lambda entrada: entrada.stat().st_mtime, reverse=True,
+    )
+    for entrada in versoes[manter:]:
+        shutil.rmtree(entrada.path, ignore_errors=True)
+        with contextlib.suppress(OSError):
+            os.remove(f"{entrada.path}.lock")
+
+
+def carregar_ou_construir(chave, construir, destino=COMPARTILHADO_DIR):
+    """Tabelas da versão de ``chave``, construídas por ``construir()`` só se ainda não existem no host.
+
+    ``construir`` retorna ``(tabelas, metadados)``. Retorna ``(tabelas,
+    metadados, construiu)``, com as tabelas sempre lidas do disco.
+    """
+    diretorio = os.path.join(destino, versao_chave(chave))
+    if os.path.exists(os.path.join(diretorio, ARQUIVO_METADADOS)):
+        return (*ler_tabelas(diretorio), False)
+
+    os.makedirs(destino, exist_ok=True)
+    with _lock(f"{diretorio}.lock"):
+        # Outro processo pode ter gravado a versão enquanto este esperava o lock
+        if os.path.exists(os.path.join(diretorio, ARQUIVO_METADADOS)):
+            return (*ler_tabelas(diretorio), False)
+
+        tabelas, metadados = construir()
+        tmp = f"{diretorio}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        gravar_tabelas(tmp, tabelas, metadados)
+        try:
+            os.replace(tmp, diretorio)
+        except OSError:
+            # Sem lock, outro processo renomeou antes: vale a versão dele
+            shutil.rmtree(tmp, ignore_errors=True)
+        _limpar_versoes(destino)
+    return (*ler_tabelas(diretorio), True)
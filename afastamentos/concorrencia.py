@@ -0,0 +1,114 @@
+"""Servidores afastados ao mesmo tempo, dia a dia, por varredura.
+
+Cada afastamento ocupa os dias de ``Início do Afastamento`` a ``Final do
+Afastamento``, inclusive. Em vez de expandir as viagens em uma linha por dia
+(o que multiplica a memória nas viagens longas), cada intervalo soma +1 no
+dia de início e -1 no dia seguinte ao fim de um vetor de diferenças, e a
+soma acumulada dá quantos estão afastados em cada dia. Com agrupamento
+(Diretoria, Tipo de Viagem) o vetor vira uma matriz grupo × dia montada com
+um único ``bincount``: o custo é O(viagens + grupos × dias).
+
+Um servidor conta uma vez por dia: antes da varredura, as viagens
+sobrepostas do mesmo servidor (no mesmo grupo) são unidas num só intervalo.
+"""
+
+import numpy as np
+import pandas as pd
+
+AGRUPAMENTOS = ['Diretoria', 'Tipo de Viagem']
+
+# Coluna da série quando não há agrupamento
+COLUNA_TOTAL = 'Afastados'
+
+
+def _dias(serie):
+    """Datas como número de dias desde 1970-01-01."""
+    return serie.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+
+
+def _codigos_servidor(df):
+    if 'Servidor' not in df.columns:
+        return np.arange(len(df))
+    codigos = pd.factorize(df['Servidor'])[0]
+    # Sem servidor identificado, cada viagem conta como um servidor
+    vazios = codigos < 0
+    codigos[vazios] = codigos.max(initial=-1) + 1 + np.arange(vazios.sum())
+    return codigos
+
+
+def unir_intervalos(inicio, fim, chave):
+    """Une os intervalos de dias (inclusivos) que se sobrepõem dentro da mesma chave.
+
+    Ordena por chave e início; um intervalo novo começa onde o início passa
+    do maior fim visto até ali na mesma chave. Retorna ``(inicio, fim,
+    chave)`` dos intervalos unidos.
+    """
+    ordem = np.lexsort((inicio, chave))
+    inicio, fim, chave = inicio[ordem], fim[ordem], chave[ordem]
+    fim_acumulado = pd.Series(fim).groupby(chave).cummax().to_numpy()
+
+    novo = np.ones(len(inicio), dtype=bool)
+    novo[1:] = (chave[1:] != chave[:-1]) | (inicio[1:] > fim_acumulado[:-1])
+    comecos = np.flatnonzero(novo)
+    finais = np.append(comecos[1:], len(inicio)) - 1
+    return inicio[comecos], fim_acumulado[finais], chave[comecos]
+
+
+def serie_diaria(df, grupo=None):
+    """Servidores afastados por dia, do primeiro início ao último fim.
+
+    Retorna um DataFrame indexado por ``Data`` com uma coluna por valor de
+    ``grupo`` ou, sem agrupamento, só a coluna ``COLUNA_TOTAL``.
+    """
+    inicio = _dias(df['Início do Afastamento'])
+    fim = _dias(df['Final do Afastamento'])
+    servidor = _codigos_servidor(df)
+    if grupo is None:
+        codigos_grupo, nomes = np.zeros(len(df), dtype=np.int64), pd.Index([COLUNA_TOTAL])
+    else:
+        codigos_grupo, nomes = pd.factorize(df[grupo], sort=True)
+        nomes = pd.Index(np.asarray(nomes), name=grupo)
+
+    validas = (codigos_grupo >= 0) & (inicio != np.iinfo(np.int64).min) & (fim != np.iinfo(np.int64).min)
+    if not validas.any():
+        return pd.DataFrame(columns=nomes, index=pd.DatetimeIndex([], name='Data'), dtype='int64')
+    inicio, fim = inicio[validas], np.maximum(fim[validas], inicio[validas])
+    servidor, codigos_grupo = servidor[validas], codigos_grupo[validas].astype(np.int64)
+
+    n_servidores = int(servidor.max()) + 1
+    inicio, fim, chave = unir_intervalos(inicio, fim, codigos_grupo * n_servidores + servidor)
+    codigos_grupo = chave // n_servidores
+
+    primeiro = int(inicio.min())
+    n_dias = int(fim.max()) - primeiro + 1
+    # Uma coluna extra por grupo recebe o -1 das viagens que terminam no último dia
+    largura = n_dias + 1
+    tamanho = len(nomes) * largura
+    base = codigos_grupo * largura - primeiro
+    diferencas = (np.bincount(base + inicio, minlength=tamanho)
+                  - np.bincount(base + fim + 1, minlength=tamanho))
+    afastados = diferencas.reshape(len(nomes), largura)[:, :-1].cumsum(axis=1)
+
+    datas = pd.date_range(pd.Timestamp(np.datetime64(primeiro, 'D')), periods=n_dias, name='Data')
+    return pd.DataFrame(afastados.T, index=datas, columns=nomes)
+
+
+def picos(serie):
+    """Dia de pico de cada coluna da série diária, do maior pico para o menor.
+
+    Para cada grupo: o pico de servidores afastados, o primeiro dia em que
+    ele ocorreu, quantos dias ficaram no pico e a média diária.
+    """
+    nome = serie.columns.name or 'Grupo'
+    if serie.empty:
+        return pd.DataFrame(columns=[nome, 'Pico', 'Dia_Pico', 'Dias_no_Pico', 'Media_Diaria'])
+    valores = serie.to_numpy()
+    pico = valores.max(axis=0)
+    tabela = pd.DataFrame({
+        nome: serie.columns.astype(str),
+        'Pico': pico,
+        'Dia_Pico': serie.index[valores.argmax(axis=0)],
+        'Dias_no_Pico': (valores == pico).sum(axis=0),
+        'Media_Diaria': valores.mean(axis=0),
+    })
+    return tabela.sort_values('Pico', ascending=False, kind='stable').reset_index(drop=True)
@@ -0,0 +1,112 @@
+"""Afastamentos sobrepostos do mesmo servidor.
+
+Dois afastamentos do mesmo ``Servidor`` conflitam quando dividem ao menos um
+dia (as datas de início e fim são inclusivas), o que costuma indicar erro de
+digitação ou viagem marcada em dobro. As viagens são ordenadas por servidor
+e início; como os inícios ficam crescentes dentro de cada servidor, as
+viagens posteriores que uma viagem alcança formam uma faixa contígua, que
+vai até a última que começa no dia do seu fim ou antes. Um ``searchsorted``
+acha o fim de todas as faixas de uma vez, e as faixas são expandidas em
+pares com ``np.repeat``. Não há comparação par a par em Python: o custo é o
+da ordenação mais o número de pares.
+
+Todo par que se sobrepõe é listado: com A de 1 a 10, B de 2 a 9 e C de 3 a
+5, saem A–B, A–C e B–C. O número de pares cresce com o quadrado das viagens
+de um mesmo servidor (um nome genérico repetido na coluna ``Servidor`` gera
+milhões), por isso só os primeiros ``LIMITE_PARES`` são montados.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Colunas copiadas de cada lado do par, quando existem no dataset
+COLUNAS_PAR = ['N° Processo SEI', 'Diretoria', 'Tipo de Viagem', 'País',
+               'Início do Afastamento', 'Final do Afastamento']
+
+# Pares montados no máximo; a contagem das faixas vem antes e não aloca os pares
+LIMITE_PARES = 200_000
+
+
+def _dias(serie):
+    return serie.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+
+
+def detectar_conflitos(df, limite=LIMITE_PARES):
+    """Pares de viagens sobrepostas do mesmo servidor.
+
+    Retorna um DataFrame com as posições das duas viagens em ``df``
+    (``Posicao_A`` é a anterior), o servidor, os dias sobrepostos e as
+    ``COLUNAS_PAR`` de cada lado, sufixadas com `` (A)`` e `` (B)``. Os
+    pares saem agrupados pela viagem ``A``, na ordem (servidor, início), e
+    param em ``limite``.
+    """
+    servidor = pd.factorize(df['Servidor'])[0]
+    inicio = _dias(df['Início do Afastamento'])
+    fim = _dias(df['Final do Afastamento'])
+    # Sem servidor ou sem datas não há como comparar
+    nulo = np.iinfo(np.int64).min
+    validas = np.flatnonzero((servidor >= 0) & (inicio != nulo) & (fim != nulo))
+
+    # Ordem (servidor, início) por uma só chave inteira: um argsort em vez de lexsort.
+    # A escala cobre também os fins, que são buscados na mesma chave
+    servidor = servidor[validas].astype(np.int64)
+    inicio, fim = inicio[validas], np.maximum(fim[validas], inicio[validas])
+    base = inicio.min() if len(validas) else 0
+    escala = int(fim.max(initial=base)) - base + 1
+    chave = servidor * escala + (inicio - base)
+    ordenacao = np.argsort(chave, kind='stable')
+    ordem = validas[ordenacao]
+    chave, inicio, fim = chave[ordenacao], inicio[ordenacao], fim[ordenacao]
+    servidor = servidor[ordenacao]
+
+    # Faixa de cada viagem: das seguintes até a última do servidor que começa até o seu fim
+    indices = np.arange(len(ordem))
+    ate = np.searchsorted(chave, servidor * escala + (fim - base), side='right')
+    quantos = ate - indices - 1
+    acumulado = np.cumsum(quantos)
+    if len(acumulado) and acumulado[-1] > limite:
+        # Corta na viagem A em que o limite é atingido, ainda sem expandir nada
+        corte = int(np.searchsorted(acumulado, limite))
+        quantos[corte] -= acumulado[corte] - limite
+        quantos[corte + 1:] = 0
+    a = np.repeat(indices, quantos)
+    # Deslocamento dentro da faixa: 0, 1, ... para cada viagem A
+    deslocamento = np.arange(len(a)) - np.repeat(np.cumsum(quantos) - quantos, quantos)
+    b = a + 1 + deslocamento
+
+    pares = pd.DataFrame({
+        'Posicao_A': ordem[a],
+        'Posicao_B': ordem[b],
+        'Servidor': df['Servidor'].take(ordem[b]).reset_index(drop=True),
+        # A começa antes (ou no mesmo dia): a sobreposição vai do início de B ao menor fim
+        'Dias_Sobrepostos': np.minimum(fim[a], fim[b]) - inicio[b] + 1,
+    })
+    # take mantém os tipos compactos (categóricas) sem passar por object
+    colunas = [col for col in COLUNAS_PAR if col in df.columns]
+    lados = [
+        df[colunas].take(pares[posicao]).reset_index(drop=True).add_suffix(sufixo)
+        for posicao, sufixo in [('Posicao_A', ' (A)'), ('Posicao_B', ' (B)')]
+    ]
+    detalhes = pd.concat(lados, axis=1)
+    return pd.concat([pares, detalhes[[f'{col}{s}' for col in colunas for s in (' (A)', ' (B)')]]], axis=1)
+
+
+def conflitos_por_diretoria(pares, df):
+    """Viagens em conflito, servidores e pares por Diretoria.
+
+    Cada viagem conta na sua própria Diretoria; o par conta na Diretoria da
+    viagem posterior (``B``).
+    """
+    envolvidas = np.zeros(len(df), dtype=bool)
+    envolvidas[pares['Posicao_A']] = True
+    envolvidas[pares['Posicao_B']] = True
+    por_diretoria = df.loc[envolvidas, ['Diretoria', 'Servidor']].groupby('Diretoria', observed=True).agg(
+        Viagens_em_Conflito=('Servidor', 'size'),
+        Servidores=('Servidor', 'nunique'),
+    )
+    por_diretoria['Pares'] = (
+        df['Diretoria'].take(pares['Posicao_B'])
+        .value_counts()
+        .reindex(por_diretoria.index, fill_value=0)
+    )
+    return por_diretoria.reset_index().sort_values('Viagens_em_Conflito', ascending=False, kind='stable')
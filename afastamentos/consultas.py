@@ -0,0 +1,444 @@
+"""Motores de consulta das agregações do painel.
+
+O motor padrão é o pandas: o dataset preparado fica em memória e as
+agregações saem do cubo (``ResultadosCubo``). O motor DuckDB responde às
+mesmas consultas com SQL sobre as partições Parquet do histórico
+(``afastamentos.ingestao``), num banco embutido no processo, sem servidor:
+só as partições dos anos pedidos e as colunas usadas são lidas, os filtros
+vão para o ``WHERE`` e nenhuma linha fica em memória entre as consultas.
+
+O preparo de ``preparar_dados`` é refeito em SQL na view ``afastamentos``;
+os países são resolvidos em Python só sobre os valores distintos e entram
+como tabela de junção. Os conjuntos e as métricas são montados pelas mesmas
+funções de ``afastamentos.metricas`` nos dois motores, e
+``verificar_equivalencia`` compara os resultados filtro a filtro.
+
+O DuckDB é opcional (``pip install duckdb``); sem ele só o pandas aparece em
+``motores_disponiveis()``. Equivalência sobre o histórico::
+
+    python -m afastamentos.consultas --historico-dir historico --anos 2024 2025
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .cubo import DIMENSOES_SERVIDORES, construir_cubo, fatiar
+from .filtros import COLUNA_TEMPO, DIMENSOES_FILTRO, IndiceFiltros
+from .metricas import CONJUNTOS, ResultadosCubo, calcular_metricas, opcoes_celulas, opcoes_filtro
+from .paises import resolver_pais
+from .perfil import etapa
+
+MOTOR_PANDAS = 'pandas'
+MOTOR_DUCKDB = 'DuckDB'
+
+# Mesmas faixas (abertas à esquerda) do pd.cut de preparar_dados
+FAIXAS_DURACAO = [(0, 5, 'Muito Curta (≤5d)'), (5, 10, 'Curta (6-10d)'), (10, 30, 'Média (11-30d)'),
+                  (30, 365, 'Longa (>30d)')]
+FAIXAS_ANTECEDENCIA = [(0, 15, 'Urgência (0-15d)'), (15, 30, 'Aviso Prévio (15-30d)'),
+                       (30, 365, 'Bem Planejada (30+d)')]
+
+# Agrupamentos pedidos pelos CONJUNTOS, respondidos juntos numa só leitura
+AGRUPAMENTOS = [('País_Inglês',), ('Mês_Início',), ('Categoria_Antecedencia',), ('Tipo de Viagem', 'Gênero'),
+                ('Gênero',), ('Diretoria', 'Gênero'), ('Tipo de Viagem', 'Diretoria'), ('Diretoria',),
+                ('Tipo de Viagem',)]
+
+# Medidas da seleção inteira (chaves de ``cubo.totais`` usadas nas métricas)
+TOTAIS = ['Viagens', 'Soma_Duracao', 'Soma_Custo', 'Bem_Planejadas', 'Duracao_Min', 'Duracao_Max',
+          'Duração_Media', 'Antecedencia_Media', 'Custo_Medio', 'Servidores_Unicos']
+
+
+def motores_disponiveis():
+    if importlib.util.find_spec('duckdb') is None:
+        return [MOTOR_PANDAS]
+    return [MOTOR_PANDAS, MOTOR_DUCKDB]
+
+
+def _identificador(coluna):
+    return '"' + coluna.replace('"', '""') + '"'
+
+
+def _texto(valor):
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def _faixas(coluna, faixas):
+    casos = ' '.join(f"WHEN {coluna} > {de} AND {coluna} <= {ate} THEN {_texto(rotulo)}"
+                     for de, ate, rotulo in faixas)
+    return f"CASE {casos} END"
+
+
+def _dias(fim, inicio):
+    # Dias inteiros para baixo, como Timedelta.days (o // do SQL trunca para zero)
+    return f"floor((epoch_ns({fim}) - epoch_ns({inicio})) / 86400e9)::BIGINT"
+
+
+# =============================================================================
+# MOTOR PANDAS (PADRÃO)
+# =============================================================================
+
+class MotorPandas:
+    """Agregações pelo cubo do dataset preparado em memória."""
+
+    nome = MOTOR_PANDAS
+
+    def __init__(self, df, cubo=None):
+        self.cubo = construir_cubo(df) if cubo is None else cubo
+        self.indice = IndiceFiltros(df)
+
+    def opcoes_filtro(self):
+        return opcoes_filtro(self.cubo)
+
+    def resultados(self, filtros):
+        cubo = self.cubo
+        periodo = filtros.get(COLUNA_TEMPO)
+        if periodo is not None:
+            cubo = construir_cubo(self.indice.selecionar({COLUNA_TEMPO: periodo}))
+        return ResultadosCubo(fatiar(cubo, {dim: v for dim, v in filtros.items() if dim != COLUNA_TEMPO}))
+
+
+# =============================================================================
+# MOTOR DUCKDB (HISTÓRICO PARQUET)
+# =============================================================================
+
+class MotorDuckDB:
+    """Agregações em SQL sobre as partições Parquet de ``anos`` em ``diretorio``."""
+
+    nome = MOTOR_DUCKDB
+
+    def __init__(self, diretorio, anos):
+        import duckdb
+
+        self.diretorio = diretorio
+        self.anos = sorted(int(ano) for ano in anos)
+        self._con = duckdb.connect()
+        self._con.execute(f"""
+            CREATE VIEW bruto AS
+            SELECT * FROM read_parquet({_texto(os.path.join(diretorio, '**', '*.parquet'))}, hive_partitioning = true)
+            WHERE Ano IN ({', '.join(map(str, self.anos)) or 'NULL'})
+        """)
+        self._criar_paises()
+        self._con.execute(self._sql_preparo())
+        self._opcoes = None
+
+    def _criar_paises(self):
+        """Tabela País bruto -> (País_Inglês, ISO_Code), resolvida só sobre os distintos."""
+        distintos = [linha[0] for linha in self._con.execute(
+            "SELECT DISTINCT País FROM bruto WHERE País IS NOT NULL").fetchall()]
+        resolvidos = [resolver_pais(str(pais).strip()) for pais in distintos]
+        paises = pd.DataFrame({
+            'País': pd.Series(distintos, dtype=object),
+            'País_Inglês': pd.Series([r[0] for r in resolvidos], dtype=object),
+            'ISO_Code': pd.Series([r[1] for r in resolvidos], dtype=object),
+        })
+        self._con.register('paises_resolvidos', paises)
+        self._con.execute("""CREATE TABLE paises AS SELECT País::VARCHAR AS País,
+            País_Inglês::VARCHAR AS País_Inglês, ISO_Code::VARCHAR AS ISO_Code FROM paises_resolvidos""")
+        self._con.unregister('paises_resolvidos')
+
+    def _sql_preparo(self):
+        """View com as colunas de ``preparar_dados`` usadas pelas agregações e filtros."""
+        return f"""
+            CREATE VIEW afastamentos AS
+            WITH datas AS (
+                SELECT
+                    *,
+                    -- Início e fim trocados são corrigidos antes de qualquer cálculo
+                    least("Início do Afastamento", "Final do Afastamento") AS inicio,
+                    greatest("Início do Afastamento", "Final do Afastamento") AS fim
+                FROM bruto
+                WHERE "Cancelada?" = 'Não'
+                  AND "Início do Afastamento" IS NOT NULL
+                  AND "Final do Afastamento" IS NOT NULL
+            ), dias AS (
+                SELECT
+                    *,
+                    {_dias('fim', 'inicio')} AS duracao,
+                    {_dias('inicio', '"Data entrada na DAI"')} AS antecedencia
+                FROM datas
+            )
+            SELECT
+                coalesce(dias."Tipo de Viagem", 'Não Informado') AS "Tipo de Viagem",
+                coalesce(dias.Diretoria, 'Não Informado') AS Diretoria,
+                coalesce(dias.Gênero, 'Não Informado') AS Gênero,
+                dias.Servidor,
+                paises.País_Inglês,
+                paises.ISO_Code,
+                monthname(dias.inicio) AS Mês_Início,
+                'T' || quarter(dias.inicio) AS Trimestre,
+                dias.inicio AS "Início do Afastamento",
+                dias.duracao AS "Duração (dias)",
+                dias.antecedencia AS "Antecedência (dias)",
+                dias.Custo,
+                dias.antecedencia >= 30 AS Bem_Planejado,
+                {_faixas('dias.duracao', FAIXAS_DURACAO)} AS Tipo_Duracao,
+                {_faixas('dias.antecedencia', FAIXAS_ANTECEDENCIA)} AS Categoria_Antecedencia
+            FROM dias
+            LEFT JOIN paises ON dias.País = paises.País
+            WHERE dias.antecedencia >= 0
+        """
+
+    def _consultar(self, sql, parametros=()):
+        # Um cursor por consulta: o mesmo motor atende várias sessões em paralelo
+        with etapa('consulta_sql') as registro:
+            resultado = self._con.cursor().execute(sql, list(parametros)).df()
+            registro['linhas_saida'] = len(resultado)
+        return resultado
+
+    @staticmethod
+    def _onde(filtros, condicoes=()):
+        """Cláusula WHERE e parâmetros dos filtros (mesma semântica de ``IndiceFiltros``)."""
+        condicoes, parametros = list(condicoes), []
+        for dim, valor in filtros.items():
+            if valor is None:
+                continue
+            if dim == COLUNA_TEMPO:
+                inicio, fim = valor
+                condicoes.append('"Início do Afastamento" >= ? AND "Início do Afastamento" < ?')
+                parametros += [pd.Timestamp(inicio).normalize().to_pydatetime(),
+                               (pd.Timestamp(fim).normalize() + pd.Timedelta(days=1)).to_pydatetime()]
+                continue
+            if dim not in DIMENSOES_FILTRO:
+                raise ValueError(f"Filtro desconhecido: {dim}")
+            valores = list(valor) if isinstance(valor, (list, tuple, set, frozenset)) else [valor]
+            if not valores:
+                continue
+            condicoes.append(f"{_identificador(dim)} IN ({', '.join('?' * len(valores))})")
+            parametros += [str(v) for v in valores]
+        return ("WHERE " + " AND ".join(condicoes)) if condicoes else "", parametros
+
+    def agregar(self, dims, filtros):
+        """Viagens, Duração_Media e Servidores_Unicos por ``dims`` (sem grupos nulos)."""
+        colunas = ', '.join(_identificador(d) for d in dims)
+        onde, parametros = self._onde(filtros, [f"{_identificador(d)} IS NOT NULL" for d in dims])
+        servidores = ', COUNT(DISTINCT Servidor) AS Servidores_Unicos' if set(dims) <= set(DIMENSOES_SERVIDORES) else ''
+        return self._consultar(f"""
+            SELECT {colunas}, COUNT(*) AS Viagens, AVG("Duração (dias)") AS Duração_Media{servidores}
+            FROM afastamentos {onde}
+            GROUP BY {colunas} ORDER BY {colunas}
+        """, parametros)
+
+    def agregar_todos(self, filtros, agrupamentos=AGRUPAMENTOS):
+        """``agregar`` de cada agrupamento e ``totais``, numa só leitura com GROUPING SETS.
+
+        A view refaz o preparo a cada leitura, então uma consulta por
+        agrupamento custaria uma varredura cada. Retorna ``(tabelas, totais)``
+        com ``tabelas[dims]`` igual a ``agregar(dims, filtros)``.
+        """
+        todas = sorted({dim for dims in agrupamentos for dim in dims})
+        conjuntos = ', '.join('(' + ', '.join(_identificador(d) for d in dims) + ')' for dims in agrupamentos)
+        onde, parametros = self._onde(filtros)
+        grupos = self._consultar(f"""
+            SELECT
+                {', '.join(_identificador(d) for d in todas)},
+                GROUPING({', '.join(_identificador(d) for d in todas)}) AS _grupo,
+                {self._medidas_totais()}
+            FROM afastamentos {onde}
+            GROUP BY GROUPING SETS ({conjuntos}, ())
+        """, parametros)
+
+        def bits(dims):
+            # GROUPING liga o bit das colunas fora do agrupamento, a primeira no bit mais alto
+            return sum(1 << (len(todas) - 1 - i) for i, dim in enumerate(todas) if dim not in dims)
+
+        tabelas = {}
+        for dims in agrupamentos:
+            medidas = ['Viagens', 'Duração_Media']
+            if set(dims) <= set(DIMENSOES_SERVIDORES):
+                medidas.append('Servidores_Unicos')
+            tabela = grupos.loc[grupos['_grupo'] == bits(dims), list(dims) + medidas].dropna(subset=list(dims))
+            tabelas[dims] = tabela.sort_values(list(dims)).reset_index(drop=True)
+        totais = grupos.loc[grupos['_grupo'] == bits(()), TOTAIS]
+        return tabelas, totais.to_dict('records')[0]
+
+    @staticmethod
+    def _medidas_totais():
+        return """
+                COUNT(*) AS Viagens,
+                coalesce(SUM("Duração (dias)"), 0)::BIGINT AS Soma_Duracao,
+                coalesce(SUM(Custo), 0)::DOUBLE AS Soma_Custo,
+                coalesce(SUM(Bem_Planejado::INTEGER), 0)::BIGINT AS Bem_Planejadas,
+                MIN("Duração (dias)") AS Duracao_Min,
+                MAX("Duração (dias)") AS Duracao_Max,
+                AVG("Duração (dias)") AS Duração_Media,
+                AVG("Antecedência (dias)") AS Antecedencia_Media,
+                AVG(Custo) AS Custo_Medio,
+                COUNT(DISTINCT Servidor) AS Servidores_Unicos"""
+
+    def totais(self, filtros):
+        """Medidas da seleção inteira, com as chaves de ``cubo.totais`` usadas nas métricas."""
+        onde, parametros = self._onde(filtros)
+        totais = self._consultar(f"SELECT {self._medidas_totais()} FROM afastamentos {onde}", parametros)
+        # Por registro, cada medida mantém o tipo da sua coluna (contagens inteiras)
+        return totais.to_dict('records')[0]
+
+    def opcoes_filtro(self):
+        # Os anos do motor não mudam: uma consulta por motor
+        if self._opcoes is None:
+            dims = ', '.join(_identificador(d) for d in DIMENSOES_FILTRO)
+            combinacoes = self._consultar(f"""
+                SELECT {dims}, MIN("Início do Afastamento") AS Inicio_Min, MAX("Início do Afastamento") AS Inicio_Max
+                FROM afastamentos GROUP BY {dims}
+            """)
+            self._opcoes = opcoes_celulas(combinacoes)
+        return self._opcoes
+
+    def resultados(self, filtros):
+        return ResultadosConsulta(self, filtros)
+
+
+class ResultadosConsulta:
+    """Mesma interface de ``ResultadosCubo``, servida pelo motor SQL.
+
+    Na primeira chamada todos os ``AGRUPAMENTOS`` e os totais saem de uma
+    consulta só; agrupamentos fora da lista fazem consulta própria.
+    """
+
+    def __init__(self, motor, filtros):
+        self._motor = motor
+        self._filtros = dict(filtros)
+        self._conjuntos = {}
+        self._metricas = None
+        self._leitura = None
+
+    def _ler(self):
+        if self._leitura is None:
+            self._leitura = self._motor.agregar_todos(self._filtros)
+        return self._leitura
+
+    def _agrupar(self, dims):
+        tabelas, _ = self._ler()
+        if tuple(dims) in tabelas:
+            return tabelas[tuple(dims)].copy()
+        return self._motor.agregar(dims, self._filtros)
+
+    def conjunto(self, nome):
+        if nome not in self._conjuntos:
+            self._conjuntos[nome] = CONJUNTOS[nome](self._agrupar)
+        return self._conjuntos[nome]
+
+    def metricas(self):
+        if self._metricas is None:
+            self._metricas = calcular_metricas(self._ler()[1], self.conjunto)
+        return self._metricas
+
+
+# =============================================================================
+# EQUIVALÊNCIA ENTRE MOTORES
+# =============================================================================
+
+def filtros_de_teste(opcoes):
+    """Estados de filtro representativos: sem filtro, cada valor isolado e combinações."""
+    estados = [{}]
+    for dim, chave in [('Tipo de Viagem', 'tipos'), ('Diretoria', 'diretorias'), ('Gênero', 'generos'),
+                       ('Trimestre', 'trimestres')]:
+        estados += [{dim: valor} for valor in opcoes[chave]]
+    estados += [{'País_Inglês': opcoes['paises'][:3]}] if opcoes['paises'] else []
+    if opcoes['periodo']:
+        inicio = pd.Timestamp(opcoes['periodo'][0])
+        periodo = (inicio.date(), (inicio + pd.DateOffset(months=2)).date())
+        estados.append({COLUNA_TEMPO: periodo})
+        if opcoes['tipos'] and opcoes['generos']:
+            estados.append({COLUNA_TEMPO: periodo, 'Tipo de Viagem': opcoes['tipos'][0],
+                            'Gênero': opcoes['generos'][:1]})
+    return estados
+
+
+def _normalizar(tabela):
+    """Tipos e ordem de linhas comparáveis entre motores (categóricas viram texto)."""
+    tabela = tabela.copy()
+    chaves = [col for col in tabela.columns if not pd.api.types.is_numeric_dtype(tabela[col])]
+    for col in chaves:
+        tabela[col] = [None if pd.isna(v) else str(v) for v in tabela[col]]
+    return tabela.sort_values(chaves).reset_index(drop=True) if chaves else tabela.reset_index(drop=True)
+
+
+def _diferenca(a, b):
+    """Descrição da primeira diferença entre duas tabelas, ou ``None`` se forem equivalentes."""
+    a, b = _normalizar(a), _normalizar(b)
+    if list(a.columns) != list(b.columns):
+        return f"colunas {list(a.columns)} != {list(b.columns)}"
+    if len(a) != len(b):
+        return f"{len(a)} linhas != {len(b)}"
+    for col in a.columns:
+        if not (pd.api.types.is_numeric_dtype(a[col]) and pd.api.types.is_numeric_dtype(b[col])):
+            iguais = a[col].tolist() == b[col].tolist()
+        else:
+            iguais = np.allclose(a[col].astype(float), b[col].astype(float), rtol=1e-9, equal_nan=True)
+        if not iguais:
+            return f"coluna {col} difere"
+    return None
+
+
+def verificar_equivalencia(motor_a, motor_b, estados):
+    """Compara métricas e conjuntos dos dois motores em cada estado de filtro.
+
+    Retorna a lista de divergências ``(filtros, item, descricao)``; vazia
+    quando os motores são equivalentes.
+    """
+    divergencias = []
+    for filtros in estados:
+        resultados_a, resultados_b = motor_a.resultados(filtros), motor_b.resultados(filtros)
+        for nome in CONJUNTOS:
+            diferenca = _diferenca(resultados_a.conjunto(nome), resultados_b.conjunto(nome))
+            if diferenca:
+                divergencias.append((filtros, nome, diferenca))
+        metricas_a, metricas_b = resultados_a.metricas(), resultados_b.metricas()
+        for nome in metricas_a:
+            # O tipo também conta: os cards mostram inteiros e floats de forma diferente
+            if type(metricas_a[nome]) is not type(metricas_b[nome]) \
+                    or not np.isclose(metricas_a[nome], metricas_b[nome], rtol=1e-9, equal_nan=True):
+                divergencias.append((filtros, nome, f"{metricas_a[nome]} != {metricas_b[nome]}"))
+    return divergencias
+
+
+def main(argv=None):
+    from .ingestao import HISTORICO_DIR, ler_historico, ler_manifesto
+    from .preprocessamento import preparar_dados
+
+    parser = argparse.ArgumentParser(description="Equivalência entre os motores pandas e DuckDB no histórico.")
+    parser.add_argument("--historico-dir", default=HISTORICO_DIR)
+    parser.add_argument("--anos", type=int, nargs="+", help="anos do histórico (padrão: todos)")
+    args = parser.parse_args(argv)
+
+    manifesto = ler_manifesto(args.historico_dir)
+    if manifesto is None:
+        raise SystemExit(f"histórico não encontrado em {args.historico_dir}")
+    if MOTOR_DUCKDB not in motores_disponiveis():
+        raise SystemExit("duckdb não instalado (pip install duckdb)")
+    anos = args.anos or [int(ano) for ano in manifesto['linhas_por_ano']]
+
+    inicio = time.perf_counter()
+    pandas_ = MotorPandas(preparar_dados(ler_historico(args.historico_dir, anos=anos))[0])
+    print(f"pandas: dataset e cubo em {time.perf_counter() - inicio:.2f} s")
+    inicio = time.perf_counter()
+    duckdb_ = MotorDuckDB(args.historico_dir, anos)
+    print(f"DuckDB: view em {time.perf_counter() - inicio:.2f} s")
+
+    estados = filtros_de_teste(pandas_.opcoes_filtro())
+    divergencias = verificar_equivalencia(pandas_, duckdb_, estados)
+    if pandas_.opcoes_filtro() != duckdb_.opcoes_filtro():
+        divergencias.append(({}, 'opcoes_filtro', 'opções de filtro diferentes'))
+
+    for motor in (pandas_, duckdb_):
+        inicio = time.perf_counter()
+        for filtros in estados:
+            resultados = motor.resultados(filtros)
+            resultados.metricas()
+            for nome in CONJUNTOS:
+                resultados.conjunto(nome)
+        print(f"{motor.nome}: {len(estados)} estados de filtro em {time.perf_counter() - inicio:.2f} s")
+
+    for filtros, item, descricao in divergencias:
+        print(f"DIVERGÊNCIA {item} {filtros}: {descricao}")
+    print(f"{len(estados)} estados, {len(divergencias)} divergências")
+    return 1 if divergencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""Cubo OLAP pré-agregado do dataset preparado.
+
+O cubo é montado uma vez por versão do dataset, agrupando todas as
+dimensões usadas pelos filtros e gráficos e guardando apenas medidas
+aditivas (contagens, somas, mínimos e máximos). Filtros e gráficos são
+respondidos fatiando e reagregando o cubo, sem tocar nas linhas brutas.
+
+Contagens distintas de servidores não são aditivas; para elas o cubo mantém
+uma tabela separada com as combinações distintas de dimensões × servidor.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Trimestre é função do mês: entra como dimensão sem aumentar o número de células
+DIMENSOES = ['Tipo de Viagem', 'Diretoria', 'País_Inglês', 'Gênero', 'Mês_Início', 'Trimestre',
+             'Tipo_Duracao', 'Categoria_Antecedencia']
+
+# Dimensões mantidas na tabela de servidores distintos
+DIMENSOES_SERVIDORES = ['Tipo de Viagem', 'Diretoria', 'País_Inglês', 'Gênero', 'Mês_Início', 'Trimestre']
+
+MEDIDAS_SOMA = ['Viagens', 'Soma_Duracao', 'Soma_Antecedencia', 'Soma_Custo',
+                'Custos_Informados', 'Bem_Planejadas']
+
+
+class Cubo(NamedTuple):
+    celulas: pd.DataFrame
+    servidores: pd.DataFrame
+
+
+def construir_cubo(df):
+    """Agrega o dataset preparado em células por combinação de dimensões."""
+    custo = df['Custo'] if 'Custo' in df.columns else pd.Series(np.nan, index=df.index)
+    # Somas em 64 bits: o dataset preparado guarda as colunas em tipos compactos
+    base = df[DIMENSOES].assign(
+        Viagens=1,
+        Soma_Duracao=df['Duração (dias)'].astype('int64'),
+        Soma_Antecedencia=df['Antecedência (dias)'].astype('float64'),
+        Soma_Custo=pd.to_numeric(custo, errors='coerce').astype('float64'),
+        Custos_Informados=custo.notna().astype(int),
+        Bem_Planejadas=df['Bem_Planejado'].astype(int),
+        Duracao_Min=df['Duração (dias)'],
+        Duracao_Max=df['Duração (dias)'],
+        Inicio_Min=df['Início do Afastamento'],
+        Inicio_Max=df['Início do Afastamento'],
+    )
+
+    celulas = (
+        base.groupby(DIMENSOES, observed=True, dropna=False)
+        .agg(_agregacoes())
+        .reset_index()
+    )
+
+    servidores = df[DIMENSOES_SERVIDORES + ['Servidor']].drop_duplicates(ignore_index=True)
+    return Cubo(celulas, servidores)
+
+
+def _agregacoes():
+    agregacoes = {medida: 'sum' for medida in MEDIDAS_SOMA}
+    agregacoes.update(Duracao_Min='min', Duracao_Max='max', Inicio_Min='min', Inicio_Max='max')
+    return agregacoes
+
+
+def _mascara(tabela, filtros):
+    mask = np.ones(len(tabela), dtype=bool)
+    for dim, valor in filtros.items():
+        if valor is None or dim not in tabela.columns:
+            continue
+        valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+        mask &= tabela[dim].isin(valores).to_numpy()
+    return mask
+
+
+def fatiar(cubo, filtros):
+    """Restringe o cubo aos valores selecionados; ``None`` significa sem filtro."""
+    return Cubo(
+        cubo.celulas[_mascara(cubo.celulas, filtros)],
+        cubo.servidores[_mascara(cubo.servidores, filtros)],
+    )
+
+
+def agregar(cubo, dims, dropna=True):
+    """Reagrega as células do cubo pelas dimensões ``dims``.
+
+    Inclui as médias derivadas das somas (Duração_Media, Antecedencia_Media,
+    Custo_Medio) e, quando as dimensões permitem, a contagem de servidores
+    únicos.
+    """
+    resultado = (
+        cubo.celulas.groupby(dims, observed=True, dropna=dropna)
+        .agg(_agregacoes())
+        .reset_index()
+    )
+    resultado = resultado[resultado['Viagens'] > 0]
+
+    resultado['Duração_Media'] = resultado['Soma_Duracao'] / resultado['Viagens']
+    resultado['Antecedencia_Media'] = resultado['Soma_Antecedencia'] / resultado['Viagens']
+    resultado['Custo_Medio'] = resultado['Soma_Custo'] / resultado['Custos_Informados'].replace(0, np.nan)
+
+    if set(dims) <= set(DIMENSOES_SERVIDORES):
+        unicos = (
+            cubo.servidores.groupby(dims, observed=True, dropna=dropna)['Servidor']
+            .nunique()
+            .rename('Servidores_Unicos')
+            .reset_index()
+        )
+        resultado = resultado.merge(unicos, on=dims, how='left')
+
+    return resultado.reset_index(drop=True)
+
+
+def totais(cubo):
+    """Medidas do cubo inteiro (já fatiado), como dicionário."""
+    celulas = cubo.celulas
+    viagens = int(celulas['Viagens'].sum())
+    soma_duracao = celulas['Soma_Duracao'].sum()
+    custos_informados = celulas['Custos_Informados'].sum()
+    return {
+        'Viagens': viagens,
+        'Soma_Duracao': soma_duracao,
+        'Soma_Antecedencia': celulas['Soma_Antecedencia'].sum(),
+        'Soma_Custo': celulas['Soma_Custo'].sum(),
+        'Bem_Planejadas': int(celulas['Bem_Planejadas'].sum()),
+        'Duracao_Min': celulas['Duracao_Min'].min(),
+        'Duracao_Max': celulas['Duracao_Max'].max(),
+        'Inicio_Min': celulas['Inicio_Min'].min(),
+        'Inicio_Max': celulas['Inicio_Max'].max(),
+        'Duração_Media': soma_duracao / viagens if viagens else np.nan,
+        'Antecedencia_Media': celulas['Soma_Antecedencia'].sum() / viagens if viagens else np.nan,
+        'Custo_Medio': celulas['Soma_Custo'].sum() / custos_informados if custos_informados else np.nan,
+        'Servidores_Unicos': cubo.servidores['Servidor'].nunique(),
+    }
+
+
+def _marcar(tabela, chaves, dims):
+    """Máscara das linhas de ``tabela`` cuja combinação de ``dims`` está em ``chaves``."""
+    if tabela.empty or chaves.empty:
+        return np.zeros(len(tabela), dtype=bool)
+    combinado = tabela[dims].merge(chaves, on=dims, how='left', indicator=True)
+    return (combinado['_merge'] == 'both').to_numpy()
+
+
+def atualizar_cubo(cubo, df, linhas_afetadas):
+    """Recalcula apenas as células tocadas por ``linhas_afetadas``.
+
+    ``df`` é o dataset preparado já atualizado e ``linhas_afetadas`` reúne as
+    linhas removidas e as novas versões das linhas inseridas/alteradas. Só
+    as células (e combinações de servidores) dessas linhas são reagregadas.
+    """
+    if linhas_afetadas.empty:
+        return cubo
+
+    chaves = linhas_afetadas[DIMENSOES].drop_duplicates()
+    parcial = construir_cubo(df[_marcar(df, chaves, DIMENSOES)])
+    celulas = pd.concat(
+        [cubo.celulas[~_marcar(cubo.celulas, chaves, DIMENSOES)], parcial.celulas],
+        ignore_index=True,
+    )
+
+    chaves_serv = linhas_afetadas[DIMENSOES_SERVIDORES].drop_duplicates()
+    servidores = df[_marcar(df, chaves_serv, DIMENSOES_SERVIDORES)]
+    servidores = servidores[DIMENSOES_SERVIDORES + ['Servidor']].drop_duplicates()
+    servidores = pd.concat(
+        [cubo.servidores[~_marcar(cubo.servidores, chaves_serv, DIMENSOES_SERVIDORES)], servidores],
+        ignore_index=True,
+    )
+    return Cubo(celulas, servidores)
@@ -0,0 +1,107 @@
+"""Exportação dos dados filtrados em blocos (CSV, Parquet e XLSX).
+
+O arquivo só é gerado quando alguém pede o download. A escrita acontece em
+blocos de linhas num arquivo temporário em disco, sem montar o conteúdo
+inteiro como uma única string, e o arquivo é entregue aberto ao
+``st.download_button``: a única cópia em memória é a que o Streamlit guarda
+para servir o download.
+"""
+
+import io
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+TAMANHO_BLOCO = 50_000
+
+FORMATOS = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'XLSX': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def _blocos(df, tamanho_bloco):
+    for inicio in range(0, len(df), tamanho_bloco):
+        yield df.iloc[inicio:inicio + tamanho_bloco]
+
+
+def _formatos_datas(df):
+    """Formato por coluna de data, igual ao que o ``to_csv`` do frame inteiro usaria."""
+    formatos = {}
+    for col in df.select_dtypes(include='datetime').columns:
+        valores = df[col].dropna()
+        tem_hora = (valores != valores.dt.normalize()).any()
+        formatos[col] = '%Y-%m-%d %H:%M:%S' if tem_hora else '%Y-%m-%d'
+    return formatos
+
+
+def iterar_csv(df, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera o CSV de ``df`` em pedaços de bytes, com cabeçalho só no primeiro."""
+    # Decidido uma vez: cada bloco isolado escolheria seu próprio formato
+    formatos = _formatos_datas(df)
+    yield df.iloc[:0].to_csv(index=False).encode('utf-8')
+    for bloco in _blocos(df, tamanho_bloco):
+        bloco = bloco.assign(**{col: bloco[col].dt.strftime(fmt) for col, fmt in formatos.items()})
+        yield bloco.to_csv(index=False, header=False).encode('utf-8')
+
+
+def _escrever_csv(df, destino, tamanho_bloco):
+    for parte in iterar_csv(df, tamanho_bloco):
+        destino.write(parte)
+
+
+def _escrever_parquet(df, destino, tamanho_bloco):
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(destino, schema) as writer:
+        for bloco in _blocos(df, tamanho_bloco):
+            writer.write_table(pa.Table.from_pandas(bloco, schema=schema, preserve_index=False))
+
+
+def _escrever_xlsx(df, destino, tamanho_bloco):
+    from openpyxl import Workbook
+
+    # write_only: as linhas vão sendo serializadas, sem manter células em memória
+    wb = Workbook(write_only=True)
+    aba = wb.create_sheet('Afastamentos')
+    aba.append([str(col) for col in df.columns])
+    for bloco in _blocos(df, tamanho_bloco):
+        bloco = bloco.astype(object).where(bloco.notna(), None)
+        for linha in bloco.itertuples(index=False, name=None):
+            aba.append(list(linha))
+    wb.save(destino)
+
+
+_ESCRITORES = {
+    'CSV': _escrever_csv,
+    'Parquet': _escrever_parquet,
+    'XLSX': _escrever_xlsx,
+}
+
+
+def exportar(df, formato, colunas=None, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera o arquivo de exportação num temporário em disco e o retorna aberto, no início.
+
+    O retorno é um arquivo binário sem buffer (``io.RawIOBase``), aceito
+    direto pelo ``st.download_button``; o temporário some quando ele é
+    fechado ou coletado. ``colunas`` projeta o DataFrame antes da escrita
+    (``None`` = todas).
+    """
+    if formato not in _ESCRITORES:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    if colunas:
+        df = df[list(colunas)]
+
+    arquivo = tempfile.TemporaryFile(buffering=0)
+    try:
+        # Buffer só durante a escrita; detach devolve o arquivo sem fechá-lo
+        escrita = io.BufferedWriter(arquivo)
+        _ESCRITORES[formato](df, escrita, tamanho_bloco)
+        escrita.flush()
+        escrita.detach()
+    except BaseException:
+        arquivo.close()
+        raise
+    arquivo.seek(0)
+    return arquivo
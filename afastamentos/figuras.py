@@ -0,0 +1,86 @@
+"""Cache LRU de figuras Plotly serializadas.
+
+As figuras são guardadas como spec já decodificada (o dict do JSON do
+Plotly), indexadas por (gráfico, estado dos filtros, versão do dataset).
+Numa seleção repetida a spec vai direto para ``st.plotly_chart``, sem refazer
+o agrupamento, o mapeamento de cores e a mescla de template do Plotly Express
+e sem remontar um ``go.Figure`` a partir do JSON. O cache é limitado pelo
+total de bytes do JSON e descarta primeiro as figuras usadas há mais tempo.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .perfil import marcar_falha_cache
+
+LIMITE_BYTES = int(os.environ.get("AFASTAMENTOS_CACHE_FIGURAS_MB", "64")) * 1024 * 1024
+
+
+class CacheFiguras:
+    """Cache LRU de specs de figura (dicts), limitado pelo tamanho do JSON em bytes."""
+
+    def __init__(self, limite_bytes=LIMITE_BYTES):
+        self.limite_bytes = limite_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave, construir):
+        """Retorna a spec (dict) da figura de ``chave``, chamando ``construir()`` só em caso de falha."""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+            else:
+                self.falhas += 1
+
+        if item is not None:
+            return item[0]
+
+        marcar_falha_cache()
+        return self._guardar(chave, construir().to_json())
+
+    def semear(self, chave, spec):
+        """Guarda uma spec em JSON (pré-calculada fora do processo) se ``chave`` não existe."""
+        with self._lock:
+            if chave in self._itens:
+                return
+        self._guardar(chave, spec)
+
+    def _guardar(self, chave, spec_json):
+        """Decodifica ``spec_json`` uma vez, guarda o dict e o retorna."""
+        spec = json.loads(spec_json)
+        tamanho = len(spec_json)
+        # Uma figura maior que o cache inteiro não é guardada
+        if tamanho > self.limite_bytes:
+            return spec
+        with self._lock:
+            antigo = self._itens.pop(chave, None)
+            if antigo is not None:
+                self._bytes -= antigo[1]
+            self._itens[chave] = (spec, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.limite_bytes:
+                _, (_, descartado) = self._itens.popitem(last=False)
+                self._bytes -= descartado
+                self.descartes += 1
+        return spec
+
+    def estatisticas(self):
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                'figuras': len(self._itens),
+                'bytes': self._bytes,
+                'limite_bytes': self.limite_bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'descartes': self.descartes,
+                'taxa_acerto': self.acertos / total if total else 0.0,
+            }
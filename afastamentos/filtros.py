@@ -0,0 +1,126 @@
+"""Filtragem indexada das linhas do dataset preparado.
+
+As linhas são numeradas pela ordem de ``Início do Afastamento`` (o posto
+temporal de cada linha), calculada uma única vez. Para cada dimensão
+filtrável o índice guarda, por valor, os postos (ordenados) das linhas que o
+contêm. Um período vira, por busca binária, uma faixa contígua de postos, e
+cada lista de postos é recortada nessa faixa também por busca binária. Uma
+seleção é a união dos postos dentro de cada dimensão e a interseção entre
+dimensões, sem varrer nem copiar o DataFrame inteiro.
+"""
+
+import numpy as np
+import pandas as pd
+
+DIMENSOES_FILTRO = ['Tipo de Viagem', 'Diretoria', 'Gênero', 'País_Inglês', 'Trimestre']
+
+# Filtro de período: selecao[COLUNA_TEMPO] = (primeiro_dia, ultimo_dia), inclusive
+COLUNA_TEMPO = 'Início do Afastamento'
+
+
+def _como_lista(valor):
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return list(valor)
+    return [valor]
+
+
+def _recortar(postos, inicio, fim):
+    """Trecho de uma lista ordenada de postos dentro de ``[inicio, fim)``."""
+    return postos[np.searchsorted(postos, inicio):np.searchsorted(postos, fim)]
+
+
+class IndiceFiltros:
+    """Índice invertido valor -> postos temporais, por dimensão, mais o índice de tempo."""
+
+    def __init__(self, df, dimensoes=DIMENSOES_FILTRO, coluna_tempo=COLUNA_TEMPO):
+        self.df = df
+        self.coluna_tempo = coluna_tempo
+        # ordem_tempo[posto] = posição da linha; datas vazias (NaT) ficam no fim
+        tempos = df[coluna_tempo].to_numpy(dtype='datetime64[ns]')
+        self._ordem_tempo = np.argsort(tempos, kind='stable')
+        self._tempos = tempos[self._ordem_tempo]
+        self._n_datas = int((~np.isnat(tempos)).sum())
+
+        self._posicoes = {}
+        for dim in dimensoes:
+            if dim not in df.columns:
+                continue
+            cat = df[dim].array if isinstance(df[dim].dtype, pd.CategoricalDtype) else pd.Categorical(df[dim])
+            codigos = np.asarray(cat.codes)[self._ordem_tempo]
+            # argsort estável: dentro de cada código os postos ficam crescentes
+            ordem = np.argsort(codigos, kind='stable')
+            limites = np.searchsorted(codigos[ordem], np.arange(len(cat.categories) + 1))
+            self._posicoes[dim] = {
+                valor: ordem[limites[i]:limites[i + 1]]
+                for i, valor in enumerate(cat.categories)
+                if limites[i + 1] > limites[i]
+            }
+
+    @property
+    def dimensoes(self):
+        return list(self._posicoes)
+
+    def valores(self, dim):
+        """Valores presentes na dimensão, na ordem das categorias."""
+        return list(self._posicoes.get(dim, {}))
+
+    def contagem(self, dim):
+        return {valor: len(pos) for valor, pos in self._posicoes.get(dim, {}).items()}
+
+    def periodo_total(self):
+        """``(primeira, ultima)`` data de início presentes, ou ``None`` se não houver datas."""
+        if self._n_datas == 0:
+            return None
+        return pd.Timestamp(self._tempos[0]), pd.Timestamp(self._tempos[self._n_datas - 1])
+
+    def faixa(self, inicio, fim):
+        """Faixa ``[a, b)`` de postos das linhas que começam entre os dias ``inicio`` e ``fim``."""
+        de = np.datetime64(pd.Timestamp(inicio).normalize(), 'ns')
+        ate = np.datetime64(pd.Timestamp(fim).normalize() + pd.Timedelta(days=1), 'ns')
+        datas = self._tempos[:self._n_datas]
+        return int(np.searchsorted(datas, de)), int(np.searchsorted(datas, ate))
+
+    def posicoes(self, selecao):
+        """Posições das linhas que atendem a ``selecao`` ou ``None`` se nada foi filtrado.
+
+        ``selecao`` mapeia dimensão -> valor ou lista de valores; ``None`` ou
+        lista vazia significa sem filtro naquela dimensão. ``COLUNA_TEMPO``
+        recebe o período ``(inicio, fim)``. As posições saem em ordem
+        cronológica de início.
+        """
+        periodo = selecao.get(self.coluna_tempo)
+        a, b = (0, len(self._tempos)) if periodo is None else self.faixa(*periodo)
+
+        por_dimensao = []
+        for dim, valor in selecao.items():
+            if dim == self.coluna_tempo or valor is None or dim not in self._posicoes:
+                continue
+            valores = _como_lista(valor)
+            if not valores:
+                continue
+            indice = self._posicoes[dim]
+            partes = [indice[v] for v in valores if v in indice]
+            if periodo is not None:
+                partes = [_recortar(p, a, b) for p in partes]
+            if not partes:
+                return np.empty(0, dtype=np.intp)
+            por_dimensao.append(partes[0] if len(partes) == 1 else np.sort(np.concatenate(partes)))
+
+        if not por_dimensao:
+            return None if periodo is None else self._ordem_tempo[a:b]
+
+        # Interseção começando pela dimensão mais seletiva
+        por_dimensao.sort(key=len)
+        resultado = por_dimensao[0]
+        for pos in por_dimensao[1:]:
+            if len(resultado) == 0:
+                break
+            resultado = np.intersect1d(resultado, pos, assume_unique=True)
+        return self._ordem_tempo[resultado]
+
+    def selecionar(self, selecao):
+        """Linhas da seleção: o próprio DataFrame se não há filtro, senão um ``take``."""
+        pos = self.posicoes(selecao)
+        if pos is None:
+            return self.df
+        return self.df.take(pos)
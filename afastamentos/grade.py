@@ -0,0 +1,102 @@
+"""Grade de dados paginada no servidor.
+
+A seleção de linhas (filtros, busca e ordenação) é feita só com arrays de
+posições; o DataFrame de saída contém apenas as linhas da página pedida e
+as colunas escolhidas. O custo de memória e de envio ao navegador depende
+do tamanho da página, não do tamanho do dataset.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from .paises import chave_pais
+
+TAMANHOS_PAGINA = [25, 50, 100, 250]
+
+COLUNAS_PADRAO = ['Servidor', 'Diretoria', 'Tipo de Viagem', 'País', 'Início do Afastamento',
+                  'Final do Afastamento', 'Duração (dias)', 'Antecedência (dias)']
+
+
+class GradePaginada:
+    """Busca, ordenação e paginação sobre as linhas de ``df`` sem copiá-lo.
+
+    Ordenações e códigos de texto são calculados na primeira vez que uma
+    coluna é usada e reaproveitados por todas as consultas seguintes.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._ordens = {}
+        self._textos = {}
+
+    @property
+    def colunas_texto(self):
+        return [col for col in self.df.columns
+                if pd.api.types.is_string_dtype(self.df[col]) or isinstance(self.df[col].dtype, pd.CategoricalDtype)]
+
+    def _codigos_texto(self, coluna):
+        """``(codigos, valores_normalizados)`` da coluna, fatorada uma única vez."""
+        if coluna not in self._textos:
+            codigos, valores = pd.factorize(self.df[coluna].astype(object), use_na_sentinel=True)
+            # Sem acentos e casefold: "suica" encontra "Suíça"
+            normalizados = pd.Series([chave_pais(v) for v in valores], dtype=object)
+            self._textos[coluna] = (codigos, normalizados)
+        return self._textos[coluna]
+
+    def _ordem(self, coluna, crescente):
+        """Posições de todas as linhas ordenadas por ``coluna`` (vazios por último)."""
+        chave = (coluna, crescente)
+        if chave not in self._ordens:
+            serie = self.df[coluna].reset_index(drop=True)
+            self._ordens[chave] = serie.sort_values(
+                ascending=crescente, na_position='last', kind='stable'
+            ).index.to_numpy()
+        return self._ordens[chave]
+
+    def buscar(self, termo, colunas):
+        """Máscara das linhas em que ``termo`` aparece em alguma das ``colunas`` de texto."""
+        termo = chave_pais(termo)
+        mascara = np.zeros(len(self.df), dtype=bool)
+        for coluna in colunas:
+            codigos, normalizados = self._codigos_texto(coluna)
+            # A busca roda sobre os valores distintos; as linhas só comparam códigos
+            achados = np.flatnonzero(normalizados.str.contains(termo, regex=False).to_numpy())
+            if len(achados):
+                mascara |= np.isin(codigos, achados)
+        return mascara
+
+    def consultar(self, posicoes=None, busca="", colunas_busca=None, ordenar_por=None, crescente=True):
+        """Posições das linhas selecionadas, já na ordem de exibição.
+
+        ``posicoes`` vem do índice de filtros (``None`` = todas as linhas) e a
+        busca considera as colunas de texto em ``colunas_busca`` (``None`` =
+        todas).
+        """
+        n = len(self.df)
+        if posicoes is None:
+            mascara = np.ones(n, dtype=bool)
+        else:
+            mascara = np.zeros(n, dtype=bool)
+            mascara[posicoes] = True
+
+        texto = self.colunas_texto
+        colunas_busca = texto if colunas_busca is None else [col for col in colunas_busca if col in texto]
+        if busca.strip():
+            mascara &= self.buscar(busca, colunas_busca)
+
+        if ordenar_por is None:
+            return np.flatnonzero(mascara)
+        ordem = self._ordem(ordenar_por, crescente)
+        return ordem[mascara[ordem]]
+
+    def pagina(self, selecionadas, colunas, numero=1, tamanho=TAMANHOS_PAGINA[0]):
+        """DataFrame só com as linhas da página ``numero`` (1-based) e as ``colunas``."""
+        inicio = (numero - 1) * tamanho
+        pos = selecionadas[inicio:inicio + tamanho]
+        return self.df.iloc[pos, self.df.columns.get_indexer(colunas)]
+
+    @staticmethod
+    def total_paginas(total_linhas, tamanho):
+        return max(1, math.ceil(total_linhas / tamanho))
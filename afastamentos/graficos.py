@@ -0,0 +1,438 @@
+"""Figuras Plotly do painel.
+
+Cada função recebe os resultados de um estado de filtro (``ResultadosCubo``
+ou ``ResultadosSnapshot``) e monta uma figura a partir dos conjuntos de
+``afastamentos.metricas``. Ficam fora do script do Streamlit para que o
+cache de figuras, os benchmarks e os relatórios usem exatamente o mesmo
+código.
+"""
+
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Cores do tema IBAMA
+CORES_IBAMA = ['#006600', '#FFCC00', '#0066CC', '#009933', '#FF9900', '#003366']
+
+CORES_GENERO = {'Masculino': '#0066CC', 'Feminino': '#FF6B9D', 'Não Informado': '#CCCCCC'}
+
+CORES_ANTECEDENCIA = {
+    'Urgência (0-15d)': '#FF6B6B',
+    'Aviso Prévio (15-30d)': '#FFD93D',
+    'Bem Planejada (30+d)': '#6BCB77'
+}
+
+
+# =============================================================================
+# PAÍSES
+# =============================================================================
+
+def mapa_mundi(resultados):
+    viagens_por_pais = resultados.conjunto('paises')
+    fig_mapa_mundi = px.choropleth(
+        viagens_por_pais,
+        locations='ISO_Code',
+        color='Total_Viagens',
+        hover_name='País',
+        hover_data={
+            'ISO_Code': False,
+            'Total_Viagens': True,
+            'Servidores_Unicos': True,
+            'Duração_Media': ':.1f'
+        },
+        color_continuous_scale='Greens',
+        title='Distribuição de Viagens por País',
+        labels={
+            'Total_Viagens': 'Viagens',
+            'Servidores_Unicos': 'Servidores',
+            'Duração_Media': 'Duração Média'
+        }
+    )
+
+    fig_mapa_mundi.update_layout(
+        geo=dict(
+            showframe=True,
+            showcoastlines=True,
+            projection_type='natural earth',
+            bgcolor='rgba(255, 255, 255, 1)'
+        ),
+        height=600,
+        hovermode='closest',
+        coloraxis_colorbar=dict(
+            title="Número de Viagens",
+            thickness=15,
+            len=0.7
+        )
+    )
+    return fig_mapa_mundi
+
+
+def top_paises(resultados):
+    viagens_por_pais = resultados.conjunto('paises')
+    fig_mapa = px.bar(
+        viagens_por_pais.sort_values('Total_Viagens', ascending=True).tail(15),
+        x='Total_Viagens',
+        y='País',
+        orientation='h',
+        title='Top 15 Países com Mais Viagens',
+        color='Total_Viagens',
+        color_continuous_scale='Greens',
+        height=500,
+        hover_data={'Servidores_Unicos': True, 'Duração_Media': ':.1f'}
+    )
+    fig_mapa.update_layout(
+        xaxis_title="Número de Viagens",
+        yaxis_title="País",
+        hovermode='closest'
+    )
+    return fig_mapa
+
+
+def viagens_duracao_paises(resultados):
+    viagens_por_pais = resultados.conjunto('paises')
+    fig_scatter = go.Figure(data=[
+        go.Scatter(
+            x=viagens_por_pais['Total_Viagens'],
+            y=viagens_por_pais['Duração_Media'],
+            mode='markers+text',
+            marker=dict(
+                size=viagens_por_pais['Servidores_Unicos'] * 2,
+                color=viagens_por_pais['Total_Viagens'],
+                colorscale='Greens',
+                showscale=True,
+                colorbar=dict(title="Viagens"),
+                line=dict(width=1, color='white')
+            ),
+            text=viagens_por_pais['País'],
+            textposition="top center",
+            hovertemplate='<b>%{text}</b><br>Viagens: %{x}<br>Duração Média: %{y:.1f} dias<extra></extra>'
+        )
+    ])
+
+    fig_scatter.update_layout(
+        title='Análise de Viagens vs Duração Média por País<br><sub>Tamanho da bolha = Servidores únicos</sub>',
+        xaxis_title='Número de Viagens',
+        yaxis_title='Duração Média (dias)',
+        height=500,
+        hovermode='closest',
+        template='plotly_white'
+    )
+    return fig_scatter
+
+
+# =============================================================================
+# TEMPORAL
+# =============================================================================
+
+def viagens_mes(resultados):
+    fig_mes = px.bar(
+        resultados.conjunto('meses'),
+        x='Mês_Início',
+        y='Viagens',
+        title='Viagens por Mês (mês de início)',
+        color='Viagens',
+        color_continuous_scale='Viridis'
+    )
+    return fig_mes
+
+
+# =============================================================================
+# EQUIDADE
+# =============================================================================
+
+def genero_tipo(resultados):
+    fig_genero_tipo = px.bar(
+        resultados.conjunto('genero_tipo'),
+        x='Tipo de Viagem',
+        y='Viagens',
+        color='Gênero',
+        barmode='group',
+        title='Acesso por Gênero: Quem viaja para qual tipo de evento?',
+        color_discrete_map=CORES_GENERO
+    )
+    return fig_genero_tipo
+
+
+def genero_tipo_pct(resultados):
+    genero_tipo = resultados.conjunto('genero_tipo')
+    pct = genero_tipo.pivot(index='Tipo de Viagem', columns='Gênero', values='Viagens').fillna(0)
+    pct = pct.div(pct.sum(axis=1), axis=0) * 100
+    fig_genero_tipo_pct = px.bar(
+        pct.reset_index().melt(id_vars='Tipo de Viagem'),
+        x='Tipo de Viagem',
+        y='value',
+        color='Gênero',
+        barmode='stack',
+        title='Composição de Gênero por Tipo de Viagem (%)',
+        labels={'value': 'Percentual (%)'},
+        color_discrete_map=CORES_GENERO
+    )
+    return fig_genero_tipo_pct
+
+
+def duracao_genero(resultados):
+    duracao_gen_detail = resultados.conjunto('genero').rename(columns={'Duração_Media': 'Duração (dias)'})
+    fig_duracao_gen = px.bar(
+        duracao_gen_detail,
+        x='Gênero',
+        y='Duração (dias)',
+        color='Gênero',
+        color_discrete_map=CORES_GENERO,
+        title='Duração Média de Viagens por Gênero',
+        labels={'Duração (dias)': 'Duração Média (dias)'},
+        text_auto='.1f'
+    )
+    fig_duracao_gen.update_traces(textposition='outside')
+    return fig_duracao_gen
+
+
+def genero_diretoria(resultados):
+    fig_diversity = px.bar(
+        resultados.conjunto('genero_diretoria'),
+        x='Diretoria',
+        y='Viagens',
+        color='Gênero',
+        barmode='stack',
+        title='Composição de Gênero por Diretoria',
+        color_discrete_map=CORES_GENERO
+    )
+    return fig_diversity
+
+
+# =============================================================================
+# PLANEJAMENTO
+# =============================================================================
+
+def antecedencia_distribuicao(resultados):
+    fig_antec_dist = px.bar(
+        resultados.conjunto('antecedencia'),
+        x='Categoria',
+        y='Viagens',
+        color='Categoria',
+        color_discrete_map=CORES_ANTECEDENCIA,
+        title='Distribuição de Planejamento: Tempo de Antecedência',
+        labels={'Viagens': 'Número de Viagens'},
+        text_auto='value'
+    )
+    return fig_antec_dist
+
+
+def antecedencia_percentual(resultados):
+    metricas = resultados.metricas()
+    fig_antec_pie = px.pie(
+        values=[metricas['pct_urgencia'], metricas['pct_aviso'], metricas['pct_bem']],
+        names=list(CORES_ANTECEDENCIA),
+        title='% de Viagens por Categoria de Planejamento',
+        color_discrete_map=CORES_ANTECEDENCIA
+    )
+    return fig_antec_pie
+
+
+def top_tipo_diretoria(resultados):
+    """As 15 combinações Tipo de Viagem × Diretoria com 2+ viagens, da maior para a menor."""
+    tipo_viagem_dir = resultados.conjunto('tipo_diretoria')
+    return tipo_viagem_dir[tipo_viagem_dir['Viagens'] >= 2].sort_values('Viagens', ascending=False).head(15)
+
+
+def tipo_diretoria(resultados):
+    fig_tipo_dir = px.bar(
+        top_tipo_diretoria(resultados),
+        x='Viagens',
+        y='Tipo de Viagem',
+        color='Diretoria',
+        orientation='h',
+        title='Top 15 Combinações: Tipo de Viagem × Diretoria',
+        labels={'Viagens': 'Número de Viagens'}
+    )
+    return fig_tipo_dir
+
+
+# =============================================================================
+# DIRETORIAS
+# =============================================================================
+
+def viagens_diretoria(resultados):
+    viagens_diretoria = resultados.conjunto('diretorias')[['Diretoria', 'Viagens']]
+    fig_diretoria = px.bar(
+        viagens_diretoria.sort_values('Viagens', ascending=False),
+        x='Diretoria',
+        y='Viagens',
+        title='Distribuição de Viagens por Diretoria',
+        color='Viagens',
+        color_continuous_scale='Blues'
+    )
+    return fig_diretoria
+
+
+def duracao_diretoria(resultados):
+    duracao_diretoria = resultados.conjunto('diretorias')[['Diretoria', 'Duração_Media']]
+    duracao_diretoria = duracao_diretoria.sort_values('Duração_Media', ascending=False)
+    duracao_diretoria.columns = ['Diretoria', 'Duração Média']
+    fig_dur_dir = px.bar(
+        duracao_diretoria,
+        x='Diretoria',
+        y='Duração Média',
+        title='Duração Média de Afastamento por Diretoria',
+        color='Duração Média',
+        color_continuous_scale='Oranges'
+    )
+    return fig_dur_dir
+
+
+# =============================================================================
+# TIPOS DE VIAGEM
+# =============================================================================
+
+def distribuicao_tipo(resultados):
+    distrib_tipo = (
+        resultados.conjunto('tipos')
+        .set_index('Tipo de Viagem')['Viagens']
+        .sort_values(ascending=False)
+    )
+    fig_tipo = px.pie(
+        values=distrib_tipo.values,
+        names=distrib_tipo.index,
+        title='Distribuição por Tipo de Viagem',
+        color_discrete_sequence=CORES_IBAMA
+    )
+    fig_tipo.update_traces(textposition='inside', textinfo='percent+label')
+    return fig_tipo
+
+
+def duracao_tipo(resultados):
+    duracao_tipo = resultados.conjunto('tipos')[['Tipo de Viagem', 'Duração_Media', 'Viagens']]
+    duracao_tipo.columns = ['Tipo de Viagem', 'mean', 'count']
+    fig_duracao_tipo_detail = px.bar(
+        duracao_tipo,
+        x='Tipo de Viagem',
+        y='mean',
+        title='Duração Média por Tipo de Viagem',
+        color='mean',
+        color_continuous_scale='Blues',
+        labels={'mean': 'Duração Média (dias)'}
+    )
+    return fig_duracao_tipo_detail
+
+
+# =============================================================================
+# CONCORRÊNCIA
+# =============================================================================
+
+def concorrencia_diaria(serie):
+    """Linha de servidores afastados por dia, uma por coluna da série de ``afastamentos.concorrencia``."""
+    dados = serie.rename(columns=str).reset_index()
+    colunas = list(dados.columns[1:])
+    fig_concorrencia = px.line(
+        dados,
+        x='Data',
+        y=colunas,
+        title='Servidores Afastados Simultaneamente por Dia',
+        labels={'value': 'Servidores afastados', 'variable': serie.columns.name or ''},
+        color_discrete_sequence=CORES_IBAMA if len(colunas) <= len(CORES_IBAMA) else None
+    )
+    fig_concorrencia.update_traces(line_shape='hv')
+    fig_concorrencia.update_layout(
+        xaxis_title='Dia',
+        yaxis_title='Servidores afastados',
+        hovermode='x unified',
+        showlegend=len(colunas) > 1
+    )
+    return fig_concorrencia
+
+
+def picos_concorrencia(tabela):
+    """Barras do pico de cada grupo, a partir de ``afastamentos.concorrencia.picos``."""
+    grupo = tabela.columns[0]
+    fig_picos = px.bar(
+        tabela.sort_values('Pico', ascending=True),
+        x='Pico',
+        y=grupo,
+        orientation='h',
+        title=f'Pico de Servidores Afastados por {grupo}',
+        color='Pico',
+        color_continuous_scale='Oranges',
+        hover_data={'Dia_Pico': '|%d/%m/%Y', 'Dias_no_Pico': True, 'Media_Diaria': ':.1f'},
+        labels={'Pico': 'Servidores no pico', 'Dia_Pico': 'Dia do pico',
+                'Dias_no_Pico': 'Dias no pico', 'Media_Diaria': 'Média diária'}
+    )
+    return fig_picos
+
+
+# =============================================================================
+# CONFLITOS
+# =============================================================================
+
+def conflitos_diretoria(por_diretoria):
+    """Viagens em conflito e pares por Diretoria, de ``afastamentos.conflitos.conflitos_por_diretoria``."""
+    dados = por_diretoria.rename(columns={'Viagens_em_Conflito': 'Viagens em conflito'})
+    fig_conflitos = px.bar(
+        dados.assign(Diretoria=dados['Diretoria'].astype(str)),
+        x='Diretoria',
+        y=['Viagens em conflito', 'Pares'],
+        barmode='group',
+        title='Viagens Sobrepostas do Mesmo Servidor por Diretoria',
+        color_discrete_sequence=['#FF9900', '#003366'],
+        labels={'value': 'Quantidade', 'variable': ''},
+        hover_data={'Servidores': True}
+    )
+    return fig_conflitos
+
+
+# =============================================================================
+# PERFIL DE EXECUÇÃO
+# =============================================================================
+
+CORES_CACHE = {'acerto': '#009933', 'falha': '#FF9900', None: '#0066CC'}
+
+
+def cascata_perfil(etapas):
+    """Cascata de uma execução: cada barra começa no instante em que a etapa começou.
+
+    ``etapas`` são os registros de ``PerfilExecucao``; as sub-etapas aparecem
+    recuadas sob a etapa que as chamou.
+    """
+    rotulos = [f"{'· ' * e['nivel']}{e['etapa']}" for e in etapas]
+    fig_cascata = go.Figure(go.Bar(
+        base=[e['inicio_s'] * 1000 for e in etapas],
+        x=[(e['segundos'] or 0) * 1000 for e in etapas],
+        y=list(range(len(etapas))),
+        orientation='h',
+        marker_color=[CORES_CACHE[e['cache']] for e in etapas],
+        customdata=[
+            [e['linhas_entrada'], e['linhas_saida'],
+             '-' if e['memoria_bytes'] is None else f"{e['memoria_bytes'] / 1024:.0f} KB", e['cache'] or '-']
+            for e in etapas
+        ],
+        text=rotulos,
+        hovertemplate='<b>%{text}</b><br>%{x:.1f} ms (início %{base:.1f} ms)'
+                      '<br>Linhas: %{customdata[0]} → %{customdata[1]}'
+                      '<br>Memória: %{customdata[2]}<br>Cache: %{customdata[3]}<extra></extra>',
+        textposition='none'
+    ))
+    fig_cascata.update_layout(
+        title='Cascata da execução (verde = acerto de cache, laranja = falha)',
+        xaxis_title='Tempo desde o início da execução (ms)',
+        yaxis=dict(tickvals=list(range(len(etapas))), ticktext=rotulos, autorange='reversed'),
+        height=max(300, 22 * len(etapas) + 120),
+        template='plotly_white'
+    )
+    return fig_cascata
+
+
+# Identificador usado no cache de figuras -> função que monta a figura
+FIGURAS = {
+    'mapa_mundi': mapa_mundi,
+    'mapa': top_paises,
+    'scatter': viagens_duracao_paises,
+    'mes': viagens_mes,
+    'genero_tipo': genero_tipo,
+    'genero_tipo_pct': genero_tipo_pct,
+    'duracao_gen': duracao_genero,
+    'diversity': genero_diretoria,
+    'antec_dist': antecedencia_distribuicao,
+    'antec_pie': antecedencia_percentual,
+    'tipo_dir': tipo_diretoria,
+    'diretoria': viagens_diretoria,
+    'dur_dir': duracao_diretoria,
+    'tipo': distribuicao_tipo,
+    'duracao_tipo_detail': duracao_tipo,
+}
@@ -0,0 +1,235 @@
+"""Atualização incremental do dataset preparado e do cubo.
+
+Cada linha bruta da planilha recebe duas impressões digitais: a chave
+(hash de Servidor e das datas de início/fim, mais o número da ocorrência
+para desempatar duplicatas) e o conteúdo (hash da linha inteira). Numa nova
+versão da planilha, só as linhas inseridas, alteradas ou removidas são
+re-derivadas, e o dataset preparado e o cubo são corrigidos a partir delas.
+
+As contagens do relatório de pré-processamento são somas por linha bruta:
+são corrigidas tirando a contribuição das versões antigas das linhas que
+saem (re-derivadas a partir da aba anterior, mantida no estado) e somando a
+das que entram. O resultado tem as mesmas linhas, na mesma ordem, e o mesmo
+relatório que ``preparar_dados`` sobre a aba inteira.
+
+O estado também guarda a versão da tabela de países com que foi resolvido,
+lida depois do pré-processamento. Quando um alias é aceito, a resolução de
+países é refeita sobre o dataset já carregado, sem reler a planilha.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .cubo import atualizar_cubo, construir_cubo
+from .paises import RESOLVEDOR, resolver_valores
+from .perfil import etapa, marcar_falha_cache
+from .preprocessamento import compactar_tipos, preparar_dados, reaplicar_paises
+
+COLUNAS_CHAVE = ['Servidor', 'Início do Afastamento', 'Final do Afastamento']
+
+
+def impressoes_linhas(df):
+    """Retorna ``(chaves, conteudos)`` como arrays uint64 alinhados às linhas de ``df``."""
+    chave_base = pd.util.hash_pandas_object(df[COLUNAS_CHAVE], index=False)
+    ocorrencia = chave_base.groupby(chave_base.to_numpy()).cumcount()
+    chaves = pd.util.hash_pandas_object(
+        pd.DataFrame({'chave': chave_base.to_numpy(), 'ocorrencia': ocorrencia.to_numpy()}),
+        index=False,
+    )
+    conteudos = pd.util.hash_pandas_object(df, index=False)
+    return chaves.to_numpy(), conteudos.to_numpy()
+
+
+def _concatenar(base, novos):
+    """``pd.concat`` que mantém colunas categóricas, unindo as categorias se preciso."""
+    if novos.empty:
+        return base
+    resultado = pd.concat([base, novos])
+    for col in base.columns:
+        dtype = base[col].dtype
+        if not isinstance(dtype, pd.CategoricalDtype) or resultado[col].dtype == dtype:
+            continue
+        partes = [p[col].astype('category') for p in (base, novos)]
+        # Categorias em ordem, como o astype('category') de uma reconstrução completa
+        resultado[col] = pd.Series(
+            union_categoricals(partes, sort_categories=not dtype.ordered, ignore_order=True),
+            index=resultado.index,
+        )
+    return resultado
+
+
+def _recompactar(df, memoria):
+    """Tipos de uma reconstrução completa: volta cada coluna ao tipo de antes da compactação e compacta de novo.
+
+    A compactação depende dos valores do dataset inteiro (o maior inteiro, um
+    Custo com centavos, a cardinalidade dos textos), que mudam quando linhas
+    entram ou saem.
+    """
+    originais = {col: m['tipo_antes'] for col, m in memoria.items()
+                 if m['tipo_antes'] != 'category' and str(df[col].dtype) != m['tipo_antes']}
+    return compactar_tipos(df.astype(originais))[0]
+
+
+def _ajustar_contagens(atual, entrou, saiu):
+    """``atual + entrou - saiu`` nas contagens inteiras, recursivamente nos dicionários.
+
+    Valores que não são contagens (tipos das colunas) ficam os de ``atual``.
+    """
+    if isinstance(atual, dict):
+        entrou, saiu = entrou or {}, saiu or {}
+        chaves = list(atual) + [k for k in entrou if k not in atual]
+        return {k: _ajustar_contagens(atual.get(k, 0), entrou.get(k, 0), saiu.get(k, 0)) for k in chaves}
+    if isinstance(atual, (int, np.integer)) and not isinstance(atual, bool):
+        return int(atual) + int(entrou) - int(saiu)
+    return atual
+
+
+def corrigir_relatorio(relatorio, entrou, saiu, bruto, df):
+    """Relatório de ``preparar_dados`` sobre ``bruto`` a partir do anterior e das linhas alteradas.
+
+    ``entrou`` e ``saiu`` são os relatórios de ``preparar_dados`` sobre as
+    linhas brutas que entram e sobre as versões antigas das que saem; ``df``
+    é o dataset preparado já atualizado.
+    """
+    anterior = {k: v for k, v in relatorio.items() if k != 'ultima_atualizacao'}
+    novo = _ajustar_contagens(anterior, entrou, saiu)
+    # Caminhos de conversão que deixaram de ocorrer somem, como numa reconstrução
+    novo['datas'] = {col: {caminho: n for caminho, n in caminhos.items() if n}
+                     for col, caminhos in novo['datas'].items()}
+    # bytes_antes é aditivo; o depois depende das categorias do dataset inteiro
+    depois = df.memory_usage(deep=True, index=False)
+    for col, memoria in novo['memoria'].items():
+        memoria['tipo_depois'] = str(df[col].dtype)
+        memoria['bytes_depois'] = int(depois[col])
+    novo['linhas_lidas'] = len(bruto)
+    novo['linhas_preparadas'] = len(df)
+    return novo
+
+
+def atualizar_paises(df, relatorio, cubo):
+    """``(df, relatorio, cubo, alteradas)`` com a resolução de países refeita pela tabela atual.
+
+    Só as células do cubo tocadas pelas linhas cujo país mudou são reagregadas.
+    """
+    with etapa('mapeamento_paises', lambda: len(df)):
+        novo, relatorio, mudou = reaplicar_paises(df, relatorio)
+    afetadas = pd.concat([df[mudou], novo[mudou]], ignore_index=True)
+    with etapa('cubo_incremental', lambda: len(afetadas)) as registro:
+        cubo = atualizar_cubo(cubo, novo, afetadas)
+        registro['linhas_saida'] = len(cubo.celulas)
+    return novo, relatorio, cubo, int(mudou.sum())
+
+
+class EstadoIncremental:
+    """Dataset preparado e cubo de uma planilha, mantidos entre versões da fonte.
+
+    O objeto é compartilhado entre sessões (``st.cache_resource``); trate
+    ``df``, ``relatorio`` e ``cubo`` como somente leitura.
+    """
+
+    def __init__(self):
+        self.chave_fonte = None
+        self.versao_paises = None
+        self.df = None
+        self.relatorio = None
+        self.cubo = None
+        self._conteudos = pd.Series(dtype='uint64')
+        # Aba anterior: as linhas que saem são re-derivadas dela para corrigir o relatório
+        self._bruto = None
+        self._lock = threading.Lock()
+
+    def sincronizar(self, chave_fonte, carregar_bruto):
+        """Garante que o estado reflete ``chave_fonte`` e a tabela de países atual.
+
+        ``carregar_bruto`` só é chamado quando a fonte mudou. Retorna
+        ``(df, relatorio, cubo)`` consistentes entre si; o resumo da última
+        atualização fica em ``relatorio['ultima_atualizacao']``.
+        """
+        with self._lock:
+            if self.df is not None and RESOLVEDOR.versao() != self.versao_paises:
+                resumo = self._reaplicar_paises()
+                if chave_fonte == self.chave_fonte:
+                    self.relatorio['ultima_atualizacao'] = resumo
+            if chave_fonte == self.chave_fonte:
+                return self.df, self.relatorio, self.cubo
+
+            marcar_falha_cache()
+            bruto = carregar_bruto()
+            with etapa('impressoes_linhas', lambda: len(bruto)):
+                chaves, conteudos = impressoes_linhas(bruto)
+            bruto = bruto.set_axis(pd.Index(chaves, name='_chave_linha'))
+
+            if self.df is None:
+                resumo = self._reconstruir(bruto, conteudos)
+            else:
+                resumo = self._aplicar_diferencas(bruto, conteudos)
+
+            self._conteudos = pd.Series(conteudos, index=bruto.index)
+            self._bruto = bruto
+            self.chave_fonte = chave_fonte
+            # Lida depois do preparo: inclui os aliases automáticos achados nele
+            self.versao_paises = RESOLVEDOR.versao()
+            self.relatorio['ultima_atualizacao'] = resumo
+            return self.df, self.relatorio, self.cubo
+
+    def _reconstruir(self, bruto, conteudos):
+        self.df, self.relatorio = preparar_dados(bruto)
+        with etapa('cubo', lambda: len(self.df)) as registro:
+            self.cubo = construir_cubo(self.df)
+            registro['linhas_saida'] = len(self.cubo.celulas)
+        return {'modo': 'completa', 'linhas': len(bruto)}
+
+    def _reaplicar_paises(self):
+        resolver_valores(self._bruto['País'])
+        self.df, self.relatorio, self.cubo, alteradas = atualizar_paises(self.df, self.relatorio, self.cubo)
+        self.versao_paises = RESOLVEDOR.versao()
+        return {'modo': 'paises', 'alteradas': alteradas}
+
+    def _aplicar_diferencas(self, bruto, conteudos):
+        anteriores = self._conteudos
+        atuais = pd.Series(conteudos, index=bruto.index)
+
+        removidas = anteriores.index.difference(atuais.index)
+        inseridas = atuais.index.difference(anteriores.index)
+        comuns = atuais.index.intersection(anteriores.index)
+        alteradas = comuns[atuais[comuns].to_numpy() != anteriores[comuns].to_numpy()]
+
+        resumo = {
+            'modo': 'incremental',
+            'inseridas': len(inseridas),
+            'alteradas': len(alteradas),
+            'removidas': len(removidas),
+        }
+        saem = removidas.union(alteradas)
+        entram = inseridas.union(alteradas)
+        if saem.empty and entram.empty:
+            return resumo
+
+        # Só as linhas novas/alteradas passam pelo pré-processamento
+        if entram.empty:
+            novos, entrou = self.df.iloc[:0], {}
+        else:
+            novos, entrou = preparar_dados(bruto.loc[entram])
+        saiu = {} if saem.empty else preparar_dados(self._bruto.loc[saem])[1]
+        antigos = self.df[self.df.index.isin(saem)]
+
+        df = _concatenar(self.df[~self.df.index.isin(saem)], novos)
+        # Mesma ordem de uma reconstrução completa: a das linhas na aba
+        df = df.take(np.argsort(bruto.index.get_indexer(df.index), kind='stable'))
+        # Categorias de valores que só existiam nas linhas removidas saem; as ordenadas são fixas
+        for col in df.columns:
+            dtype = df[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype) and not dtype.ordered:
+                df[col] = df[col].cat.remove_unused_categories()
+        df = _recompactar(df, self.relatorio['memoria'])
+        afetadas = pd.concat([antigos, novos], ignore_index=True)
+
+        with etapa('cubo_incremental', lambda: len(afetadas)) as registro:
+            self.cubo = atualizar_cubo(self.cubo, df, afetadas)
+            registro['linhas_saida'] = len(self.cubo.celulas)
+        self.df = df
+        self.relatorio = corrigir_relatorio(self.relatorio, entrou, saiu, bruto, df)
+        return resumo
@@ -0,0 +1,261 @@
+"""Ingestão em streaming de várias planilhas de afastamentos (histórico multi-ano).
+
+Descobre as abas "Afastamentos AAAA" de um conjunto de planilhas, lê as
+linhas com o iterador read-only do openpyxl em blocos de tamanho fixo,
+normaliza cada bloco com o schema da planilha (datas, Custo, Cancelada?) e
+acrescenta o bloco a um único repositório Parquet particionado por ano.
+O dashboard depois lê apenas as partições do período selecionado.
+
+A leitura do openpyxl ocupa um núcleo por aba. Com ``processos`` > 1 as abas
+são lidas e normalizadas em paralelo, uma por processo, e cada processo
+devolve os blocos já tipados como um buffer Arrow IPC (sem pickle de
+DataFrames); o processo principal só grava os blocos no repositório.
+
+Uso pela linha de comando::
+
+    python -m afastamentos.ingestao planilhas/ --destino historico --processos 4
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .preprocessamento import DATE_COLUMNS, converter_datas, normalizar_cancelada
+from .snapshot import identificar_fonte
+
+HISTORICO_DIR = os.environ.get("AFASTAMENTOS_HISTORICO_DIR", "historico")
+MANIFESTO = "_manifesto.json"
+
+# Só abas de um ano; "Afastamentos 2024 deletar" e afins ficam de fora
+PADRAO_ABA = re.compile(r"^\s*Afastamentos\s+(\d{4})\s*$", re.IGNORECASE)
+
+TAMANHO_BLOCO = 50_000
+
+COLUNAS_TEXTO = ['Diretoria', 'Cancelada?', 'N° Processo SEI', 'Servidor', 'Gênero',
+                 'País', 'Tipo de Viagem']
+
+SCHEMA = pa.schema(
+    [(col, pa.string()) for col in COLUNAS_TEXTO]
+    + [(col, pa.timestamp('ns')) for col in DATE_COLUMNS]
+    + [('Custo', pa.float64()), ('Ano', pa.int16())]
+)
+
+
+class FonteAba(NamedTuple):
+    caminho: str
+    aba: str
+    ano: int
+
+
+def descobrir_fontes(origens):
+    """Lista as abas anuais das planilhas em ``origens`` (arquivos ou diretórios)."""
+    from openpyxl import load_workbook
+
+    arquivos = []
+    for origem in origens:
+        if os.path.isdir(origem):
+            arquivos.extend(sorted(glob.glob(os.path.join(origem, "*.xlsx"))))
+        else:
+            arquivos.append(origem)
+
+    fontes = []
+    for caminho in arquivos:
+        # Arquivos de lock do Excel aberto ("~$planilha.xlsx")
+        if os.path.basename(caminho).startswith("~$"):
+            continue
+        wb = load_workbook(caminho, read_only=True)
+        try:
+            for aba in wb.sheetnames:
+                m = PADRAO_ABA.match(aba)
+                if m:
+                    fontes.append(FonteAba(caminho, aba, int(m.group(1))))
+        finally:
+            wb.close()
+    return fontes
+
+
+def iterar_blocos(caminho, aba, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera DataFrames de até ``tamanho_bloco`` linhas, lendo a aba em modo read-only."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = wb[aba].iter_rows(values_only=True)
+        cabecalho = None
+        for linha in linhas:
+            if any(v is not None for v in linha):
+                cabecalho = [str(v).strip() if v is not None else f"Coluna {i}"
+                             for i, v in enumerate(linha)]
+                break
+        if cabecalho is None:
+            return
+
+        bloco = []
+        for linha in linhas:
+            if all(v is None for v in linha):
+                continue
+            bloco.append(linha[:len(cabecalho)])
+            if len(bloco) >= tamanho_bloco:
+                yield pd.DataFrame(bloco, columns=cabecalho)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame(bloco, columns=cabecalho)
+    finally:
+        wb.close()
+
+
+def normalizar_bloco(df, ano_aba):
+    """Aplica o schema da planilha a um bloco bruto e acrescenta a coluna ``Ano``."""
+    df = df.reindex(columns=COLUNAS_TEXTO + DATE_COLUMNS + ['Custo'])
+
+    # 'string' mesmo quando a coluna falta na aba e o reindex a criou toda NaN (float)
+    for col in COLUNAS_TEXTO:
+        df[col] = df[col].astype('string').str.strip()
+
+    # "SIM", "não " etc. viram "Sim"/"Não", como na planilha de 2025 e em preparar_dados
+    df['Cancelada?'] = normalizar_cancelada(df['Cancelada?'])
+
+    for col in DATE_COLUMNS:
+        df[col] = converter_datas(df[col])[0]
+
+    df['Custo'] = pd.to_numeric(df['Custo'], errors='coerce')
+
+    # Partição pelo ano de início; sem data, vale o ano da aba
+    df['Ano'] = df['Início do Afastamento'].dt.year.fillna(ano_aba).astype('int16')
+    return df
+
+
+def blocos_tipados(fonte, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera os blocos normalizados de uma aba como tabelas Arrow com ``SCHEMA``."""
+    for bloco in iterar_blocos(fonte.caminho, fonte.aba, tamanho_bloco):
+        yield pa.Table.from_pandas(normalizar_bloco(bloco, fonte.ano), schema=SCHEMA, preserve_index=False)
+
+
+def _ler_fonte_ipc(fonte, tamanho_bloco):
+    """Lê uma aba num processo do pool e devolve os blocos num stream Arrow IPC."""
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, SCHEMA) as writer:
+        for tabela in blocos_tipados(fonte, tamanho_bloco):
+            writer.write_table(tabela)
+    return destino.getvalue()
+
+
+def _blocos_por_fonte(fontes, tamanho_bloco, processos):
+    """Gera ``(fonte, blocos)`` de cada aba: em sequência ou, com processos > 1, na ordem em que terminam."""
+    processos = min(processos, len(fontes))
+    if processos <= 1:
+        for fonte in fontes:
+            yield fonte, blocos_tipados(fonte, tamanho_bloco)
+        return
+
+    # spawn: o dashboard tem threads, e fork de um processo com threads pode travar
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(processos, mp_context=contexto) as executor:
+        futuros = {executor.submit(_ler_fonte_ipc, fonte, tamanho_bloco): fonte for fonte in fontes}
+        for futuro in as_completed(futuros):
+            yield futuros[futuro], pa.ipc.open_stream(futuro.result())
+
+
+def _versao(fontes):
+    chaves = sorted(f"{identificar_fonte(f.caminho, f.aba).chave}:{f.ano}" for f in fontes)
+    return hashlib.sha256("|".join(chaves).encode()).hexdigest()[:16]
+
+
+def gravar_historico(fontes, destino=HISTORICO_DIR, tamanho_bloco=TAMANHO_BLOCO, processos=1, progresso=None):
+    """Reconstrói o repositório particionado a partir de ``fontes``.
+
+    A gravação acontece num diretório temporário que substitui ``destino``
+    ao final, para que leitores nunca vejam um repositório pela metade.
+    Com ``processos`` > 1 as abas são lidas em paralelo (uma aba inteira
+    por processo em memória). ``progresso(concluidas, total, fonte)`` é
+    chamado a cada aba gravada. Retorna o manifesto gravado.
+    """
+    tmp = f"{destino}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    linhas_por_ano = {}
+    n_bloco = 0
+    for concluidas, (fonte, blocos) in enumerate(_blocos_por_fonte(fontes, tamanho_bloco, processos), 1):
+        for tabela in blocos:
+            pq.write_to_dataset(
+                tabela,
+                root_path=tmp,
+                partition_cols=['Ano'],
+                basename_template=f"bloco-{n_bloco:05d}-{{i}}.parquet",
+            )
+            n_bloco += 1
+            for ano, n in tabela.column('Ano').to_pandas().value_counts().items():
+                linhas_por_ano[int(ano)] = linhas_por_ano.get(int(ano), 0) + int(n)
+        if progresso is not None:
+            progresso(concluidas, len(fontes), fonte)
+
+    manifesto = {
+        'versao': _versao(fontes),
+        'fontes': [f._asdict() for f in fontes],
+        'linhas_por_ano': {str(ano): n for ano, n in sorted(linhas_por_ano.items())},
+    }
+    with open(os.path.join(tmp, MANIFESTO), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+    antigo = f"{destino}.old-{os.getpid()}"
+    if os.path.exists(destino):
+        os.replace(destino, antigo)
+    os.replace(tmp, destino)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return manifesto
+
+
+def ler_manifesto(destino=HISTORICO_DIR):
+    """Manifesto do repositório ou ``None`` se ele ainda não foi gerado."""
+    try:
+        with open(os.path.join(destino, MANIFESTO), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ler_historico(destino=HISTORICO_DIR, anos=None, colunas=None):
+    """Lê o repositório, abrindo só as partições dos ``anos`` pedidos (e só as ``colunas``, se dadas)."""
+    dataset = ds.dataset(destino, format="parquet", partitioning="hive", schema=SCHEMA)
+    filtro = ds.field('Ano').isin(list(anos)) if anos else None
+    return dataset.to_table(columns=colunas, filter=filtro).to_pandas()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestão do histórico de afastamentos em Parquet particionado por ano.")
+    parser.add_argument("origens", nargs="+", help="planilhas .xlsx ou diretórios com planilhas")
+    parser.add_argument("--destino", default=HISTORICO_DIR)
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO, help="linhas por bloco de leitura")
+    parser.add_argument("--processos", type=int, default=None, help="abas lidas em paralelo (padrão: todos os núcleos)")
+    args = parser.parse_args(argv)
+
+    fontes = descobrir_fontes(args.origens)
+    if not fontes:
+        parser.error("nenhuma aba 'Afastamentos AAAA' encontrada")
+    for fonte in fontes:
+        print(f"- {fonte.caminho} :: {fonte.aba}")
+
+    processos = args.processos or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    manifesto = gravar_historico(fontes, args.destino, args.bloco, processos)
+    for ano, n in manifesto['linhas_por_ano'].items():
+        print(f"{ano}: {n} linhas")
+    print(f"{len(fontes)} abas em {time.perf_counter() - inicio:.1f} s com {min(processos, len(fontes))} processo(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Modos leves do mapa mundi.
+
+A geografia base é montada uma vez: um único traço de choropleth com os
+países de ``ISO_MAPPING`` e projeção plana. A cada filtro só os valores
+``z`` e o hover são trocados, sem passar pelo Plotly Express.
+
+O ganho é no servidor, não no que vai para o navegador. ``resolution: 110``
+já é o padrão do Plotly, e os contornos (topojson) nunca fazem parte do
+payload: o plotly.js os carrega no cliente nos dois modos. O JSON enviado
+é dominado pelo template padrão (~7 KB), que o Streamlit aplica igualmente
+às specs em dict. Em 20 mil linhas sintéticas o modo leve manda ~9,2 KB
+contra ~9,5 KB do completo. Para clientes muito lentos há a visão em blocos
+ordenados, em HTML puro, que dispensa o mapa e o plotly.js.
+"""
+
+import html
+
+import numpy as np
+
+from .paises import ISO_MAPPING
+
+MODOS_MAPA = ['Completo', 'Leve', 'Blocos']
+
+# Ordem fixa das localizações: o z de cada filtro é alinhado a ela
+ISOS_MAPA = sorted(set(ISO_MAPPING.values()))
+PAIS_POR_ISO = {iso: pais for pais, iso in ISO_MAPPING.items()}
+
+
+def figura_base():
+    """Spec (dict) do mapa sem valores, para ser reaproveitada entre filtros."""
+    return {
+        'data': [{
+            'type': 'choropleth',
+            'locations': ISOS_MAPA,
+            'locationmode': 'ISO-3',
+            'z': [None] * len(ISOS_MAPA),
+            'text': [PAIS_POR_ISO[iso] for iso in ISOS_MAPA],
+            'colorscale': 'Greens',
+            'zmin': 0,
+            'marker': {'line': {'width': 0.3, 'color': 'white'}},
+            'colorbar': {'title': {'text': 'Número de Viagens'}, 'thickness': 15, 'len': 0.7},
+            'hovertemplate': ('<b>%{text}</b><br>Viagens: %{z}<br>Servidores: %{customdata[0]}'
+                              '<br>Duração Média: %{customdata[1]:.1f}<extra></extra>'),
+        }],
+        'layout': {
+            'title': {'text': 'Distribuição de Viagens por País'},
+            'height': 450,
+            'margin': {'l': 0, 'r': 0, 't': 40, 'b': 0},
+            'geo': {
+                'resolution': 110,  # já é o padrão do Plotly; explícito só para documentar
+                'projection': {'type': 'equirectangular'},
+                'showframe': False,
+                'showcoastlines': False,
+                'showcountries': True,
+                'countrywidth': 0.3,
+                'showland': True,
+                'landcolor': '#F2F2F2',
+                'showlakes': False,
+                'showrivers': False,
+            },
+        },
+    }
+
+
+def figura_leve(base, viagens_por_pais):
+    """Copia a spec base trocando só ``z`` e ``customdata`` do traço."""
+    por_iso = viagens_por_pais.dropna(subset=['ISO_Code']).set_index('ISO_Code')
+    por_iso = por_iso.reindex(ISOS_MAPA)
+
+    traco = dict(base['data'][0])
+    # Sem viagens fica None: o país aparece só como terra, sem cor
+    traco['z'] = [None if np.isnan(v) else int(v) for v in por_iso['Total_Viagens'].to_numpy(dtype=float)]
+    traco['customdata'] = [
+        [None if np.isnan(s) else int(s), None if np.isnan(d) else float(d)]
+        for s, d in zip(por_iso['Servidores_Unicos'].to_numpy(dtype=float),
+                        por_iso['Duração_Media'].to_numpy(dtype=float))
+    ]
+    # O layout é só lido na conversão para figura; pode ser compartilhado
+    return {'data': [traco], 'layout': base['layout']}
+
+
+def blocos_html(viagens_por_pais):
+    """Países em blocos ordenados por viagens, com barra proporcional ao maior."""
+    ordenado = viagens_por_pais.sort_values(['Total_Viagens', 'País'], ascending=[False, True])
+    maximo = ordenado['Total_Viagens'].max() if not ordenado.empty else 0
+
+    blocos = []
+    for posicao, linha in enumerate(ordenado.itertuples(index=False), start=1):
+        largura = 100 * linha.Total_Viagens / maximo if maximo else 0
+        blocos.append(
+            f'<div class="map-tile">'
+            f'<span class="map-tile-rank">{posicao}º</span> '
+            f'<b>{html.escape(str(linha.País))}</b>'
+            f'<div class="map-tile-value">{linha.Total_Viagens}</div>'
+            f'<div class="map-tile-bar" style="width: {largura:.0f}%;"></div>'
+            f'</div>'
+        )
+    return f'<div class="map-tiles">{"".join(blocos)}</div>'
+
+
+def tamanho_payload(figura):
+    """Bytes do JSON que o Streamlit envia ao navegador para a figura (go.Figure ou dict)."""
+    import plotly.io as pio
+    import plotly.tools
+
+    # Mesma conversão do st.plotly_chart: um dict passa por go.Figure e ganha o template padrão
+    enviada = plotly.tools.return_figure_from_figure_or_data(figura, validate_figure=True)
+    return len(pio.to_json(enviada, validate=False).encode('utf-8'))
@@ -0,0 +1,400 @@
+"""Motor de métricas do painel, independente do Streamlit.
+
+Calcula, a partir do cubo fatiado, os valores dos cards e os conjuntos de
+dados de cada gráfico. A linha de comando pré-calcula tudo para todas as
+combinações Tipo de Viagem × Diretoria (incluindo "Todos"/"Todas"), em
+paralelo, e grava um snapshot versionado pela fonte dos dados: um JSON com
+as métricas e um Parquet por conjunto. O dashboard lê o snapshot quando ele
+existe e os mesmos números alimentam os relatórios noturnos.
+
+Uso pela linha de comando::
+
+    python -m afastamentos.metricas --planilha "DATA Afastamentos 2025.xlsx"
+    python -m afastamentos.metricas --historico --anos 2024 2025
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .cubo import agregar, construir_cubo, fatiar, totais
+from .paises import ISO_MAPPING, RESOLVEDOR
+from .preprocessamento import MESES_ORDEM
+from .snapshot import CACHE_DIR
+
+METRICAS_DIR = os.path.join(CACHE_DIR, "metricas")
+ARQUIVO_METRICAS = "metricas.json"
+# Gravado por afastamentos.aquecimento: specs das figuras da visão sem filtros
+ARQUIVO_FIGURAS = "figuras.json"
+
+# Incrementar quando métricas ou conjuntos mudarem de forma
+VERSAO_FORMATO = 2
+
+# Valor das colunas de combinação quando a dimensão não está filtrada
+TODOS = "*"
+COLUNAS_COMBINACAO = ['_tipo', '_diretoria']
+
+ORDEM_ANTECEDENCIA = ['Urgência (0-15d)', 'Aviso Prévio (15-30d)', 'Bem Planejada (30+d)']
+
+# Valores da planilha que não entram nas listas de filtros
+VALORES_SEM_FILTRO = ['Não Informado', 'nan']
+
+
+# =============================================================================
+# CONJUNTOS DOS GRÁFICOS
+# =============================================================================
+
+# Cada conjunto recebe ``agrupar(dims)``: a agregação da seleção pelas
+# dimensões, com Viagens, Duração_Media e Servidores_Unicos. No dashboard é
+# ``cubo.agregar`` sobre o cubo fatiado; em ``afastamentos.consultas``, SQL.
+
+def _paises(agrupar):
+    viagens_por_pais = agrupar(['País_Inglês'])[
+        ['País_Inglês', 'Viagens', 'Servidores_Unicos', 'Duração_Media']
+    ]
+    viagens_por_pais.columns = ['País', 'Total_Viagens', 'Servidores_Unicos', 'Duração_Media']
+    viagens_por_pais['País'] = viagens_por_pais['País'].astype(str)
+    viagens_por_pais['ISO_Code'] = viagens_por_pais['País'].map(ISO_MAPPING)
+    return viagens_por_pais
+
+
+def _meses(agrupar):
+    viagens_por_mes = agrupar(['Mês_Início'])[['Mês_Início', 'Viagens']]
+    viagens_por_mes['Mês_Início'] = pd.Categorical(
+        viagens_por_mes['Mês_Início'].astype(str), categories=MESES_ORDEM, ordered=True
+    )
+    return viagens_por_mes.sort_values('Mês_Início').reset_index(drop=True)
+
+
+def _antecedencia(agrupar):
+    dist_antec = (
+        agrupar(['Categoria_Antecedencia'])
+        .assign(Categoria_Antecedencia=lambda d: d['Categoria_Antecedencia'].astype(str))
+        .set_index('Categoria_Antecedencia')['Viagens']
+        .reindex(ORDEM_ANTECEDENCIA, fill_value=0)
+        .reset_index()
+    )
+    dist_antec.columns = ['Categoria', 'Viagens']
+    dist_antec['Categoria'] = pd.Categorical(dist_antec['Categoria'], categories=ORDEM_ANTECEDENCIA, ordered=True)
+    return dist_antec.sort_values('Categoria').reset_index(drop=True)
+
+
+CONJUNTOS = {
+    'paises': _paises,
+    'meses': _meses,
+    'antecedencia': _antecedencia,
+    'genero_tipo': lambda agrupar: agrupar(['Tipo de Viagem', 'Gênero'])[['Tipo de Viagem', 'Gênero', 'Viagens']],
+    'genero': lambda agrupar: agrupar(['Gênero'])[['Gênero', 'Duração_Media']],
+    'genero_diretoria': lambda agrupar: agrupar(['Diretoria', 'Gênero'])[['Diretoria', 'Gênero', 'Viagens']],
+    'tipo_diretoria': lambda agrupar: agrupar(['Tipo de Viagem', 'Diretoria'])[['Tipo de Viagem', 'Diretoria', 'Viagens']],
+    'diretorias': lambda agrupar: agrupar(['Diretoria'])[['Diretoria', 'Viagens', 'Duração_Media']],
+    'tipos': lambda agrupar: agrupar(['Tipo de Viagem'])[['Tipo de Viagem', 'Viagens', 'Duração_Media']],
+}
+
+
+# =============================================================================
+# MÉTRICAS DOS CARDS
+# =============================================================================
+
+def _numero(valor):
+    """Escalar numpy/pandas como int/float do Python, para o JSON."""
+    if valor is None or pd.isna(valor):
+        return float('nan')
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    return float(valor)
+
+
+def calcular_metricas(t, conjunto):
+    """Valores dos cards e indicadores.
+
+    ``t`` são as medidas da seleção inteira, como em ``cubo.totais``;
+    ``conjunto(nome)`` devolve os conjuntos já calculados.
+    """
+    total_viagens = t['Viagens']
+    custo_total = t['Soma_Custo'] if pd.notna(t['Soma_Custo']) else 0
+    meses = conjunto('meses')
+    antecedencia = conjunto('antecedencia').set_index('Categoria')['Viagens']
+
+    def pct(parte):
+        return parte / total_viagens * 100 if total_viagens > 0 else 0
+
+    metricas = {
+        'total_viagens': total_viagens,
+        'total_servidores': t['Servidores_Unicos'],
+        'duracao_media': t['Duração_Media'],
+        'antecedencia_media': t['Antecedencia_Media'],
+        'duracao_min': t['Duracao_Min'],
+        'duracao_max': t['Duracao_Max'],
+        'duracao_total': t['Soma_Duracao'],
+        'total_paises': len(conjunto('paises')),
+        'total_diretorias': len(conjunto('diretorias')),
+        'pico_viagens_mes': meses['Viagens'].max() if not meses.empty else 0,
+        'custo_total': custo_total,
+        'custo_medio': t['Custo_Medio'] if pd.notna(t['Custo_Medio']) else 0,
+        'custo_por_viagem': custo_total / total_viagens if total_viagens > 0 else 0,
+        'pct_bem_planejado': pct(t['Bem_Planejadas']),
+        'pct_urgencia': pct(antecedencia['Urgência (0-15d)']),
+        'pct_aviso': pct(antecedencia['Aviso Prévio (15-30d)']),
+        'pct_bem': pct(antecedencia['Bem Planejada (30+d)']),
+    }
+    return {nome: _numero(valor) for nome, valor in metricas.items()}
+
+
+class ResultadosCubo:
+    """Métricas e conjuntos de um cubo fatiado, calculados sob demanda e memorizados."""
+
+    def __init__(self, cubo):
+        self.cubo = cubo
+        self._conjuntos = {}
+        self._metricas = None
+
+    def conjunto(self, nome):
+        if nome not in self._conjuntos:
+            self._conjuntos[nome] = CONJUNTOS[nome](functools.partial(agregar, self.cubo))
+        return self._conjuntos[nome]
+
+    def metricas(self):
+        if self._metricas is None:
+            self._metricas = calcular_metricas(totais(self.cubo), self.conjunto)
+        return self._metricas
+
+
+# =============================================================================
+# SNAPSHOTS PRÉ-CALCULADOS
+# =============================================================================
+
+def _valores(celulas, dim):
+    return sorted(v for v in celulas[dim].dropna().astype(str).unique() if v not in VALORES_SEM_FILTRO)
+
+
+def opcoes_filtro(cubo):
+    """Valores oferecidos nos filtros da sidebar e o período coberto (datas ISO)."""
+    return opcoes_celulas(cubo.celulas)
+
+
+def opcoes_celulas(celulas):
+    """``opcoes_filtro`` a partir de qualquer tabela com as dimensões e Inicio_Min/Inicio_Max."""
+    periodo = None
+    if celulas['Inicio_Min'].notna().any():
+        periodo = [celulas['Inicio_Min'].min().date().isoformat(), celulas['Inicio_Max'].max().date().isoformat()]
+    return {
+        'tipos': _valores(celulas, 'Tipo de Viagem'),
+        'diretorias': _valores(celulas, 'Diretoria'),
+        'generos': _valores(celulas, 'Gênero'),
+        'paises': _valores(celulas, 'País_Inglês'),
+        # Na ordem do calendário, não alfabética
+        'trimestres': [str(v) for v in pd.Series(celulas['Trimestre'].dropna().unique()).sort_values()],
+        'periodo': periodo,
+    }
+
+
+def combinacoes(opcoes):
+    """Todas as combinações (tipo, diretoria); ``None`` = sem filtro na dimensão."""
+    return [(tipo, diretoria)
+            for tipo in [None] + opcoes['tipos']
+            for diretoria in [None] + opcoes['diretorias']]
+
+
+def versao_fonte(source_key):
+    """Nome do diretório do snapshot para a chave de fonte do dashboard.
+
+    Inclui a versão da tabela de países: um alias aceito muda os conjuntos
+    por país, e o snapshot anterior deixa de valer.
+    """
+    bruto = json.dumps([VERSAO_FORMATO, list(source_key), RESOLVEDOR.versao()], default=list)
+    return hashlib.sha256(bruto.encode()).hexdigest()[:16]
+
+
+_CUBO_TRABALHADOR = None
+
+
+def _iniciar_trabalhador(cubo):
+    # O cubo é enviado uma vez por processo, não a cada combinação
+    global _CUBO_TRABALHADOR
+    _CUBO_TRABALHADOR = cubo
+
+
+def _calcular_combinacao(combinacao):
+    tipo, diretoria = combinacao
+    resultados = ResultadosCubo(fatiar(_CUBO_TRABALHADOR, {'Tipo de Viagem': tipo, 'Diretoria': diretoria}))
+    conjuntos = {nome: resultados.conjunto(nome) for nome in CONJUNTOS}
+    return combinacao, resultados.metricas(), conjuntos
+
+
+def gravar_snapshot_metricas(cubo, source_key, destino=METRICAS_DIR, processos=None):
+    """Pré-calcula todas as combinações e grava o snapshot da fonte.
+
+    Retorna o caminho do diretório gravado. A gravação acontece num
+    diretório temporário que substitui o anterior ao final.
+    """
+    opcoes = opcoes_filtro(cubo)
+    todas = combinacoes(opcoes)
+    processos = processos or os.cpu_count() or 1
+
+    if processos > 1:
+        with ProcessPoolExecutor(processos, initializer=_iniciar_trabalhador, initargs=(cubo,)) as executor:
+            calculados = list(executor.map(_calcular_combinacao, todas,
+                                           chunksize=max(1, len(todas) // (processos * 4))))
+    else:
+        _iniciar_trabalhador(cubo)
+        calculados = [_calcular_combinacao(c) for c in todas]
+
+    versao = versao_fonte(source_key)
+    final = os.path.join(destino, versao)
+    tmp = f"{final}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    for nome in CONJUNTOS:
+        partes = [
+            conjuntos[nome].assign(_tipo=tipo or TODOS, _diretoria=diretoria or TODOS)
+            for (tipo, diretoria), _, conjuntos in calculados
+        ]
+        pd.concat(partes, ignore_index=True).to_parquet(os.path.join(tmp, f"{nome}.parquet"), index=False)
+
+    documento = {
+        'versao': versao,
+        'fonte': list(source_key),
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'opcoes': opcoes,
+        'combinacoes': [
+            {'tipo': tipo, 'diretoria': diretoria, 'metricas': metricas}
+            for (tipo, diretoria), metricas, _ in calculados
+        ],
+    }
+    with open(os.path.join(tmp, ARQUIVO_METRICAS), "w", encoding="utf-8") as f:
+        json.dump(documento, f, ensure_ascii=False, indent=1)
+
+    antigo = f"{final}.old-{os.getpid()}"
+    if os.path.exists(final):
+        os.replace(final, antigo)
+    os.replace(tmp, final)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return final
+
+
+class SnapshotMetricas:
+    """Snapshot lido do disco, com busca por combinação (tipo, diretoria)."""
+
+    def __init__(self, diretorio):
+        with open(os.path.join(diretorio, ARQUIVO_METRICAS), encoding="utf-8") as f:
+            documento = json.load(f)
+        self.versao = documento['versao']
+        self.gerado_em = documento['gerado_em']
+        self.opcoes = documento['opcoes']
+        self._metricas = {(c['tipo'], c['diretoria']): c['metricas'] for c in documento['combinacoes']}
+        self.combinacoes = list(self._metricas)
+        self.figuras = {}
+        if os.path.exists(os.path.join(diretorio, ARQUIVO_FIGURAS)):
+            with open(os.path.join(diretorio, ARQUIVO_FIGURAS), encoding="utf-8") as f:
+                self.figuras = json.load(f)
+        self._conjuntos = {}
+        self._vazios = {}
+        for nome in CONJUNTOS:
+            tabela = pd.read_parquet(os.path.join(diretorio, f"{nome}.parquet"))
+            # Colunas e tipos gravados no Parquet, mesmo que nenhuma combinação tenha linhas
+            self._vazios[nome] = tabela.drop(columns=COLUNAS_COMBINACAO).iloc[:0]
+            self._conjuntos[nome] = {
+                chave: parte.drop(columns=COLUNAS_COMBINACAO).reset_index(drop=True)
+                for chave, parte in tabela.groupby(COLUNAS_COMBINACAO, sort=False, observed=True)
+            }
+
+    def resultados(self, tipo, diretoria):
+        """Resultados de uma combinação ou ``None`` se ela não foi pré-calculada."""
+        if (tipo, diretoria) not in self._metricas:
+            return None
+        return ResultadosSnapshot(self, tipo, diretoria)
+
+
+class ResultadosSnapshot:
+    """Mesma interface de ``ResultadosCubo``, servida pelo snapshot."""
+
+    def __init__(self, snapshot, tipo, diretoria):
+        self._snapshot = snapshot
+        self._chave = (tipo or TODOS, diretoria or TODOS)
+        self._metricas = snapshot._metricas[(tipo, diretoria)]
+
+    def conjunto(self, nome):
+        partes = self._snapshot._conjuntos[nome]
+        if self._chave in partes:
+            return partes[self._chave].copy()
+        # Combinação sem linhas naquele conjunto: mesma forma, vazia
+        return self._snapshot._vazios[nome].copy()
+
+    def metricas(self):
+        return self._metricas
+
+
+def localizar_snapshot_metricas(source_key, destino=METRICAS_DIR):
+    """Diretório do snapshot pré-calculado da fonte ou ``None`` se ele ainda não foi gerado."""
+    diretorio = os.path.join(destino, versao_fonte(source_key))
+    if not os.path.exists(os.path.join(diretorio, ARQUIVO_METRICAS)):
+        return None
+    return diretorio
+
+
+# =============================================================================
+# LINHA DE COMANDO
+# =============================================================================
+
+def _carregar_fonte(args):
+    """``(source_key, cubo)`` montados do mesmo jeito que o dashboard monta.
+
+    Os aliases automáticos achados no preparo são gravados: um dashboard
+    iniciado depois lê a mesma tabela de países e encontra este snapshot.
+    """
+    from .preprocessamento import preparar_dados
+
+    if args.historico:
+        from .ingestao import ler_historico, ler_manifesto
+
+        manifesto = ler_manifesto(args.historico_dir)
+        if manifesto is None:
+            raise SystemExit(f"histórico não encontrado em {args.historico_dir}")
+        anos = args.anos or [max(int(ano) for ano in manifesto['linhas_por_ano'])]
+        source_key = ('historico', manifesto['versao'], tuple(sorted(anos)))
+        bruto = ler_historico(args.historico_dir, anos=anos)
+    else:
+        from .snapshot import carregar_snapshot
+
+        bruto, fonte = carregar_snapshot(args.planilha, args.aba)
+        source_key = ('planilha', fonte.chave)
+
+    df, _ = preparar_dados(bruto)
+    RESOLVEDOR.gravar_automaticos()
+    return source_key, construir_cubo(df)
+
+
+def main(argv=None):
+    from .ingestao import HISTORICO_DIR
+
+    parser = argparse.ArgumentParser(description="Pré-cálculo das métricas do dashboard de afastamentos.")
+    parser.add_argument("--planilha", default="DATA Afastamentos 2025.xlsx")
+    parser.add_argument("--aba", default="Afastamentos 2025")
+    parser.add_argument("--historico", action="store_true", help="usar o histórico Parquet em vez da planilha")
+    parser.add_argument("--historico-dir", default=HISTORICO_DIR)
+    parser.add_argument("--anos", type=int, nargs="+", help="anos do histórico (padrão: o mais recente)")
+    parser.add_argument("--destino", default=METRICAS_DIR)
+    parser.add_argument("--processos", type=int, default=None, help="processos paralelos (padrão: todos os núcleos)")
+    args = parser.parse_args(argv)
+
+    source_key, cubo = _carregar_fonte(args)
+    diretorio = gravar_snapshot_metricas(cubo, source_key, args.destino, args.processos)
+
+    snapshot = SnapshotMetricas(diretorio)
+    print(f"{diretorio}: {len(snapshot.combinacoes)} combinações")
+    for nome, valor in snapshot.resultados(None, None).metricas().items():
+        print(f"{nome}: {valor:.2f}" if isinstance(valor, float) else f"{nome}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
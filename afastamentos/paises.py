@@ -0,0 +1,380 @@
+"""Normalização de nomes de países.
+
+O campo País é texto livre. Em vez de resolver linha a linha, a normalização
+trabalha só sobre os valores distintos da coluna, com uma tabela de busca
+casefold e sem acentos montada uma única vez, e devolve nome em inglês e
+código ISO de uma vez, como colunas categóricas.
+
+Valores fora da tabela ("Holanda", "Argentna") passam por uma busca
+aproximada: um índice invertido de trigramas de caracteres aponta só os
+nomes que compartilham algum trigrama com o valor, e o de maior
+similaridade (coeficiente de Dice) vence. Listas de países ("Canadá e EUA")
+nunca são resolvidas sozinhas, só sugeridas. Resoluções aceitas vão para o
+arquivo de aliases (``ARQUIVO_ALIASES``), e cada grafia nova é buscada uma
+única vez: nas execuções seguintes ela já está na tabela exata.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+# ✅ MAPEAMENTO SIMPLIFICADO E TESTADO
+COUNTRY_MAPPING = {
+    'EUA': 'United States',
+    'Suíça': 'Switzerland',
+    'Bolívia': 'Bolivia',
+    'Itália': 'Italy',
+    'China': 'China',
+    'Reino Unido': 'United Kingdom',
+    'Peru': 'Peru',
+    'França': 'France',
+    'Espanha': 'Spain',
+    'Bélgica': 'Belgium',
+    'Japão': 'Japan',
+    'Trinidad e Tobago': 'Trinidad and Tobago',
+    'Equador': 'Ecuador',
+    'Grécia': 'Greece',
+    'Argentina': 'Argentina',
+    'Alemanha': 'Germany',
+    'Costa Rica': 'Costa Rica',
+    'Países Baixos': 'Netherlands',
+    'Áustria': 'Austria',
+    'Dinamarca': 'Denmark',
+    'Noruega': 'Norway',
+    'República Tcheca': 'Czechia',
+    'Panamá': 'Panama',
+    'Uruguai': 'Uruguay',
+    'Coreia do Sul': 'South Korea',
+    'Tailândia': 'Thailand',
+    'Chile': 'Chile',
+    'Colômbia': 'Colombia',
+    'Indonésia': 'Indonesia',
+    'África do Sul': 'South Africa',
+    'México': 'Mexico',
+    'Canadá': 'Canada',
+    'Guiana Francesa': 'French Guiana',
+    'Quênia': 'Kenya',
+    'Portugal': 'Portugal',
+    'Uzbequistão': 'Uzbekistan',
+    'Suriname': 'Suriname',
+    'Antártida': 'Antarctica',
+    'Brasil': 'Brazil',
+}
+
+# Mapeamento de códigos ISO para países
+ISO_MAPPING = {
+    'United States': 'USA',
+    'Switzerland': 'CHE',
+    'Bolivia': 'BOL',
+    'Italy': 'ITA',
+    'China': 'CHN',
+    'United Kingdom': 'GBR',
+    'Peru': 'PER',
+    'France': 'FRA',
+    'Spain': 'ESP',
+    'Belgium': 'BEL',
+    'Japan': 'JPN',
+    'Trinidad and Tobago': 'TTO',
+    'Ecuador': 'ECU',
+    'Greece': 'GRC',
+    'Argentina': 'ARG',
+    'Germany': 'DEU',
+    'Costa Rica': 'CRI',
+    'Netherlands': 'NLD',
+    'Austria': 'AUT',
+    'Denmark': 'DNK',
+    'Norway': 'NOR',
+    'Czechia': 'CZE',
+    'Panama': 'PAN',
+    'Uruguay': 'URY',
+    'South Korea': 'KOR',
+    'Thailand': 'THA',
+    'Chile': 'CHL',
+    'Colombia': 'COL',
+    'Indonesia': 'IDN',
+    'South Africa': 'ZAF',
+    'Mexico': 'MEX',
+    'Canada': 'CAN',
+    'French Guiana': 'GUF',
+    'Kenya': 'KEN',
+    'Portugal': 'PRT',
+    'Uzbekistan': 'UZB',
+    'Suriname': 'SUR',
+    'Antarctica': 'ATA',
+    'Brazil': 'BRA',
+}
+
+# Grafias comuns fora do COUNTRY_MAPPING; comparadas já sem acento e casefold
+ALIASES_SEMENTE = {
+    'Estados Unidos': 'United States',
+    'Estados Unidos da América': 'United States',
+    'USA': 'United States',
+    'US': 'United States',
+    'United States of America': 'United States',
+    'Holanda': 'Netherlands',
+    'Inglaterra': 'United Kingdom',
+    'Grã-Bretanha': 'United Kingdom',
+    'UK': 'United Kingdom',
+    'Escócia': 'United Kingdom',
+    'Tchéquia': 'Czechia',
+    'Coréia do Sul': 'South Korea',
+}
+
+VALORES_NULOS = {'nan', 'none', 'null', ''}
+
+ARQUIVO_ALIASES = os.environ.get("AFASTAMENTOS_ALIASES_PAISES", "aliases_paises.json")
+
+# Similaridade mínima para aceitar sozinho e para sugerir na lista de não resolvidos
+LIMIAR_ACEITE = 0.7
+LIMIAR_SUGESTAO = 0.4
+# Um segundo país a menos disso do melhor torna o valor ambíguo: fica como sugestão
+MARGEM_AMBIGUIDADE = 0.1
+# Siglas e valores curtos demais para busca aproximada
+TAMANHO_MINIMO_BUSCA = 4
+# "Canadá e EUA", "Peru/Chile": mais de um país; nunca aceitos sozinhos, só sugeridos
+SEPARADORES_LISTA = re.compile(r'\se\s|[/,;]')
+
+
+def chave_pais(texto):
+    """Forma canônica para comparação: sem acentos, casefold e espaços simples."""
+    sem_acento = unicodedata.normalize('NFKD', str(texto))
+    sem_acento = ''.join(c for c in sem_acento if not unicodedata.combining(c))
+    return ' '.join(sem_acento.casefold().split())
+
+
+def trigramas(chave):
+    """Trigramas de caracteres de ``chave``, com bordas para pesar início e fim."""
+    texto = f"  {chave} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceTrigramas:
+    """Índice invertido trigrama -> nomes, para busca aproximada sem varrer todos os nomes."""
+
+    def __init__(self):
+        self._nomes = []
+        self._tamanhos = []
+        self._postings = defaultdict(list)
+
+    def __len__(self):
+        return len(self._nomes)
+
+    def adicionar(self, chave, pais_en):
+        gramas = trigramas(chave)
+        posicao = len(self._nomes)
+        self._nomes.append((chave, pais_en))
+        self._tamanhos.append(len(gramas))
+        for grama in gramas:
+            self._postings[grama].append(posicao)
+
+    def buscar(self, chave, limite=3):
+        """Até ``limite`` candidatos ``(similaridade, chave, pais_en)``, do mais parecido."""
+        gramas = trigramas(chave)
+        comuns = Counter()
+        for grama in gramas:
+            comuns.update(self._postings.get(grama, ()))
+        candidatos = [
+            (2 * n / (len(gramas) + self._tamanhos[posicao]), *self._nomes[posicao])
+            for posicao, n in comuns.items()
+        ]
+        candidatos.sort(key=lambda candidato: candidato[0], reverse=True)
+        return candidatos[:limite]
+
+
+class ResolvedorPaises:
+    """Tabela exata (mapeamentos, sementes e aliases aprendidos) com busca aproximada por trigramas.
+
+    Compartilhado pelo processo; as atualizações passam por um lock e são
+    gravadas em ``arquivo`` por troca atômica, mescladas com o que outro
+    processo tenha gravado antes. Os aliases achados pela busca aproximada
+    valem só em memória até serem gravados pela interface ou pela linha de
+    comando (``gravar_automaticos``); preparar dados nunca escreve o arquivo.
+    """
+
+    def __init__(self, arquivo=ARQUIVO_ALIASES):
+        self.arquivo = arquivo
+        self._tabela = {}
+        self._indice = IndiceTrigramas()
+        self._aliases = {}
+        self._automaticos = {}
+        self._sem_resolucao = {}
+        self._versao = None
+        self._lock = threading.Lock()
+
+        # Nomes em inglês também resolvem (ex.: "Colombia", "Bolivia")
+        for pais_en in ISO_MAPPING:
+            self._registrar(chave_pais(pais_en), pais_en)
+        for pais_pt, pais_en in {**COUNTRY_MAPPING, **ALIASES_SEMENTE}.items():
+            self._registrar(chave_pais(pais_pt), pais_en)
+        for chave, alias in self._ler_aliases().items():
+            self._aliases[chave] = alias
+            self._registrar(chave, alias['pais'])
+
+    def _registrar(self, chave, pais_en):
+        if chave not in self._tabela:
+            self._indice.adicionar(chave, pais_en)
+        self._tabela[chave] = (pais_en, ISO_MAPPING.get(pais_en))
+        self._versao = None
+
+    def versao(self):
+        """Identifica o conteúdo da tabela; muda quando um alias é aceito."""
+        with self._lock:
+            if self._versao is None:
+                bruto = json.dumps(sorted(self._tabela.items()), ensure_ascii=False)
+                self._versao = hashlib.sha256(bruto.encode()).hexdigest()[:12]
+            return self._versao
+
+    def _ler_aliases(self):
+        try:
+            with open(self.arquivo, encoding="utf-8") as f:
+                return json.load(f)['aliases']
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _gravar_aliases(self):
+        aliases = {**self._ler_aliases(), **self._aliases}
+        tmp = f"{self.arquivo}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({'aliases': dict(sorted(aliases.items()))}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.arquivo)
+        except OSError:
+            # Sem permissão de escrita o alias vale só para este processo
+            pass
+
+    def aceitar(self, valor, pais_en, origem='manual', similaridade=None):
+        """Registra ``valor`` como grafia de ``pais_en`` e grava o arquivo de aliases."""
+        chave = chave_pais(valor)
+        with self._lock:
+            self._aliases[chave] = {'pais': pais_en, 'origem': origem, 'similaridade': similaridade}
+            self._registrar(chave, pais_en)
+            self._automaticos.pop(chave, None)
+            # O alias novo entra no índice: os sem resolução voltam a ser buscados
+            self._sem_resolucao.clear()
+            self._gravar_aliases()
+
+    def automaticos(self):
+        """Aliases da busca aproximada ainda não gravados: ``(valor, pais_en, similaridade)``."""
+        with self._lock:
+            return [(valor, alias['pais'], alias['similaridade']) for valor, alias in self._automaticos.values()]
+
+    def gravar_automaticos(self):
+        """Grava os aliases automáticos pendentes no arquivo; retorna quantos eram."""
+        with self._lock:
+            for chave, (_, alias) in self._automaticos.items():
+                self._aliases[chave] = alias
+            gravados = len(self._automaticos)
+            self._automaticos.clear()
+            if gravados:
+                self._gravar_aliases()
+            return gravados
+
+    def sugerir(self, valor):
+        """``(pais_en, similaridade)`` mais parecido com ``valor``, ou ``(None, 0.0)``."""
+        chave = chave_pais(valor)
+        if len(chave) < TAMANHO_MINIMO_BUSCA:
+            return None, 0.0
+        candidatos = self._indice.buscar(chave)
+        if not candidatos:
+            return None, 0.0
+        return candidatos[0][2], candidatos[0][0]
+
+    def _buscar_aproximado(self, valor, chave):
+        with self._lock:
+            if chave in self._sem_resolucao:
+                return None, None
+        if len(chave) >= TAMANHO_MINIMO_BUSCA and not SEPARADORES_LISTA.search(chave):
+            candidatos = self._indice.buscar(chave)
+            if candidatos and candidatos[0][0] >= LIMIAR_ACEITE:
+                similaridade, _, pais_en = candidatos[0]
+                rivais = [c for c in candidatos[1:] if c[2] != pais_en]
+                if not rivais or similaridade - rivais[0][0] >= MARGEM_AMBIGUIDADE:
+                    # Vale já na tabela (e na versão), mas só é gravado quando confirmado
+                    with self._lock:
+                        self._automaticos[chave] = (valor, {
+                            'pais': pais_en, 'origem': 'automatico', 'similaridade': round(similaridade, 3)})
+                        self._registrar(chave, pais_en)
+                        return self._tabela[chave]
+        # Buscado uma vez por processo; fica para a lista de não resolvidos
+        with self._lock:
+            self._sem_resolucao[chave] = valor
+        return None, None
+
+    def resolver(self, valor):
+        """Resolve um valor isolado para ``(nome_ingles, iso)`` ou ``(None, None)``."""
+        if pd.isna(valor):
+            return None, None
+        chave = chave_pais(valor)
+        if chave in VALORES_NULOS:
+            return None, None
+        if chave in self._tabela:
+            return self._tabela[chave]
+        return self._buscar_aproximado(valor, chave)
+
+
+RESOLVEDOR = ResolvedorPaises()
+
+
+def resolver_pais(pais_input):
+    """Resolve um valor isolado para ``(nome_ingles, iso)`` ou ``(None, None)``."""
+    return RESOLVEDOR.resolver(pais_input)
+
+
+def mapear_pais(pais_input):
+    return resolver_pais(pais_input)[0]
+
+
+def resolver_valores(serie):
+    """Resolve cada valor distinto de ``serie``, registrando os aliases automáticos.
+
+    Aplicado à coluna ``País`` da fonte inteira (inclusive linhas que o
+    preparo descarta), faz a versão da tabela depender só da fonte: pode ser
+    lida antes de montar o dataset e não muda durante o preparo.
+    """
+    for valor in serie.dropna().astype(str).str.strip().unique():
+        resolver_pais(valor)
+
+
+def normalizar_paises(serie):
+    """Retorna DataFrame com ``País_Inglês`` e ``ISO_Code`` categóricos, alinhado a ``serie``.
+
+    Cada valor distinto é resolvido uma única vez; o resultado é espalhado de
+    volta para as linhas pelos códigos de ``pd.factorize``.
+    """
+    codigos, distintos = pd.factorize(serie, use_na_sentinel=True)
+    resolvidos = [resolver_pais(valor) for valor in distintos]
+
+    def espalhar(valores):
+        por_distinto = pd.Categorical(valores)
+        # O -1 extra no fim faz os nulos (código -1) continuarem nulos
+        codigos_linha = np.append(por_distinto.codes, -1)[codigos]
+        return pd.Categorical.from_codes(codigos_linha, dtype=por_distinto.dtype)
+
+    return pd.DataFrame(
+        {
+            'País_Inglês': espalhar([r[0] for r in resolvidos]),
+            'ISO_Code': espalhar([r[1] for r in resolvidos]),
+        },
+        index=serie.index,
+    )
+
+
+def paises_nao_resolvidos(df):
+    """Valores de ``País`` sem país resolvido, com o número de linhas e a melhor sugestão."""
+    sem_pais = df['País'].notna() & df['País_Inglês'].isna()
+    contagem = df.loc[sem_pais, 'País'].astype(str).str.strip().value_counts()
+    contagem = contagem[[chave_pais(valor) not in VALORES_NULOS for valor in contagem.index]]
+    sugestoes = [RESOLVEDOR.sugerir(valor) for valor in contagem.index]
+    return pd.DataFrame({
+        'País': contagem.index,
+        'Linhas': contagem.to_numpy(),
+        'Sugestão': [pais_en if similaridade >= LIMIAR_SUGESTAO else None for pais_en, similaridade in sugestoes],
+        'Similaridade': [round(similaridade, 2) for _, similaridade in sugestoes],
+    })
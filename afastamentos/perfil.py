@@ -0,0 +1,171 @@
+"""Perfil de execução do dashboard: tempo, linhas, memória e cache por etapa.
+
+Uma ``PerfilExecucao`` cobre uma execução do script (ou de um fragmento).
+Enquanto ela está ativa, ``etapa(nome)`` registra a etapa; sem perfil ativo
+é um context manager vazio, então os módulos do pipeline podem marcar suas
+etapas sem custo fora do modo debug. O perfil ativo fica num ``ContextVar``
+e não precisa ser passado adiante.
+
+A memória é o pico de alocações durante a etapa, acima do que já estava
+alocado ao entrar (``tracemalloc``, que é global ao processo e deixa a
+execução mais lenta; por isso é ligado à parte).
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+_ATUAL = contextvars.ContextVar("perfil_execucao", default=None)
+
+# tracemalloc é do processo: fica ligado enquanto algum perfil medir memória
+_TRACEMALLOC_LOCK = threading.Lock()
+_TRACEMALLOC_USOS = 0
+
+
+def _ligar_tracemalloc():
+    global _TRACEMALLOC_USOS
+    with _TRACEMALLOC_LOCK:
+        if _TRACEMALLOC_USOS == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _TRACEMALLOC_USOS += 1
+
+
+def _desligar_tracemalloc():
+    global _TRACEMALLOC_USOS
+    with _TRACEMALLOC_LOCK:
+        _TRACEMALLOC_USOS -= 1
+        if _TRACEMALLOC_USOS == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class PerfilExecucao:
+    """Etapas de uma execução, na ordem em que começaram."""
+
+    def __init__(self, descricao):
+        self.descricao = descricao
+        self.iniciado_em = datetime.now().isoformat(timespec='seconds')
+        self.etapas = []
+        self.total_segundos = None
+        self.primeira_pintura_s = None
+        self.memoria = False
+        self._pilha = []
+        self._inicio = None
+        self._token = None
+
+    def iniciar(self, inicio=None):
+        """Ativa o perfil; ``inicio`` (``time.perf_counter()``) antecipa o começo da contagem."""
+        self._inicio = time.perf_counter() if inicio is None else inicio
+        self._token = _ATUAL.set(self)
+        return self
+
+    def finalizar(self):
+        """Encerra o perfil; chamadas repetidas não têm efeito."""
+        if self._token is None:
+            return self
+        _ATUAL.reset(self._token)
+        self._token = None
+        if self.memoria:
+            _desligar_tracemalloc()
+        self.total_segundos = time.perf_counter() - self._inicio
+        return self
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.finalizar()
+        return False
+
+    def marcar_primeira_pintura(self):
+        """Registra quando o primeiro conteúdo útil foi enviado; só a primeira marca vale."""
+        if self.primeira_pintura_s is None:
+            self.primeira_pintura_s = time.perf_counter() - self._inicio
+
+    def ligar_memoria(self):
+        """Passa a medir memória nas etapas que começarem daqui em diante."""
+        if not self.memoria:
+            _ligar_tracemalloc()
+            self.memoria = True
+
+    @contextlib.contextmanager
+    def etapa(self, nome, linhas=None, cacheavel=False):
+        """Mede o bloco como etapa ``nome``; devolve o registro, que o bloco pode completar.
+
+        ``linhas`` é uma função chamada na entrada e na saída para contar as
+        linhas; com ``cacheavel`` a etapa começa como acerto de cache e vira
+        falha se ``marcar_falha_cache()`` for chamado dentro dela.
+        """
+        registro = {
+            'etapa': nome,
+            'nivel': len(self._pilha),
+            'inicio_s': time.perf_counter() - self._inicio,
+            'segundos': None,
+            'linhas_entrada': linhas() if linhas else None,
+            'linhas_saida': None,
+            'memoria_bytes': None,
+            'cache': 'acerto' if cacheavel else None,
+        }
+        self.etapas.append(registro)
+
+        quadro = {'registro': registro, 'base': None, 'pico': 0}
+        if self.memoria:
+            atual, pico = tracemalloc.get_traced_memory()
+            # O pico até aqui pertence à etapa de fora, antes de zerá-lo para esta
+            if self._pilha:
+                self._pilha[-1]['pico'] = max(self._pilha[-1]['pico'], pico)
+            tracemalloc.reset_peak()
+            quadro['base'] = atual
+        self._pilha.append(quadro)
+
+        inicio = time.perf_counter()
+        try:
+            yield registro
+            if linhas and registro['linhas_saida'] is None:
+                registro['linhas_saida'] = linhas()
+        finally:
+            registro['segundos'] = time.perf_counter() - inicio
+            self._pilha.pop()
+            if quadro['base'] is not None:
+                pico = max(tracemalloc.get_traced_memory()[1], quadro['pico'])
+                registro['memoria_bytes'] = max(0, pico - quadro['base'])
+                if self._pilha:
+                    self._pilha[-1]['pico'] = max(self._pilha[-1]['pico'], pico)
+
+    def marcar_falha_cache(self):
+        for quadro in reversed(self._pilha):
+            if quadro['registro']['cache'] is not None:
+                quadro['registro']['cache'] = 'falha'
+                return
+
+    def como_dict(self):
+        """Registro serializável em JSON da execução."""
+        return {
+            'descricao': self.descricao,
+            'iniciado_em': self.iniciado_em,
+            'total_segundos': self.total_segundos,
+            'primeira_pintura_s': self.primeira_pintura_s,
+            'memoria': self.memoria,
+            'etapas': self.etapas,
+        }
+
+
+def perfil_atual():
+    return _ATUAL.get()
+
+
+def etapa(nome, linhas=None, cacheavel=False):
+    """``PerfilExecucao.etapa`` do perfil ativo ou, sem perfil, um bloco sem medição."""
+    perfil = _ATUAL.get()
+    if perfil is None:
+        return contextlib.nullcontext({})
+    return perfil.etapa(nome, linhas=linhas, cacheavel=cacheavel)
+
+
+def marcar_falha_cache():
+    """Chamado no corpo de uma função em cache: a etapa cacheável em curso foi recalculada."""
+    perfil = _ATUAL.get()
+    if perfil is not None:
+        perfil.marcar_falha_cache()
@@ -0,0 +1,283 @@
+"""Pré-processamento da planilha de afastamentos.
+
+Tudo o que não depende dos filtros da sidebar fica aqui, numa única etapa
+pura: recebe a aba bruta e devolve o dataset preparado. O dashboard guarda o
+resultado em cache pela chave do snapshot da planilha e o trata como
+somente leitura. Isso é convenção, não é imposto: com o copy-on-write do
+pandas, DataFrames derivados do resultado nunca escrevem nele, mas atribuir
+colunas no próprio objeto em cache alteraria o dataset de todas as sessões.
+"""
+
+import re
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from .paises import normalizar_paises, resolver_valores
+from .perfil import etapa
+
+DATE_COLUMNS = ['Data entrada na DAI', 'Início do Afastamento', 'Final do Afastamento']
+
+MESES_ORDEM = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+
+# Formatos testados, em ordem, sobre os textos distintos de cada coluna
+FORMATOS_DATA = ['%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d/%m/%y', '%Y-%m-%d',
+                 '%Y-%m-%d %H:%M:%S', '%d-%m-%Y', '%d.%m.%Y']
+
+# Datas seriais do Excel (sistema 1900): dia 1 é 1900-01-01
+EXCEL_ORIGEM = '1899-12-30'
+# Só seriais entre 1950 e 2100 viram data; fora disso o número é erro de
+# digitação (um "2025" solto seria 1905-07-17) e a célula fica inválida
+EXCEL_SERIAL_MIN = (pd.Timestamp('1950-01-01') - pd.Timestamp(EXCEL_ORIGEM)).days
+EXCEL_SERIAL_MAX = (pd.Timestamp('2100-12-31') - pd.Timestamp(EXCEL_ORIGEM)).days
+
+# Texto vira categórica quando há no máximo esta fração de valores distintos
+LIMITE_CARDINALIDADE = 0.5
+
+_SERIAL_TEXTO = re.compile(r'^\d+(\.\d+)?$')
+
+
+def _classificar_celula(valor):
+    """Caminho de conversão para um valor distinto: nativo, serial ou texto."""
+    if isinstance(valor, (datetime, date, np.datetime64)):
+        return 'nativo'
+    if isinstance(valor, (int, float, np.integer, np.floating)) and not isinstance(valor, bool):
+        return 'serial_excel'
+    if isinstance(valor, str) and _SERIAL_TEXTO.match(valor.strip()):
+        return 'serial_excel'
+    return 'texto'
+
+
+def converter_datas(date_series):
+    """Converte uma coluna de datas, parseando cada valor distinto uma única vez.
+
+    Cada valor é classificado antes da conversão: data nativa, número serial
+    do Excel (numérico ou só dígitos, aceito entre ``EXCEL_SERIAL_MIN`` e
+    ``EXCEL_SERIAL_MAX``) ou texto. Textos são testados contra ``FORMATOS_DATA`` com
+    formato explícito; só o que sobra passa pela inferência ``dayfirst``.
+    Retorna ``(serie_convertida, contagem)``, com a contagem de células por
+    caminho.
+    """
+    if pd.api.types.is_datetime64_any_dtype(date_series):
+        n_validas = int(date_series.notna().sum())
+        return date_series, {'nativo': n_validas, 'vazio': len(date_series) - n_validas}
+
+    codigos, distintos = pd.factorize(date_series, use_na_sentinel=True)
+    distintos = np.asarray(distintos, dtype=object)
+    convertidos = pd.Series(pd.NaT, index=range(len(distintos)), dtype='datetime64[ns]')
+    caminhos = np.full(len(distintos), 'invalido', dtype=object)
+
+    tipos = np.array([_classificar_celula(v) for v in distintos], dtype=object)
+
+    mask = tipos == 'nativo'
+    if mask.any():
+        convertidos[mask] = pd.to_datetime(list(distintos[mask]), errors='coerce')
+        caminhos[mask] = 'nativo'
+
+    mask = tipos == 'serial_excel'
+    if mask.any():
+        seriais = pd.to_numeric(pd.Series(distintos[mask]), errors='coerce')
+        seriais = seriais.where((seriais >= EXCEL_SERIAL_MIN) & (seriais <= EXCEL_SERIAL_MAX))
+        convertidos[mask] = pd.to_datetime(seriais, unit='D', origin=EXCEL_ORIGEM).to_numpy()
+        caminhos[mask] = np.where(seriais.notna(), 'serial_excel', 'invalido')
+
+    pendentes = np.flatnonzero(tipos == 'texto')
+    textos = pd.Series(distintos[pendentes], dtype=object).astype(str).str.strip()
+    for formato in FORMATOS_DATA:
+        if len(pendentes) == 0:
+            break
+        parseados = pd.to_datetime(textos, format=formato, errors='coerce')
+        ok = parseados.notna().to_numpy()
+        convertidos[pendentes[ok]] = parseados[ok].to_numpy()
+        caminhos[pendentes[ok]] = f'formato {formato}'
+        pendentes, textos = pendentes[~ok], textos[~ok]
+
+    # Último recurso: inferência elemento a elemento, com dia primeiro
+    if len(pendentes):
+        parseados = pd.to_datetime(textos, format='mixed', dayfirst=True, errors='coerce')
+        ok = parseados.notna().to_numpy()
+        convertidos[pendentes[ok]] = parseados[ok].to_numpy()
+        caminhos[pendentes[ok]] = 'inferido'
+
+    # Espalha o resultado dos distintos para as linhas; o NaT extra cobre os nulos
+    valores = np.append(convertidos.to_numpy(), np.datetime64('NaT', 'ns'))[codigos]
+    result = pd.Series(valores, index=date_series.index, name=date_series.name)
+
+    ocorrencias = np.bincount(codigos[codigos >= 0], minlength=len(distintos))
+    contagem = pd.Series(ocorrencias).groupby(caminhos).sum().astype(int).to_dict()
+    n_vazias = int((codigos == -1).sum())
+    if n_vazias:
+        contagem['vazio'] = n_vazias
+    return result, contagem
+
+
+def safe_date_conversion(date_series):
+    """Conversão segura de datas com múltiplos formatos"""
+    return converter_datas(date_series)[0]
+
+
+def normalizar_cancelada(serie):
+    """``Cancelada?`` sem espaços nas pontas e só com a inicial maiúscula: "não " e "NÃO" viram "Não"."""
+    if not pd.api.types.is_string_dtype(serie):
+        serie = serie.astype('string')
+    return serie.str.strip().str.capitalize()
+
+
+def _categorias_fixas():
+    return {
+        'Mês_Início': pd.CategoricalDtype(MESES_ORDEM, ordered=True),
+        'Trimestre': pd.CategoricalDtype(['T1', 'T2', 'T3', 'T4'], ordered=True),
+    }
+
+
+def compactar_tipos(df):
+    """Reduz a memória do dataset preparado.
+
+    Textos de baixa cardinalidade viram categóricas, inteiros são reduzidos
+    ao menor tipo que comporta os valores e floats passam a float32 só quando
+    a conversão é exata. Retorna ``(df, memoria)``, com bytes e tipos de cada
+    coluna antes e depois.
+    """
+    antes = df.memory_usage(deep=True, index=False)
+    tipos_antes = df.dtypes.astype(str)
+
+    fixas = _categorias_fixas()
+    for col in df.columns:
+        serie = df[col]
+        if col in fixas:
+            df[col] = serie.astype(fixas[col])
+        elif isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(serie):
+            continue
+        elif pd.api.types.is_string_dtype(serie) or serie.dtype == object:
+            if serie.nunique() <= LIMITE_CARDINALIDADE * len(serie):
+                df[col] = serie.astype('category')
+        elif pd.api.types.is_integer_dtype(serie):
+            df[col] = pd.to_numeric(serie, downcast='integer')
+        elif pd.api.types.is_float_dtype(serie):
+            reduzida = serie.astype('float32')
+            # Só quando não perde precisão (ex.: dias inteiros, não valores em reais)
+            if ((reduzida.astype('float64') == serie) | serie.isna()).all():
+                df[col] = reduzida
+
+    depois = df.memory_usage(deep=True, index=False)
+    memoria = {
+        col: {
+            'tipo_antes': tipos_antes[col],
+            'tipo_depois': str(df[col].dtype),
+            'bytes_antes': int(antes[col]),
+            'bytes_depois': int(depois[col]),
+        }
+        for col in df.columns
+    }
+    return df, memoria
+
+
+def preparar_dados(df, medir=etapa):
+    """Executa todo o pré-processamento independente de filtros.
+
+    Retorna ``(df_preparado, relatorio)``; o relatório resume quantas linhas
+    cada regra descartou ou corrigiu, para o modo debug. ``medir(etapa,
+    linhas)`` devolve um context manager em volta de cada etapa; o padrão
+    registra no perfil de execução ativo, se houver (ver ``afastamentos.perfil``).
+    """
+    relatorio = {'linhas_lidas': len(df)}
+    paises_fonte = df['País']
+
+    def linhas():
+        return len(df)
+    # Filtrar viagens não canceladas
+    with medir('filtro_canceladas', linhas):
+        cancelada = normalizar_cancelada(df['Cancelada?'])
+        nao_canceladas = cancelada.eq('Não').fillna(False).to_numpy()
+        df = df[nao_canceladas].copy()
+        df['Cancelada?'] = cancelada[nao_canceladas].array
+    relatorio['linhas_nao_canceladas'] = len(df)
+
+    # Conversão robusta de datas
+    relatorio['datas'] = {}
+    with medir('conversao_datas', linhas):
+        for col in DATE_COLUMNS:
+            df[col], relatorio['datas'][col] = converter_datas(df[col])
+
+    with medir('derivacoes', linhas):
+        # Remover linhas com datas de início ou fim inválidas
+        df = df.dropna(subset=['Início do Afastamento', 'Final do Afastamento'])
+        relatorio['linhas_com_datas_validas'] = len(df)
+
+        # Calcular duração (garantindo valores positivos)
+        df['Duração (dias)'] = (df['Final do Afastamento'] - df['Início do Afastamento']).dt.days
+
+        # Verificar e corrigir durações negativas
+        mask_neg = df['Duração (dias)'] < 0
+        relatorio['duracoes_negativas_corrigidas'] = int(mask_neg.sum())
+        if mask_neg.any():
+            df.loc[mask_neg, ['Início do Afastamento', 'Final do Afastamento']] = \
+                df.loc[mask_neg, ['Final do Afastamento', 'Início do Afastamento']].values
+            df['Duração (dias)'] = (df['Final do Afastamento'] - df['Início do Afastamento']).dt.days
+
+        # Calcular antecedência
+        df['Antecedência (dias)'] = (df['Início do Afastamento'] - df['Data entrada na DAI']).dt.days
+        df = df[df['Antecedência (dias)'] >= 0].copy()
+        relatorio['linhas_com_antecedencia_valida'] = len(df)
+
+        # ✅ CONVERSÃO SEGURA DE CUSTO
+        if 'Custo' in df.columns:
+            df['Custo'] = pd.to_numeric(df['Custo'], errors='coerce')
+
+        # Indicadores de planejamento
+        df['Bem_Planejado'] = df['Antecedência (dias)'] >= 30
+
+        # Classificação de duração
+        df['Tipo_Duracao'] = pd.cut(df['Duração (dias)'],
+                                    bins=[0, 5, 10, 30, 365],
+                                    labels=['Muito Curta (≤5d)', 'Curta (6-10d)', 'Média (11-30d)', 'Longa (>30d)'])
+
+        # Classificação de antecedência
+        df['Categoria_Antecedencia'] = pd.cut(df['Antecedência (dias)'],
+                                              bins=[0, 15, 30, 365],
+                                              labels=['Urgência (0-15d)', 'Aviso Prévio (15-30d)', 'Bem Planejada (30+d)'])
+
+    # Processamento de países
+    with medir('mapeamento_paises', linhas):
+        resolver_valores(paises_fonte)
+        df['País'] = df['País'].astype(str).str.strip()
+        df[['País_Inglês', 'ISO_Code']] = normalizar_paises(df['País'])
+
+    # Tratamento de outros campos - apenas colunas que existem
+    with medir('campos_texto', linhas):
+        df['Diretoria'] = df['Diretoria'].fillna('Não Informado')
+        df['Tipo de Viagem'] = df['Tipo de Viagem'].fillna('Não Informado')
+        df['Gênero'] = df['Gênero'].fillna('Não Informado')
+        df['Mês_Início'] = df['Início do Afastamento'].dt.month_name()
+        df['Trimestre'] = 'T' + df['Início do Afastamento'].dt.quarter.astype(str)
+        df['Bem_Planejado'] = df['Bem_Planejado'].astype(bool)
+
+    with medir('compactacao', linhas):
+        df, relatorio['memoria'] = compactar_tipos(df)
+
+    relatorio['linhas_preparadas'] = len(df)
+    return df, relatorio
+
+
+def reaplicar_paises(df, relatorio):
+    """Refaz ``País_Inglês`` e ``ISO_Code`` de um dataset já preparado com a tabela de países atual.
+
+    Só essas colunas dependem da tabela: com os valores da fonte inteira já
+    resolvidos (``resolver_valores``), o resultado é o mesmo de preparar a aba
+    de novo. Retorna ``(df, relatorio, mudou)``, com a máscara das linhas cujo
+    país mudou; ``df`` e ``relatorio`` de entrada não são alterados.
+    """
+    novos = normalizar_paises(df['País'])
+    mudou = np.zeros(len(df), dtype=bool)
+    memoria = dict(relatorio['memoria'])
+    for col in novos.columns:
+        antes, depois = df[col].astype(object), novos[col].astype(object)
+        mudou |= ~((antes == depois) | (antes.isna() & depois.isna())).to_numpy()
+        # A coluna já nasce categórica: antes e depois da compactação são iguais
+        bytes_coluna = int(novos[col].memory_usage(deep=True, index=False))
+        memoria[col] = {'tipo_antes': str(novos[col].dtype), 'tipo_depois': str(novos[col].dtype),
+                        'bytes_antes': bytes_coluna, 'bytes_depois': bytes_coluna}
+    return df.assign(**novos), {**relatorio, 'memoria': memoria}, mudou
@@ -0,0 +1,161 @@
+"""Snapshot colunar (Arrow) das planilhas de afastamentos.
+
+A leitura do .xlsx via openpyxl é a etapa mais lenta da inicialização. Este
+módulo converte a aba para um arquivo Arrow IPC tipado, identificado pelo
+caminho, tamanho, mtime e hash do conteúdo da planilha. O snapshot só é
+reconstruído quando a planilha muda e, nas cargas seguintes, é lido por
+memory-map.
+"""
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+import pyarrow as pa
+
+CACHE_DIR = os.environ.get("AFASTAMENTOS_CACHE_DIR", ".cache")
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "snapshots")
+
+# Incrementar quando a forma de gravar o snapshot mudar
+VERSAO_FORMATO = 1
+
+
+@dataclass(frozen=True)
+class FonteSnapshot:
+    """Identidade de uma aba de planilha no momento da leitura."""
+
+    caminho: str
+    aba: str
+    tamanho: int
+    mtime_ns: int
+    sha256: str
+
+    @property
+    def chave(self):
+        """Chave estável usada para nomear o snapshot e invalidar caches."""
+        return f"{self.sha256[:16]}-{_slug(self.aba)}-v{VERSAO_FORMATO}"
+
+
+def _slug(texto):
+    return re.sub(r"[^0-9A-Za-z]+", "_", texto).strip("_").lower()
+
+
+def _hash_arquivo(caminho, bloco=1 << 20):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for parte in iter(lambda: f.read(bloco), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def _base_snapshot(caminho, aba):
+    # Um par (planilha, aba) tem sempre o mesmo nome-base; o conteúdo vai na chave
+    origem = hashlib.sha1(f"{os.path.abspath(caminho)}::{aba}".encode()).hexdigest()[:12]
+    return os.path.join(SNAPSHOT_DIR, f"{_slug(os.path.basename(caminho))}-{origem}")
+
+
+def _ler_meta(caminho_meta):
+    try:
+        with open(caminho_meta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_json(dados, caminho):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False)
+
+
+def _gravar_atomico(caminho, escrever):
+    tmp = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        escrever(tmp)
+        os.replace(tmp, caminho)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def identificar_fonte(caminho, aba):
+    """Retorna a identidade atual da aba, reaproveitando o hash se size/mtime não mudaram."""
+    st_arquivo = os.stat(caminho)
+    meta = _ler_meta(_base_snapshot(caminho, aba) + ".json")
+
+    if (meta and meta.get("tamanho") == st_arquivo.st_size
+            and meta.get("mtime_ns") == st_arquivo.st_mtime_ns):
+        sha = meta["sha256"]
+    else:
+        sha = _hash_arquivo(caminho)
+
+    return FonteSnapshot(
+        caminho=os.path.abspath(caminho),
+        aba=aba,
+        tamanho=st_arquivo.st_size,
+        mtime_ns=st_arquivo.st_mtime_ns,
+        sha256=sha,
+    )
+
+
+def _tipar_colunas(df):
+    """Colunas object com tipos mistos viram texto para caberem num schema Arrow."""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        valores = df[col].dropna()
+        if valores.map(type).nunique() > 1:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def _gravar_snapshot(df, caminho_arrow):
+    tabela = pa.Table.from_pandas(_tipar_colunas(df), preserve_index=False)
+
+    def escrever(tmp):
+        # Sem compressão: o arquivo precisa ser mapeável diretamente em memória
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, tabela.schema) as writer:
+            writer.write_table(tabela)
+
+    _gravar_atomico(caminho_arrow, escrever)
+
+
+def ler_arrow(caminho_arrow):
+    """Lê um arquivo Arrow IPC por memory-map."""
+    with pa.memory_map(caminho_arrow, "r") as fonte:
+        return pa.ipc.open_file(fonte).read_all().to_pandas()
+
+
+def carregar_snapshot(caminho, aba):
+    """Carrega a aba a partir do snapshot, reconstruindo-o se a planilha mudou.
+
+    Retorna ``(df, fonte)``, onde ``fonte.chave`` identifica o conteúdo lido.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    fonte = identificar_fonte(caminho, aba)
+    base = _base_snapshot(caminho, aba)
+    caminho_arrow = f"{base}-{fonte.chave}.arrow"
+    caminho_meta = base + ".json"
+
+    if os.path.exists(caminho_arrow):
+        df = ler_arrow(caminho_arrow)
+    else:
+        df = pd.read_excel(caminho, sheet_name=aba)
+        _gravar_snapshot(df, caminho_arrow)
+
+        # Remove snapshots anteriores da mesma aba
+        meta_antiga = _ler_meta(caminho_meta)
+        if meta_antiga and meta_antiga.get("arquivo") != caminho_arrow:
+            try:
+                os.remove(meta_antiga["arquivo"])
+            except (OSError, KeyError):
+                pass
+
+    meta = dict(asdict(fonte), arquivo=caminho_arrow)
+    if _ler_meta(caminho_meta) != meta:
+        _gravar_atomico(caminho_meta, lambda tmp: _gravar_json(meta, tmp))
+
+    return df, fonte
@@ -0,0 +1 @@
+"""Dados sintéticos e benchmarks do pipeline de afastamentos (não são testes)."""
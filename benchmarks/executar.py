@@ -0,0 +1,259 @@
+"""Benchmark por etapa do pipeline de afastamentos.
+
+Para cada arquivo gerado por ``benchmarks.gerar_dados`` mede, separadamente,
+a carga, cada etapa de ``preparar_dados`` (conversão de datas, derivações,
+mapeamento de países...), a filtragem, a varredura de concorrência, a
+detecção de conflitos, o cubo, cada agregação de
+``afastamentos.metricas.CONJUNTOS`` e a montagem de cada figura de
+``afastamentos.graficos.FIGURAS``. Cada etapa roda ``--repeticoes`` vezes
+para o tempo e mais uma vez sob ``tracemalloc`` para o pico de memória
+(alocações do Python e do numpy; buffers do Arrow não entram).
+
+O resultado vai para um JSON em ``benchmarks/resultados/``; ``--comparar``
+mostra a razão entre os tempos de duas execuções, etapa por etapa::
+
+    python -m benchmarks.executar benchmarks/dados/afastamentos_100000.parquet \
+        --comparar benchmarks/resultados/anterior.json
+"""
+
+import argparse
+import contextlib
+import functools
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+# Snapshots e aliases de países gerados pelos benchmarks não devem ir para o
+# cache nem para a tabela de países do dashboard
+_CACHE_TEMPORARIO = "AFASTAMENTOS_CACHE_DIR" not in os.environ
+if _CACHE_TEMPORARIO:
+    os.environ["AFASTAMENTOS_CACHE_DIR"] = tempfile.mkdtemp(prefix="afastamentos-bench-")
+_ALIASES_TEMPORARIOS = "AFASTAMENTOS_ALIASES_PAISES" not in os.environ
+if _ALIASES_TEMPORARIOS:
+    os.environ["AFASTAMENTOS_ALIASES_PAISES"] = os.path.join(
+        tempfile.mkdtemp(prefix="afastamentos-bench-"), "aliases_paises.json")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly  # noqa: E402
+
+from afastamentos import snapshot  # noqa: E402
+from afastamentos.concorrencia import serie_diaria  # noqa: E402
+from afastamentos.conflitos import conflitos_por_diretoria, detectar_conflitos  # noqa: E402
+from afastamentos.cubo import agregar, construir_cubo, fatiar, totais  # noqa: E402
+from afastamentos.filtros import COLUNA_TEMPO, IndiceFiltros  # noqa: E402
+from afastamentos.graficos import FIGURAS  # noqa: E402
+from afastamentos.metricas import CONJUNTOS, ResultadosCubo, calcular_metricas  # noqa: E402
+from afastamentos.preprocessamento import preparar_dados  # noqa: E402
+
+from .gerar_dados import ABA, DADOS_DIR  # noqa: E402
+
+RESULTADOS_DIR = os.path.join(os.path.dirname(__file__), "resultados")
+
+
+class Bancada:
+    """Executa etapas medindo tempo (várias repetições) e pico de memória (uma execução)."""
+
+    def __init__(self, repeticoes=3):
+        self.repeticoes = repeticoes
+        self.etapas = []
+
+    def medir_etapas(self, funcao):
+        """Mede as etapas que ``funcao(medir)`` delimita com ``with medir(etapa)``."""
+        tempos = defaultdict(list)
+        picos = {}
+
+        @contextlib.contextmanager
+        def cronometro(etapa, linhas=None):
+            inicio = time.perf_counter()
+            yield
+            tempos[etapa].append(time.perf_counter() - inicio)
+
+        @contextlib.contextmanager
+        def memoria(etapa, linhas=None):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            yield
+            picos[etapa] = tracemalloc.get_traced_memory()[1] - base
+
+        for _ in range(self.repeticoes):
+            resultado = funcao(cronometro)
+        tracemalloc.start()
+        try:
+            funcao(memoria)
+        finally:
+            tracemalloc.stop()
+
+        for etapa, amostras in tempos.items():
+            self.etapas.append({
+                'etapa': etapa,
+                'segundos_min': min(amostras),
+                'segundos_mediana': statistics.median(amostras),
+                'pico_memoria_bytes': int(picos.get(etapa, 0)),
+            })
+        return resultado
+
+    def medir(self, etapa, funcao):
+        def executar(medir):
+            with medir(etapa):
+                return funcao()
+        return self.medir_etapas(executar)
+
+
+def _carga_fria(caminho):
+    # Sem snapshot: lê a planilha via openpyxl e grava o Arrow, como na primeira carga
+    shutil.rmtree(snapshot.SNAPSHOT_DIR, ignore_errors=True)
+    return snapshot.carregar_snapshot(caminho, ABA)[0]
+
+
+def _carregar(bancada, caminho):
+    if caminho.endswith('.parquet'):
+        return bancada.medir('carga_parquet', lambda: pd.read_parquet(caminho))
+    bancada.medir('carga_planilha', lambda: _carga_fria(caminho))
+    return bancada.medir('carga_snapshot', lambda: snapshot.carregar_snapshot(caminho, ABA)[0])
+
+
+def executar_arquivo(caminho, repeticoes=3):
+    """Mede todas as etapas para um arquivo; devolve o registro do JSON de resultados."""
+    bancada = Bancada(repeticoes)
+    bruto = _carregar(bancada, caminho)
+    df, _ = bancada.medir_etapas(lambda medir: preparar_dados(bruto, medir=medir))
+
+    # Filtro típico da sidebar: diretoria e tipo de viagem mais frequentes
+    filtros = {
+        'Tipo de Viagem': df['Tipo de Viagem'].value_counts().index[0],
+        'Diretoria': df['Diretoria'].value_counts().index[0],
+    }
+    indice = bancada.medir('indice_filtros', lambda: IndiceFiltros(df))
+    bancada.medir('filtragem_indice', lambda: indice.selecionar(filtros))
+    # Período de um mês a partir da primeira data, combinado com os filtros acima
+    inicio = indice.periodo_total()[0]
+    periodo = {**filtros, COLUNA_TEMPO: (inicio, inicio + pd.DateOffset(months=1))}
+    bancada.medir('filtragem_periodo', lambda: indice.selecionar(periodo))
+    bancada.medir('filtragem_mascara', lambda: df[np.logical_and.reduce(
+        [(df[dim] == valor).to_numpy() for dim, valor in filtros.items()])])
+
+    # Varredura sobre todas as linhas: total e por Diretoria
+    bancada.medir('concorrencia', lambda: serie_diaria(df))
+    bancada.medir('concorrencia_diretoria', lambda: serie_diaria(df, 'Diretoria'))
+    pares = bancada.medir('conflitos', lambda: detectar_conflitos(df))
+    bancada.medir('conflitos_diretoria', lambda: conflitos_por_diretoria(pares, df))
+
+    cubo = bancada.medir('cubo', lambda: construir_cubo(df))
+    bancada.medir('fatiar_cubo', lambda: fatiar(cubo, filtros))
+
+    # Estado inicial do painel (sem filtros), como no primeiro carregamento
+    resultados = ResultadosCubo(cubo)
+    for nome, calcular in CONJUNTOS.items():
+        bancada.medir(f'agregacao:{nome}', lambda: calcular(functools.partial(agregar, cubo)))
+        resultados.conjunto(nome)
+    bancada.medir('metricas', lambda: calcular_metricas(totais(cubo), resultados.conjunto))
+    # Conjuntos já memorizados: o tempo das figuras é só a montagem do Plotly
+    for chart_id, construir in FIGURAS.items():
+        bancada.medir(f'figura:{chart_id}', lambda: construir(resultados))
+
+    return {
+        'arquivo': os.path.basename(caminho),
+        'formato': os.path.splitext(caminho)[1].lstrip('.'),
+        'linhas_brutas': len(bruto),
+        'linhas_preparadas': len(df),
+        'etapas': bancada.etapas,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _indexar(resultado):
+    return {
+        (arquivo['formato'], arquivo['linhas_brutas'], etapa['etapa']): etapa
+        for arquivo in resultado['arquivos']
+        for etapa in arquivo['etapas']
+    }
+
+
+def comparar(anterior, atual):
+    """Linhas ``(formato, linhas, etapa, s_antes, s_depois, razao)`` das etapas presentes nos dois."""
+    antes, depois = _indexar(anterior), _indexar(atual)
+    linhas = []
+    for chave in sorted(antes.keys() & depois.keys()):
+        s_antes, s_depois = antes[chave]['segundos_min'], depois[chave]['segundos_min']
+        linhas.append((*chave, s_antes, s_depois, s_depois / s_antes if s_antes else float('nan')))
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark por etapa do pipeline de afastamentos.")
+    parser.add_argument("arquivos", nargs="*", help="xlsx/parquet gerados (padrão: todos em benchmarks/dados)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", help="JSON de resultados (padrão: benchmarks/resultados/<data>-<commit>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    arquivos = args.arquivos or sorted(glob.glob(os.path.join(DADOS_DIR, "afastamentos_*.*")))
+    if not arquivos:
+        raise SystemExit("nenhum arquivo; gere com: python -m benchmarks.gerar_dados")
+
+    commit = _commit()
+    resultado = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'repeticoes': args.repeticoes,
+        'ambiente': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plotly': plotly.__version__,
+            'plataforma': platform.platform(),
+        },
+        'arquivos': [],
+    }
+    try:
+        for caminho in arquivos:
+            print(f"{caminho}...", file=sys.stderr)
+            resultado['arquivos'].append(executar_arquivo(caminho, args.repeticoes))
+    finally:
+        if _CACHE_TEMPORARIO:
+            shutil.rmtree(os.environ["AFASTAMENTOS_CACHE_DIR"], ignore_errors=True)
+        if _ALIASES_TEMPORARIOS:
+            shutil.rmtree(os.path.dirname(os.environ["AFASTAMENTOS_ALIASES_PAISES"]), ignore_errors=True)
+
+    saida = args.saida or os.path.join(
+        RESULTADOS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'sem-commit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    for arquivo in resultado['arquivos']:
+        print(f"\n{arquivo['arquivo']} ({arquivo['linhas_brutas']} linhas)")
+        for etapa in arquivo['etapas']:
+            print(f"  {etapa['etapa']:<32} {etapa['segundos_min'] * 1000:10.2f} ms"
+                  f" {etapa['pico_memoria_bytes'] / 2**20:10.2f} MiB")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        print(f"\nComparação com {args.comparar} (razão > 1 = mais lento agora)")
+        for formato, linhas, etapa, s_antes, s_depois, razao in comparar(anterior, resultado):
+            print(f"  {formato:<8} {linhas:>9} {etapa:<32} {s_antes * 1000:10.2f} {s_depois * 1000:10.2f} ms"
+                  f"  x{razao:.2f}")
+    print(f"\n{saida}")
+
+
+if __name__ == "__main__":
+    main()
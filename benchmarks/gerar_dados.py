@@ -0,0 +1,181 @@
+"""Gerador de planilhas e arquivos Parquet sintéticos de afastamentos.
+
+Segue o schema da aba "Afastamentos 2025": Cancelada? com variações de
+caixa, três colunas de data em formatos misturados (data nativa, texto
+dd/mm/aaaa, texto ISO, serial do Excel e alguns valores inválidos), País em
+texto livre (acentos, grafias alternativas, espaços sobrando), Diretoria,
+Tipo de Viagem, Gênero, Servidor e Custo.
+
+Uso pela linha de comando::
+
+    python -m benchmarks.gerar_dados --linhas 10000 100000 1000000
+"""
+
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from afastamentos.preprocessamento import DATE_COLUMNS, EXCEL_ORIGEM
+
+DADOS_DIR = os.path.join(os.path.dirname(__file__), "dados")
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000]
+ABA = "Afastamentos 2025"
+
+COLUNAS = ['Diretoria', 'Cancelada?', 'N° Processo SEI', 'Data entrada na DAI', 'Servidor', 'Gênero',
+           'Início do Afastamento', 'Final do Afastamento', 'País', 'Tipo de Viagem', 'Custo']
+
+# (valor, peso) aproximando a distribuição da planilha real
+DIRETORIAS = [('DIPRO', 74), ('DIQUA', 43), ('DILIC', 39), ('DBFLO', 25), ('CENIMA', 3), ('Dipro', 3),
+              ('SUPES/RO\nDIPRO', 2), ('SUPES/AC', 2), ('DIPRO\nSUPES/AC', 2), ('DILIC (RJ)', 1),
+              ('DIPAM/RS', 1), ('DITEC/CE', 1), ('UT-União da Vitória/PR', 1), (None, 3)]
+TIPOS = [('Serviço', 147), ('Capacitação', 53)]
+GENEROS = [('M', 116), ('F', 84)]
+CANCELADA = [('Não', 185), ('Sim', 13), ('SIM', 2), ('não ', 1)]
+PAISES = [('Equador', 28), ('EUA', 21), ('China', 17), ('Peru', 15), ('Suíça', 13), ('Colômbia', 10),
+          ('Itália', 8), ('Panamá', 8), ('França', 6), ('México', 6), ('Uzbequistão', 6), ('Bolivia', 4),
+          ('Bolívia', 4), ('Reino Unido', 4), ('Dinamarca', 4), ('Bélgica', 3), ('Japão', 3),
+          ('Trinidad e Tobago', 3), ('Costa Rica', 3), ('Áustria', 3), ('Chile', 3), ('África do Sul', 3),
+          ('Argentina', 2), ('Holanda', 2), ('Uruguai', 2), ('Colorado EUA', 2), ('Suriname', 2),
+          ('Estados Unidos', 1), ('Espanha', 1), ('Grécia', 1), ('Alemanha', 1), ('Noruega', 1),
+          ('República Tcheca', 1), ('Coreia do Sul', 1), ('Tailândia', 1), ('Colombia', 1),
+          ('Indonésia', 1), ('Canadá', 1), ('Guiana Francesa', 1), ('Quênia', 1), ('Portugal', 1),
+          ('Antártica', 1), ('suiça ', 1), ('  EUA', 1), ('MEXICO', 1)]
+CUSTOS = [('Com ônus', 161), ('Com ônus limitado', 30), ('Sem ônus', 8)]
+# Na planilha real cada servidor aparece em no máximo duas viagens
+VIAGENS_POR_SERVIDOR_MAX = 2
+
+PRIMEIROS_NOMES = ['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Fernando', 'Gabriela', 'Henrique',
+                   'Isabela', 'João', 'Juliana', 'Lucas', 'Márcio', 'Natália', 'Otávio', 'Patrícia',
+                   'Rafael', 'Sofia', 'Thiago', 'Vanessa']
+SOBRENOMES = ['Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Lima', 'Carvalho', 'Ferreira',
+              'Rodrigues', 'Almeida', 'Costa', 'Gomes', 'Martins', 'Araújo', 'Barbosa', 'Ribeiro']
+
+# Formatos das células de data: proporção de cada um
+FORMATOS_CELULA = [('nativo', 70), ('texto_br', 15), ('serial', 8), ('texto_iso', 5), ('invalido', 1),
+                   ('vazio', 1)]
+
+
+def _sortear(rng, pares, n):
+    valores = [v for v, _ in pares]
+    pesos = np.array([p for _, p in pares], dtype=float)
+    return np.array(valores, dtype=object)[rng.choice(len(valores), size=n, p=pesos / pesos.sum())]
+
+
+def _servidores(rng, n_servidores):
+    nomes = (
+        np.array(PRIMEIROS_NOMES, dtype=object)[rng.integers(len(PRIMEIROS_NOMES), size=n_servidores)]
+        + " "
+        + np.array(SOBRENOMES, dtype=object)[rng.integers(len(SOBRENOMES), size=n_servidores)]
+        + " "
+        + np.array(SOBRENOMES, dtype=object)[rng.integers(len(SOBRENOMES), size=n_servidores)]
+    )
+    # Sufixo numérico garante nomes distintos mesmo com poucos nomes-base
+    return nomes + np.char.add(" ", np.arange(n_servidores).astype(str)).astype(object)
+
+
+def _formatar_datas(rng, datas):
+    """Converte datas em células de planilha, misturando os formatos de ``FORMATOS_CELULA``."""
+    formatos = _sortear(rng, FORMATOS_CELULA, len(datas))
+    celulas = np.empty(len(datas), dtype=object)
+    serie = pd.Series(datas)
+
+    mascara = formatos == 'nativo'
+    celulas[mascara] = [d.to_pydatetime() for d in serie[mascara]]
+    mascara = formatos == 'texto_br'
+    celulas[mascara] = serie[mascara].dt.strftime('%d/%m/%Y').to_numpy()
+    mascara = formatos == 'texto_iso'
+    celulas[mascara] = serie[mascara].dt.strftime('%Y-%m-%d').to_numpy()
+    mascara = formatos == 'serial'
+    celulas[mascara] = (serie[mascara] - pd.Timestamp(EXCEL_ORIGEM)).dt.days.to_numpy()
+    mascara = formatos == 'invalido'
+    celulas[mascara] = '31/02/2025'
+    celulas[formatos == 'vazio'] = None
+    return celulas
+
+
+def gerar(linhas, semente=0, ano=2025):
+    """DataFrame bruto com ``linhas`` afastamentos sintéticos, como lido da planilha."""
+    rng = np.random.default_rng(semente)
+
+    inicio = pd.Timestamp(f"{ano}-01-01") + pd.to_timedelta(rng.integers(0, 365, size=linhas), unit='D')
+    # Durações concentradas em poucos dias, com cauda de capacitações longas
+    duracao = np.minimum(rng.geometric(0.12, size=linhas), 300)
+    final = inicio + pd.to_timedelta(duracao, unit='D')
+    # Alguns registros com início e fim trocados, como na planilha real
+    trocados = rng.random(linhas) < 0.005
+    inicio, final = np.where(trocados, final, inicio), np.where(trocados, inicio, final)
+    entrada = pd.DatetimeIndex(inicio) - pd.to_timedelta(rng.gamma(2.0, 20.0, size=linhas).astype(int), unit='D')
+
+    # Viagens por servidor: 1 + Poisson, limitado como na planilha real
+    viagens = 1 + np.minimum(rng.poisson(0.3, size=linhas), VIAGENS_POR_SERVIDOR_MAX - 1)
+    servidores = np.repeat(_servidores(rng, linhas), viagens)[:linhas]
+    rng.shuffle(servidores)
+
+    custo = _sortear(rng, CUSTOS, linhas)
+    # Uma parte com valores em reais, para exercitar o caminho numérico do custo
+    numericos = rng.random(linhas) < 0.05
+    custo[numericos] = np.round(rng.gamma(2.0, 3000.0, size=int(numericos.sum())), 2)
+
+    processo = [f"02001.{n:06d}/{ano - 1}-{n % 97:02d}" for n in rng.integers(0, 999_999, size=linhas)]
+
+    df = pd.DataFrame({
+        'Diretoria': _sortear(rng, DIRETORIAS, linhas),
+        'Cancelada?': _sortear(rng, CANCELADA, linhas),
+        'N° Processo SEI': processo,
+        'Data entrada na DAI': _formatar_datas(rng, pd.DatetimeIndex(entrada)),
+        'Servidor': servidores,
+        'Gênero': _sortear(rng, GENEROS, linhas),
+        'Início do Afastamento': _formatar_datas(rng, pd.DatetimeIndex(inicio)),
+        'Final do Afastamento': _formatar_datas(rng, pd.DatetimeIndex(final)),
+        'País': _sortear(rng, PAISES, linhas),
+        'Tipo de Viagem': _sortear(rng, TIPOS, linhas),
+        'Custo': custo,
+    })
+    return df[COLUNAS]
+
+
+def gravar_xlsx(df, caminho, aba=ABA):
+    """Grava no formato da planilha original, linha a linha (write-only)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    planilha = wb.create_sheet(aba)
+    planilha.append(list(df.columns))
+    for linha in df.itertuples(index=False, name=None):
+        planilha.append([None if isinstance(v, float) and np.isnan(v) else v for v in linha])
+    wb.save(caminho)
+
+
+def gravar_parquet(df, caminho):
+    """Grava as colunas como texto, com as datas ainda nos formatos misturados."""
+    texto = df.astype(object).where(df.notna(), None)
+    for col in DATE_COLUMNS + ['Custo']:
+        texto[col] = [None if v is None else (v.strftime('%Y-%m-%d %H:%M:%S') if isinstance(v, datetime) else str(v))
+                      for v in texto[col]]
+    texto.to_parquet(caminho, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera planilhas e Parquet sintéticos de afastamentos.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=TAMANHOS_PADRAO)
+    parser.add_argument("--destino", default=DADOS_DIR)
+    parser.add_argument("--formatos", nargs="+", choices=["xlsx", "parquet"], default=["xlsx", "parquet"])
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.destino, exist_ok=True)
+    for linhas in args.linhas:
+        inicio = datetime.now()
+        df = gerar(linhas, args.semente)
+        for formato in args.formatos:
+            caminho = os.path.join(args.destino, f"afastamentos_{linhas}.{formato}")
+            (gravar_xlsx if formato == "xlsx" else gravar_parquet)(df, caminho)
+            print(f"{caminho}: {linhas} linhas")
+        print(f"  gerado em {(datetime.now() - inicio) / timedelta(seconds=1):.1f}s")
+
+
+if __name__ == "__main__":
+    main()
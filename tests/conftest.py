@@ -0,0 +1,77 @@
+"""Fixtures compartilhadas dos testes do pipeline de afastamentos."""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+# Antes de importar o pacote: caches e aliases dos testes não tocam os da instalação
+_TMP = tempfile.mkdtemp(prefix="afastamentos-testes-")
+os.environ["AFASTAMENTOS_CACHE_DIR"] = os.path.join(_TMP, "cache")
+os.environ["AFASTAMENTOS_ALIASES_PAISES"] = os.path.join(_TMP, "aliases_paises.json")
+atexit.register(shutil.rmtree, _TMP, ignore_errors=True)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def bruto():
+    """Aba sintética como lida da planilha: datas em formatos misturados, países em texto livre."""
+    from benchmarks.gerar_dados import gerar
+
+    return gerar(400, semente=7)
+
+
+@pytest.fixture
+def planilha(tmp_path, bruto):
+    from benchmarks.gerar_dados import ABA, gravar_xlsx
+
+    caminho = tmp_path / "afastamentos.xlsx"
+    gravar_xlsx(bruto.head(50), caminho)
+    return str(caminho), ABA
+
+
+@pytest.fixture(scope="session")
+def preparado(bruto):
+    """Dataset preparado da aba sintética; não altere nos testes."""
+    from afastamentos.preprocessamento import preparar_dados
+
+    return preparar_dados(bruto)[0]
+
+
+def gravar_abas(caminho, abas):
+    """Grava uma planilha com várias abas (nome -> DataFrame bruto)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for nome, df in abas.items():
+        planilha = wb.create_sheet(nome)
+        planilha.append(list(df.columns))
+        for linha in df.itertuples(index=False, name=None):
+            planilha.append([None if isinstance(v, float) and v != v else v for v in linha])
+    wb.save(caminho)
+
+
+@pytest.fixture(scope="session")
+def planilhas_historico(tmp_path_factory):
+    """Diretório com duas planilhas e três abas anuais (2023 a 2025), mais uma aba a ignorar."""
+    from benchmarks.gerar_dados import gerar
+
+    diretorio = tmp_path_factory.mktemp("planilhas")
+    gravar_abas(diretorio / "afastamentos_2023_2024.xlsx", {
+        'Afastamentos 2023': gerar(120, semente=1, ano=2023),
+        'Afastamentos 2024': gerar(150, semente=2, ano=2024),
+        'Afastamentos 2024 deletar': gerar(10, semente=3, ano=2024),
+    })
+    gravar_abas(diretorio / "afastamentos_2025.xlsx", {'Afastamentos 2025': gerar(180, semente=4, ano=2025)})
+    return str(diretorio)
+
+
+@pytest.fixture(scope="session")
+def historico(planilhas_historico, tmp_path_factory):
+    """Repositório Parquet gravado a partir de ``planilhas_historico``."""
+    from afastamentos.ingestao import descobrir_fontes, gravar_historico
+
+    destino = str(tmp_path_factory.mktemp("historico") / "historico")
+    gravar_historico(descobrir_fontes([planilhas_historico]), destino, tamanho_bloco=64)
+    return destino
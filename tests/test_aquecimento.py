@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+from afastamentos.aquecimento import main
+from afastamentos.figuras import CacheFiguras
+from afastamentos.metricas import SnapshotMetricas
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que o dashboard importa antes de pintar os cards
+MODULOS_DO_PAINEL = ['afastamentos.' + nome for nome in [
+    'cache_compartilhado', 'concorrencia', 'conflitos', 'consultas', 'cubo', 'exportacao', 'figuras', 'filtros',
+    'grade', 'incremental', 'ingestao', 'mapa', 'metricas', 'paises', 'perfil', 'preprocessamento', 'snapshot',
+]]
+
+
+def test_modulos_do_painel_nao_importam_plotly():
+    codigo = (f"import importlib, sys\n"
+              f"for nome in {MODULOS_DO_PAINEL!r}: importlib.import_module(nome)\n"
+              f"print(sorted(m for m in sys.modules if m.split('.')[0] == 'plotly'))")
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    assert saida.stdout.strip() == "[]"
+
+
+def test_aquecimento_grava_metricas_e_figuras_que_semeiam_o_cache(planilha, tmp_path, capsys):
+    from afastamentos.graficos import FIGURAS
+
+    caminho, aba = planilha
+    destino = tmp_path / "metricas"
+    main(["--planilha", caminho, "--aba", aba, "--destino", str(destino), "--processos", "1"])
+    assert "aquecido em" in capsys.readouterr().out
+
+    (diretorio,) = [os.path.join(destino, nome) for nome in os.listdir(destino)]
+    snapshot = SnapshotMetricas(diretorio)
+    assert set(snapshot.figuras) == set(FIGURAS)
+    assert snapshot.resultados(None, None).metricas()['total_viagens'] > 0
+
+    cache = CacheFiguras()
+    for chart_id, spec in snapshot.figuras.items():
+        cache.semear(chart_id, spec)
+    spec = cache.obter('mapa_mundi', lambda: None)
+    assert spec['data'][0]['type'] == 'choropleth'
+    assert cache.estatisticas()['acertos'] == 1
@@ -0,0 +1,67 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from afastamentos.graficos import FIGURAS
+from afastamentos.metricas import CONJUNTOS
+from afastamentos.preprocessamento import preparar_dados
+from benchmarks.executar import comparar, executar_arquivo
+from benchmarks.gerar_dados import COLUNAS, VIAGENS_POR_SERVIDOR_MAX, gerar, gravar_parquet
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_gerador_deterministico_no_schema_da_planilha():
+    df = gerar(200, semente=3)
+    assert list(df.columns) == COLUNAS
+    pd.testing.assert_frame_equal(df, gerar(200, semente=3))
+    assert not df.equals(gerar(200, semente=4))
+
+
+def test_viagens_por_servidor_como_na_planilha_real():
+    viagens = gerar(20_000, semente=2)['Servidor'].value_counts()
+    assert viagens.max() <= VIAGENS_POR_SERVIDOR_MAX
+    # Ainda há servidores repetidos, para as métricas e os conflitos de agenda
+    assert (viagens > 1).sum() > 1000
+
+
+def test_parquet_gerado_prepara_como_o_original(tmp_path):
+    bruto = gerar(300, semente=5)
+    caminho = tmp_path / "afastamentos_300.parquet"
+    gravar_parquet(bruto, caminho)
+
+    esperado = preparar_dados(bruto)[0]
+    lido = preparar_dados(pd.read_parquet(caminho))[0]
+    colunas = ['Servidor', 'País_Inglês', 'Início do Afastamento', 'Final do Afastamento', 'Duração (dias)']
+    pd.testing.assert_frame_equal(lido[colunas], esperado[colunas], check_categorical=False)
+
+
+def test_executar_arquivo_mede_todas_as_etapas(tmp_path):
+    caminho = tmp_path / "afastamentos_200.parquet"
+    gravar_parquet(gerar(200, semente=1), caminho)
+
+    resultado = executar_arquivo(str(caminho), repeticoes=1)
+    etapas = {etapa['etapa'] for etapa in resultado['etapas']}
+    assert {'carga_parquet', 'conflitos', 'cubo', 'filtragem_periodo', 'metricas'} <= etapas
+    assert {f'agregacao:{nome}' for nome in CONJUNTOS} <= etapas
+    assert {f'figura:{chart_id}' for chart_id in FIGURAS} <= etapas
+    assert all(etapa['segundos_min'] >= 0 for etapa in resultado['etapas'])
+
+    execucao = {'arquivos': [resultado]}
+    razoes = [linha[-1] for linha in comparar(execucao, execucao)]
+    assert len(razoes) == len(resultado['etapas'])
+    assert all(razao == 1 for razao in razoes if razao == razao)
+
+
+def test_benchmark_grava_aliases_em_arquivo_temporario():
+    ambiente = {k: v for k, v in os.environ.items() if k != "AFASTAMENTOS_ALIASES_PAISES"}
+    codigo = "import os, benchmarks.executar; print(os.environ['AFASTAMENTOS_ALIASES_PAISES'])"
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, env=ambiente,
+                           capture_output=True, text=True, check=True)
+    diretorio = os.path.dirname(saida.stdout.strip())
+    shutil.rmtree(diretorio, ignore_errors=True)
+    assert os.path.commonpath([diretorio, tempfile.gettempdir()]) == tempfile.gettempdir()
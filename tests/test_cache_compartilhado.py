@@ -0,0 +1,49 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from afastamentos.cache_compartilhado import carregar_ou_construir, codificar, decodificar
+from afastamentos.cubo import construir_cubo
+
+
+def test_ida_e_volta_preserva_dataset_e_cubo(preparado):
+    cubo = construir_cubo(preparado)
+    for df in (preparado, cubo.celulas, cubo.servidores):
+        pd.testing.assert_frame_equal(decodificar(codificar(df)), df)
+
+
+def test_colunas_numericas_lidas_sem_copia_e_somente_leitura(preparado, tmp_path):
+    tabelas, _, construiu = carregar_ou_construir(
+        ['teste', 'zero-copia'], lambda: ({'dataset': preparado}, {}), destino=str(tmp_path))
+    assert construiu
+    duracao = tabelas['dataset']['Duração (dias)'].to_numpy()
+    assert not duracao.flags.writeable
+    assert not duracao.flags.owndata
+    assert not tabelas['dataset']['País'].cat.codes.to_numpy().flags.writeable
+
+
+def test_versao_construida_uma_vez_entre_leitores_concorrentes(preparado, tmp_path):
+    construcoes = []
+
+    def construir():
+        construcoes.append(1)
+        time.sleep(0.2)
+        return {'dataset': preparado.head(50)}, {'linhas': 50}
+
+    resultados = []
+    leitores = [
+        threading.Thread(target=lambda: resultados.append(
+            carregar_ou_construir(['teste', 'concorrente'], construir, destino=str(tmp_path))))
+        for _ in range(4)
+    ]
+    for leitor in leitores:
+        leitor.start()
+    for leitor in leitores:
+        leitor.join()
+
+    assert len(construcoes) == 1
+    assert sorted(construiu for _, _, construiu in resultados) == [False, False, False, True]
+    assert all(metadados == {'linhas': 50} for _, metadados, _ in resultados)
+    assert all(np.array_equal(tabelas['dataset'].index, preparado.index[:50]) for tabelas, _, _ in resultados)
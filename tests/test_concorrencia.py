@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from afastamentos.concorrencia import COLUNA_TOTAL, picos, serie_diaria, unir_intervalos
+
+
+def _por_dia(df, grupo):
+    """Referência: uma linha por servidor, grupo e dia afastado."""
+    validas = df.dropna(subset=['Início do Afastamento', 'Final do Afastamento'])
+    if grupo is not None:
+        validas = validas.dropna(subset=[grupo])
+    grupos = [COLUNA_TOTAL] * len(validas) if grupo is None else validas[grupo].astype(str)
+    linhas = []
+    for servidor, valor, inicio, fim in zip(validas['Servidor'], grupos, validas['Início do Afastamento'],
+                                            validas['Final do Afastamento']):
+        for dia in pd.date_range(inicio.normalize(), max(fim, inicio).normalize()):
+            linhas.append((servidor, valor, dia))
+    dias = pd.DataFrame(linhas, columns=['Servidor', 'Grupo', 'Data']).drop_duplicates()
+    return dias.groupby(['Data', 'Grupo']).size().unstack(fill_value=0)
+
+
+@pytest.mark.parametrize("grupo", [None, 'Diretoria'])
+def test_varredura_igual_a_expansao_por_dia(preparado, grupo):
+    serie = serie_diaria(preparado, grupo)
+    referencia = _por_dia(preparado, grupo)
+    assert referencia.index.isin(serie.index).all()
+    esperado = referencia.reindex(serie.index, fill_value=0)
+    esperado = esperado.reindex(columns=serie.columns.astype(str), fill_value=0)
+    assert (serie.to_numpy() == esperado.to_numpy()).all()
+
+
+def test_viagens_sobrepostas_do_mesmo_servidor_contam_uma_vez():
+    inicio, fim, chave = unir_intervalos(np.array([1, 3, 20, 2]), np.array([5, 10, 21, 4]), np.array([0, 0, 0, 1]))
+    assert list(zip(inicio, fim, chave)) == [(1, 10, 0), (20, 21, 0), (2, 4, 1)]
+
+    df = pd.DataFrame({
+        'Servidor': ['A', 'A', 'B'],
+        'Início do Afastamento': pd.to_datetime(['2025-01-01', '2025-01-02', '2025-01-02']),
+        'Final do Afastamento': pd.to_datetime(['2025-01-03', '2025-01-04', '2025-01-02']),
+    })
+    serie = serie_diaria(df)
+    assert serie[COLUNA_TOTAL].tolist() == [1, 2, 1, 1]
+
+    tabela = picos(serie)
+    assert tabela.loc[0, 'Pico'] == 2
+    assert tabela.loc[0, 'Dia_Pico'] == pd.Timestamp('2025-01-02')
+    assert tabela.loc[0, 'Dias_no_Pico'] == 1
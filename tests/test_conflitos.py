@@ -0,0 +1,50 @@
+import itertools
+
+import pandas as pd
+
+from afastamentos.conflitos import conflitos_por_diretoria, detectar_conflitos
+
+
+def _dia(n):
+    return pd.Timestamp('2025-01-01') + pd.Timedelta(days=n)
+
+
+def test_intervalos_aninhados_geram_todos_os_pares():
+    df = pd.DataFrame({
+        'Servidor': ['S', 'S', 'S', 'T'],
+        'Diretoria': ['X', 'X', 'Y', 'Y'],
+        'Início do Afastamento': [_dia(1), _dia(2), _dia(3), _dia(3)],
+        'Final do Afastamento': [_dia(10), _dia(9), _dia(5), _dia(4)],
+    })
+    pares = detectar_conflitos(df)
+    assert list(zip(pares['Posicao_A'], pares['Posicao_B'], pares['Dias_Sobrepostos'])) == [
+        (0, 1, 8), (0, 2, 3), (1, 2, 3),
+    ]
+
+    por_diretoria = conflitos_por_diretoria(pares, df).set_index('Diretoria')
+    assert por_diretoria.loc['X', 'Pares'] == 1
+    assert por_diretoria.loc['Y', 'Pares'] == 2
+    assert por_diretoria['Viagens_em_Conflito'].sum() == 3
+
+
+def test_pares_iguais_a_comparacao_de_todos_contra_todos(preparado):
+    inicio = preparado['Início do Afastamento'].dt.normalize()
+    fim = preparado['Final do Afastamento'].dt.normalize().where(lambda f: f >= inicio, inicio)
+    esperado = set()
+    for posicoes in preparado.groupby('Servidor', observed=True).indices.values():
+        for i, j in itertools.combinations(sorted(posicoes), 2):
+            if inicio.iat[i] <= fim.iat[j] and inicio.iat[j] <= fim.iat[i]:
+                esperado.add((i, j))
+
+    pares = detectar_conflitos(preparado)
+    encontrados = {tuple(sorted(par)) for par in zip(pares['Posicao_A'], pares['Posicao_B'])}
+    assert len(encontrados) == len(pares)
+    assert encontrados == esperado
+    assert (pares['Dias_Sobrepostos'] >= 1).all()
+
+
+def test_limite_corta_sem_mudar_os_primeiros_pares(preparado):
+    todos = detectar_conflitos(preparado)
+    cortados = detectar_conflitos(preparado, limite=2)
+    assert len(todos) > 2
+    pd.testing.assert_frame_equal(cortados, todos.head(2))
@@ -0,0 +1,19 @@
+import pytest
+
+from afastamentos.consultas import (MOTOR_DUCKDB, MotorDuckDB, MotorPandas, filtros_de_teste, motores_disponiveis,
+                                    verificar_equivalencia)
+from afastamentos.ingestao import ler_historico
+from afastamentos.preprocessamento import preparar_dados
+
+pytestmark = pytest.mark.skipif(MOTOR_DUCKDB not in motores_disponiveis(), reason="duckdb não instalado")
+
+
+@pytest.mark.parametrize("anos", [[2024], [2023, 2024, 2025]])
+def test_duckdb_equivale_ao_pandas_no_historico(historico, anos):
+    pandas_ = MotorPandas(preparar_dados(ler_historico(historico, anos=anos))[0])
+    duckdb_ = MotorDuckDB(historico, anos)
+
+    assert duckdb_.opcoes_filtro() == pandas_.opcoes_filtro()
+    estados = filtros_de_teste(pandas_.opcoes_filtro())
+    assert len(estados) > 10
+    assert verificar_equivalencia(pandas_, duckdb_, estados) == []
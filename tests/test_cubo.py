@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from afastamentos.cubo import agregar, construir_cubo, fatiar, totais
+
+
+@pytest.fixture(scope="module")
+def cubo(preparado):
+    return construir_cubo(preparado)
+
+
+@pytest.mark.parametrize("dims", [['País_Inglês'], ['Diretoria', 'Gênero'], ['Tipo_Duracao']])
+def test_agregar_equivale_a_agrupar_as_linhas(cubo, preparado, dims):
+    resultado = agregar(cubo, dims).set_index(dims).sort_index()
+    esperado = (
+        preparado.groupby(dims, observed=True)
+        .agg(Viagens=('Servidor', 'size'), Soma_Duracao=('Duração (dias)', 'sum'),
+             Duracao_Max=('Duração (dias)', 'max'), Servidores_Unicos=('Servidor', 'nunique'))
+        .sort_index()
+    )
+
+    assert resultado['Viagens'].tolist() == esperado['Viagens'].tolist()
+    assert resultado['Soma_Duracao'].tolist() == esperado['Soma_Duracao'].tolist()
+    assert resultado['Duracao_Max'].tolist() == esperado['Duracao_Max'].tolist()
+    if 'Servidores_Unicos' in resultado:
+        assert resultado['Servidores_Unicos'].tolist() == esperado['Servidores_Unicos'].tolist()
+
+
+def test_fatiar_equivale_a_filtrar_antes(cubo, preparado):
+    filtros = {'Tipo de Viagem': 'Serviço', 'Diretoria': ['DIPRO', 'DILIC'], 'Gênero': None}
+    fatiado = totais(fatiar(cubo, filtros))
+    linhas = preparado[(preparado['Tipo de Viagem'] == 'Serviço') & preparado['Diretoria'].isin(['DIPRO', 'DILIC'])]
+
+    assert fatiado['Viagens'] == len(linhas)
+    assert fatiado['Servidores_Unicos'] == linhas['Servidor'].nunique()
+    assert fatiado['Duração_Media'] == pytest.approx(linhas['Duração (dias)'].mean())
+    assert fatiado['Custo_Medio'] == pytest.approx(linhas['Custo'].mean())
+    assert fatiado['Inicio_Min'] == linhas['Início do Afastamento'].min()
+
+
+def test_fatia_vazia_tem_medias_nulas(cubo):
+    vazio = totais(fatiar(cubo, {'Diretoria': 'Inexistente'}))
+    assert vazio['Viagens'] == 0
+    assert np.isnan(vazio['Duração_Media'])
+    assert agregar(fatiar(cubo, {'Diretoria': 'Inexistente'}), ['País_Inglês']).empty
+
+
+def test_celulas_somam_o_dataset(cubo, preparado):
+    assert cubo.celulas['Viagens'].sum() == len(preparado)
+    assert len(cubo.servidores.drop_duplicates()) == len(cubo.servidores)
+    assert isinstance(cubo.celulas, pd.DataFrame)
@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+streamlit_testing = pytest.importorskip("streamlit.testing.v1")
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def dashboard(monkeypatch):
+    # A planilha do painel é lida pelo caminho relativo à raiz do repositório
+    monkeypatch.chdir(RAIZ)
+    return streamlit_testing.AppTest.from_file(os.path.join(RAIZ, "DashV2.py"), default_timeout=300)
+
+
+def test_todas_as_secoes_visiveis_por_padrao(dashboard):
+    dashboard.run()
+    assert not dashboard.exception
+    opcoes = dashboard.get("button_group")[0].options
+    assert len(opcoes) == 10
+    assert len(dashboard.session_state['secoes_visiveis']) == len(opcoes)
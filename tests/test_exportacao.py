@@ -0,0 +1,45 @@
+import io
+
+import pandas as pd
+import pytest
+
+from afastamentos.exportacao import FORMATOS, exportar, iterar_csv
+
+
+@pytest.fixture(scope="module")
+def selecao(preparado):
+    return preparado[['Servidor', 'Diretoria', 'País_Inglês', 'Início do Afastamento', 'Duração (dias)', 'Custo']]
+
+
+def test_csv_em_blocos_igual_ao_csv_inteiro(selecao):
+    em_blocos = b''.join(iterar_csv(selecao, tamanho_bloco=37))
+    assert em_blocos == selecao.to_csv(index=False).encode('utf-8')
+
+
+def test_exportar_devolve_arquivo_aberto_no_inicio(selecao):
+    arquivo = exportar(selecao, 'CSV', tamanho_bloco=50)
+    try:
+        assert isinstance(arquivo, io.RawIOBase)
+        assert arquivo.tell() == 0
+        assert arquivo.read() == selecao.to_csv(index=False).encode('utf-8')
+    finally:
+        arquivo.close()
+
+
+@pytest.mark.parametrize("formato, ler", [
+    ('Parquet', pd.read_parquet),
+    ('XLSX', lambda f: pd.read_excel(f, sheet_name='Afastamentos')),
+])
+def test_formatos_binarios_relidos(selecao, formato, ler):
+    colunas = ['Servidor', 'Duração (dias)', 'Início do Afastamento']
+    with exportar(selecao, formato, colunas, tamanho_bloco=50) as arquivo:
+        relido = ler(io.BytesIO(arquivo.read()))
+    assert relido.columns.tolist() == colunas
+    assert relido['Servidor'].tolist() == selecao['Servidor'].astype(str).tolist()
+    assert relido['Duração (dias)'].tolist() == selecao['Duração (dias)'].tolist()
+
+
+def test_formato_desconhecido(selecao):
+    assert set(FORMATOS) == {'CSV', 'Parquet', 'XLSX'}
+    with pytest.raises(ValueError):
+        exportar(selecao, 'PDF')
@@ -0,0 +1,59 @@
+import json
+
+import plotly.graph_objects as go
+
+from afastamentos.figuras import CacheFiguras
+
+
+def _figura(n=3):
+    return go.Figure(go.Bar(x=list(range(n)), y=list(range(n))))
+
+
+def test_acerto_devolve_a_spec_guardada_sem_reconstruir():
+    cache = CacheFiguras()
+    chamadas = []
+
+    def construir():
+        chamadas.append(1)
+        return _figura()
+
+    primeira = cache.obter("a", construir)
+    segunda = cache.obter("a", construir)
+    assert isinstance(primeira, dict)
+    assert segunda is primeira
+    assert primeira == json.loads(_figura().to_json())
+    assert len(chamadas) == 1
+    assert cache.estatisticas()['acertos'] == 1
+
+
+def test_limite_em_bytes_descarta_a_menos_usada():
+    tamanho = len(_figura().to_json())
+    cache = CacheFiguras(limite_bytes=2 * tamanho)
+    cache.obter("a", _figura)
+    cache.obter("b", _figura)
+    cache.obter("a", _figura)
+    cache.obter("c", _figura)
+    estatisticas = cache.estatisticas()
+    assert estatisticas['figuras'] == 2
+    assert estatisticas['bytes'] <= 2 * tamanho
+    assert estatisticas['descartes'] == 1
+    # "b" foi a usada há mais tempo
+    assert cache.obter("a", _figura) is cache.obter("a", _figura)
+    falhas = cache.estatisticas()['falhas']
+    cache.obter("b", _figura)
+    assert cache.estatisticas()['falhas'] == falhas + 1
+
+
+def test_figura_maior_que_o_cache_nao_e_guardada():
+    cache = CacheFiguras(limite_bytes=10)
+    spec = cache.obter("a", _figura)
+    assert spec['data'][0]['type'] == 'bar'
+    assert cache.estatisticas()['figuras'] == 0
+
+
+def test_semear_nao_sobrescreve_e_guarda_dict():
+    cache = CacheFiguras()
+    cache.semear("a", _figura(2).to_json())
+    cache.semear("a", _figura(5).to_json())
+    spec = cache.obter("a", lambda: _figura(9))
+    assert len(spec['data'][0]['x']) == 2
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from afastamentos.filtros import COLUNA_TEMPO, IndiceFiltros
+
+
+@pytest.fixture(scope="module")
+def indice(preparado):
+    return IndiceFiltros(preparado)
+
+
+def _mascara(df, selecao):
+    mask = np.ones(len(df), dtype=bool)
+    for dim, valor in selecao.items():
+        if valor is None or (isinstance(valor, list) and not valor):
+            continue
+        if dim == COLUNA_TEMPO:
+            inicio, fim = (pd.Timestamp(d) for d in valor)
+            dias = df[dim].dt.normalize()
+            mask &= ((dias >= inicio) & (dias <= fim)).to_numpy()
+        else:
+            mask &= df[dim].isin(valor if isinstance(valor, list) else [valor]).to_numpy()
+    return mask
+
+
+@pytest.mark.parametrize("selecao", [
+    {'Tipo de Viagem': 'Serviço'},
+    {'Diretoria': ['DIPRO', 'DIQUA'], 'Gênero': 'F'},
+    {'País_Inglês': ['Peru', 'Ecuador'], 'Trimestre': ['T1', 'T4'], 'Diretoria': []},
+    {'Diretoria': 'Inexistente'},
+])
+def test_posicoes_equivalem_a_mascara_booleana(indice, preparado, selecao):
+    posicoes = indice.posicoes(selecao)
+    assert sorted(posicoes) == list(np.flatnonzero(_mascara(preparado, selecao)))
+
+
+def test_sem_filtro_devolve_o_proprio_dataframe(indice, preparado):
+    assert indice.posicoes({'Diretoria': None, 'Gênero': []}) is None
+    assert indice.selecionar({}) is preparado
+
+
+def test_selecionar_mantem_as_linhas(indice, preparado):
+    selecionado = indice.selecionar({'Gênero': 'M'})
+    assert set(selecionado.index) == set(preparado.index[preparado['Gênero'] == 'M'])
+
+
+@pytest.mark.parametrize("selecao", [
+    {COLUNA_TEMPO: ('2025-03-01', '2025-03-31')},
+    {COLUNA_TEMPO: ('2025-06-15', '2025-06-15')},
+    {COLUNA_TEMPO: ('2025-02-01', '2025-09-30'), 'Diretoria': ['DIPRO', 'DILIC'], 'Gênero': 'F'},
+    {COLUNA_TEMPO: ('2030-01-01', '2030-12-31')},
+])
+def test_periodo_equivale_a_mascara_e_sai_em_ordem_cronologica(indice, preparado, selecao):
+    posicoes = indice.posicoes(selecao)
+    assert sorted(posicoes) == list(np.flatnonzero(_mascara(preparado, selecao)))
+    inicios = preparado[COLUNA_TEMPO].to_numpy()[posicoes]
+    assert (np.diff(inicios) >= np.timedelta64(0)).all()
+
+
+def test_periodo_total_ignora_datas_vazias(preparado):
+    com_vazias = preparado.copy()
+    com_vazias.loc[com_vazias.index[:5], COLUNA_TEMPO] = pd.NaT
+    indice = IndiceFiltros(com_vazias)
+    datas = com_vazias[COLUNA_TEMPO]
+    assert indice.periodo_total() == (datas.min(), datas.max())
+    inicio, fim = indice.periodo_total()
+    assert len(indice.posicoes({COLUNA_TEMPO: (inicio, fim)})) == datas.notna().sum()
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from afastamentos.grade import GradePaginada
+from afastamentos.paises import chave_pais
+
+
+@pytest.fixture(scope="module")
+def grade(preparado):
+    return GradePaginada(preparado)
+
+
+def test_busca_ignora_acentos_e_caixa(grade, preparado):
+    selecionadas = grade.consultar(busca="AFRICA do sul", colunas_busca=['País'])
+    esperado = np.flatnonzero(preparado['País'].astype(object).map(
+        lambda v: 'africa do sul' in chave_pais(v)).to_numpy())
+    assert len(esperado)
+    assert list(selecionadas) == list(esperado)
+
+
+def test_ordenacao_sobre_posicoes_filtradas(grade, preparado):
+    posicoes = np.arange(0, len(preparado), 3)
+    selecionadas = grade.consultar(posicoes, ordenar_por='Antecedência (dias)', crescente=False)
+    esperado = (preparado.iloc[posicoes]['Antecedência (dias)'].reset_index(drop=True)
+                .sort_values(ascending=False, na_position='last', kind='stable').index)
+    assert list(selecionadas) == list(posicoes[esperado])
+
+
+def test_pagina_traz_so_as_linhas_e_colunas_pedidas(grade, preparado):
+    selecionadas = grade.consultar(ordenar_por='Servidor')
+    colunas = ['Servidor', 'País']
+    pagina = grade.pagina(selecionadas, colunas, numero=2, tamanho=25)
+    assert list(pagina.columns) == colunas
+    assert pagina.equals(preparado.iloc[selecionadas[25:50]][colunas])
+    assert GradePaginada.total_paginas(len(selecionadas), 25) == -(-len(preparado) // 25)
+    assert GradePaginada.total_paginas(0, 25) == 1
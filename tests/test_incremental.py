@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from afastamentos import incremental, paises
+from afastamentos.cubo import agregar, construir_cubo
+from afastamentos.incremental import EstadoIncremental, impressoes_linhas
+from afastamentos.paises import ResolvedorPaises
+from afastamentos.preprocessamento import preparar_dados
+from benchmarks.gerar_dados import gerar
+
+
+def _editar(bruto):
+    """Nova versão da aba: linhas inseridas, alteradas, canceladas e removidas."""
+    novo = bruto.drop(index=bruto.index[5:15]).copy()
+    novo.loc[novo.index[20:25], 'País'] = 'Japão'
+    novo.loc[novo.index[30:33], 'Cancelada?'] = 'Sim'
+    novo.loc[novo.index[40], 'Início do Afastamento'] = '01/01/2025'
+    novo.loc[novo.index[50:52], 'Diretoria'] = 'NOVA'
+    inseridas = gerar(15, semente=99)
+    return pd.concat([novo.iloc[:100], inseridas, novo.iloc[100:]], ignore_index=True)
+
+
+def _completo(bruto):
+    chaves, _ = impressoes_linhas(bruto)
+    return preparar_dados(bruto.set_axis(pd.Index(chaves, name='_chave_linha')))
+
+
+@pytest.fixture(scope="module")
+def atualizado(bruto):
+    estado = EstadoIncremental()
+    estado.sincronizar('v1', lambda: bruto)
+    novo = _editar(bruto)
+    df, relatorio, cubo = estado.sincronizar('v2', lambda: novo)
+    return novo, df, relatorio, cubo
+
+
+def test_dataset_igual_a_reconstrucao_completa(atualizado):
+    novo, df, _, _ = atualizado
+    esperado, _ = _completo(novo)
+    pd.testing.assert_frame_equal(df, esperado)
+    assert list(df.index) == list(esperado.index)
+
+
+def test_relatorio_igual_a_reconstrucao_completa(atualizado):
+    novo, _, relatorio, _ = atualizado
+    _, esperado = _completo(novo)
+
+    assert relatorio['ultima_atualizacao']['modo'] == 'incremental'
+    comparaveis = [k for k in esperado if k != 'memoria']
+    assert {k: relatorio[k] for k in comparaveis} == {k: esperado[k] for k in comparaveis}
+    for col, memoria in esperado['memoria'].items():
+        assert relatorio['memoria'][col]['tipo_depois'] == memoria['tipo_depois']
+        assert relatorio['memoria'][col]['bytes_antes'] == pytest.approx(memoria['bytes_antes'], rel=0.05)
+
+
+def test_cubo_igual_a_reconstrucao_completa(atualizado):
+    novo, _, _, cubo = atualizado
+    esperado = construir_cubo(_completo(novo)[0])
+    for dims in (['País_Inglês'], ['Diretoria', 'Gênero']):
+        a = agregar(cubo, dims).sort_values(dims, ignore_index=True)
+        b = agregar(esperado, dims).sort_values(dims, ignore_index=True)
+        assert a['Viagens'].tolist() == b['Viagens'].tolist()
+        assert np.allclose(a['Soma_Duracao'], b['Soma_Duracao'])
+        assert a['Servidores_Unicos'].tolist() == b['Servidores_Unicos'].tolist()
+
+
+def test_remover_as_linhas_que_definem_o_tipo(bruto):
+    """Sem o único Custo com centavos e a maior duração, os tipos encolhem como numa reconstrução."""
+    fonte = bruto.copy()
+    valores = fonte['Custo'].map(lambda v: isinstance(v, float))
+    fonte.loc[valores, 'Custo'] = 1000.0
+    fonte.loc[fonte.index[3], 'Custo'] = 1234.56
+    fonte.loc[fonte.index[4], ['Início do Afastamento', 'Final do Afastamento']] = ['01/06/2025', '30/05/2026']
+    estado = EstadoIncremental()
+    df, _, _ = estado.sincronizar('v1', lambda: fonte)
+    assert df['Custo'].dtype == 'float64' and df['Duração (dias)'].dtype == 'int16'
+
+    novo = fonte.drop(index=fonte.index[3:5])
+    df, relatorio, _ = estado.sincronizar('v2', lambda: novo)
+    esperado, relatorio_esperado = _completo(novo)
+    pd.testing.assert_frame_equal(df, esperado)
+    assert {col: m['tipo_depois'] for col, m in relatorio['memoria'].items()} == \
+        {col: m['tipo_depois'] for col, m in relatorio_esperado['memoria'].items()}
+
+
+def test_mesma_chave_nao_recarrega(bruto):
+    estado = EstadoIncremental()
+    estado.sincronizar('v1', lambda: bruto)
+
+    def falhar():
+        raise AssertionError("não deveria recarregar")
+
+    assert estado.sincronizar('v1', falhar)[0] is estado.df
+
+
+def test_alias_aceito_refaz_os_paises_sem_reler_a_fonte(bruto, tmp_path, monkeypatch):
+    resolvedor = ResolvedorPaises(arquivo=str(tmp_path / "aliases.json"))
+    monkeypatch.setattr(paises, "RESOLVEDOR", resolvedor)
+    monkeypatch.setattr(incremental, "RESOLVEDOR", resolvedor)
+    fonte = bruto.copy()
+    fonte.loc[fonte.index[:40], 'País'] = 'Xyz'
+    estado = EstadoIncremental()
+    df, _, _ = estado.sincronizar('v1', lambda: fonte)
+    sem_pais = int((df['País'] == 'Xyz').sum())
+    assert sem_pais > 0 and df.loc[df['País'] == 'Xyz', 'País_Inglês'].isna().all()
+
+    resolvedor.aceitar('Xyz', 'Japan')
+
+    def falhar():
+        raise AssertionError("não deveria recarregar")
+
+    df, relatorio, cubo = estado.sincronizar('v1', falhar)
+    assert relatorio['ultima_atualizacao'] == {'modo': 'paises', 'alteradas': sem_pais}
+    assert estado.versao_paises == resolvedor.versao()
+
+    esperado, relatorio_esperado = _completo(fonte)
+    pd.testing.assert_frame_equal(df, esperado)
+    assert {k: v for k, v in relatorio.items() if k != 'ultima_atualizacao'} == relatorio_esperado
+    a = agregar(cubo, ['País_Inglês']).sort_values('País_Inglês', ignore_index=True)
+    b = agregar(construir_cubo(esperado), ['País_Inglês']).sort_values('País_Inglês', ignore_index=True)
+    assert a['Viagens'].tolist() == b['Viagens'].tolist()
+    assert a['Servidores_Unicos'].tolist() == b['Servidores_Unicos'].tolist()
@@ -0,0 +1,78 @@
+import pandas as pd
+
+from afastamentos.ingestao import (
+    FonteAba, descobrir_fontes, gravar_historico, ler_historico, ler_manifesto, normalizar_bloco,
+)
+from afastamentos.preprocessamento import preparar_dados
+from afastamentos.snapshot import carregar_snapshot
+from benchmarks.gerar_dados import ABA, gerar, gravar_xlsx
+
+
+def test_descobre_so_abas_anuais(planilhas_historico):
+    fontes = descobrir_fontes([planilhas_historico])
+    assert sorted((f.aba, f.ano) for f in fontes) == [
+        ('Afastamentos 2023', 2023), ('Afastamentos 2024', 2024), ('Afastamentos 2025', 2025)]
+    assert all(isinstance(f, FonteAba) for f in fontes)
+
+
+def test_normalizar_bloco_sem_coluna_cancelada():
+    bloco = gerar(20, semente=5).drop(columns=['Cancelada?', 'Custo'])
+    normalizado = normalizar_bloco(bloco, 2025)
+    assert normalizado['Cancelada?'].isna().all()
+    assert normalizado['Custo'].isna().all()
+    assert len(normalizado) == 20
+
+
+def test_normalizar_bloco_padroniza_texto_e_ano():
+    bloco = pd.DataFrame({
+        'Cancelada?': ['SIM', 'não ', None],
+        'País': ['  Peru ', 'Chile', None],
+        'Início do Afastamento': ['05/03/2024', None, '2024-12-31'],
+    })
+    normalizado = normalizar_bloco(bloco, 2025)
+    assert normalizado['Cancelada?'].tolist()[:2] == ['Sim', 'Não']
+    assert normalizado['País'].tolist()[:2] == ['Peru', 'Chile']
+    # Ano da data de início; sem data, o ano da aba
+    assert normalizado['Ano'].tolist() == [2024, 2025, 2024]
+
+
+def test_historico_particionado_por_ano(historico, planilhas_historico):
+    manifesto = ler_manifesto(historico)
+    completo = ler_historico(historico)
+
+    assert sum(manifesto['linhas_por_ano'].values()) == len(completo) == 120 + 150 + 180
+    assert len(manifesto['fontes']) == 3
+    so_2024 = ler_historico(historico, anos=[2024])
+    assert (so_2024['Ano'] == 2024).all()
+    assert len(so_2024) == manifesto['linhas_por_ano']['2024']
+
+
+def test_leitura_paralela_igual_a_sequencial(historico, planilhas_historico, tmp_path):
+    fontes = descobrir_fontes([planilhas_historico])
+    concluidas = []
+    manifesto = gravar_historico(fontes, str(tmp_path / "paralelo"), tamanho_bloco=64, processos=2,
+                                 progresso=lambda feitas, total, fonte: concluidas.append((feitas, total)))
+
+    assert concluidas == [(1, 3), (2, 3), (3, 3)]
+    assert manifesto == ler_manifesto(historico)
+    chaves = ['Ano', 'N° Processo SEI', 'Servidor', 'Início do Afastamento']
+    paralelo = ler_historico(str(tmp_path / "paralelo")).sort_values(chaves, ignore_index=True)
+    sequencial = ler_historico(historico).sort_values(chaves, ignore_index=True)
+    pd.testing.assert_frame_equal(paralelo, sequencial)
+
+
+def test_planilha_e_historico_descartam_as_mesmas_canceladas(tmp_path):
+    bruto = gerar(80, semente=11)
+    bruto.loc[:9, 'Cancelada?'] = ['não ', 'NÃO', ' Não', 'SIM', 'sim ', 'não', 'Nao', 'NÃO ', 'Sim', 'não']
+    caminho = tmp_path / "afastamentos_2025.xlsx"
+    gravar_xlsx(bruto, caminho)
+
+    da_planilha = preparar_dados(carregar_snapshot(str(caminho), ABA)[0])
+    destino = str(tmp_path / "historico")
+    gravar_historico(descobrir_fontes([str(caminho)]), destino)
+    do_historico = preparar_dados(ler_historico(destino))
+
+    assert len(da_planilha[0]) == len(do_historico[0])
+    assert da_planilha[1]['linhas_nao_canceladas'] == do_historico[1]['linhas_nao_canceladas'] \
+        == int((bruto['Cancelada?'].str.strip().str.capitalize() == 'Não').sum())
+    assert set(da_planilha[0]['Cancelada?']) == {'Não'}
@@ -0,0 +1,41 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from afastamentos.mapa import ISOS_MAPA, blocos_html, figura_base, figura_leve, tamanho_payload
+
+
+def _viagens_por_pais():
+    return pd.DataFrame({
+        'País': ['Brasil', 'França', 'Lugar <X>'],
+        'ISO_Code': ['BRA', 'FRA', np.nan],
+        'Total_Viagens': [10, 4, 2],
+        'Servidores_Unicos': [7, 3, 1],
+        'Duração_Media': [5.5, 2.0, 1.0],
+    })
+
+
+def test_figura_leve_alinha_valores_a_geografia_base():
+    base = figura_base()
+    antes = json.dumps(base)
+    figura = figura_leve(base, _viagens_por_pais())
+
+    traco = figura['data'][0]
+    assert traco['z'][ISOS_MAPA.index('BRA')] == 10
+    assert traco['customdata'][ISOS_MAPA.index('FRA')] == [3, 2.0]
+    assert sum(v is not None for v in traco['z']) == 2
+    # A base é compartilhada entre filtros e não pode ser alterada
+    assert json.dumps(base) == antes
+
+
+def test_blocos_ordenados_e_escapados():
+    blocos = blocos_html(_viagens_por_pais())
+    assert blocos.index('Brasil') < blocos.index('França') < blocos.index('Lugar')
+    assert 'Lugar &lt;X&gt;' in blocos
+    assert blocos_html(_viagens_por_pais().head(0)) == '<div class="map-tiles"></div>'
+
+
+def test_payload_de_dict_inclui_o_template_aplicado_pelo_streamlit():
+    figura = figura_leve(figura_base(), _viagens_por_pais())
+    assert tamanho_payload(figura) > len(json.dumps(figura).encode('utf-8'))
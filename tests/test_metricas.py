@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from afastamentos import metricas
+from afastamentos.cubo import construir_cubo, fatiar
+from afastamentos.metricas import (ResultadosCubo, SnapshotMetricas, gravar_snapshot_metricas,
+                                   localizar_snapshot_metricas, versao_fonte)
+from afastamentos.paises import ResolvedorPaises
+
+FONTE = ('planilha', 'teste')
+
+
+@pytest.fixture(scope="module")
+def cubo(preparado):
+    return construir_cubo(preparado)
+
+
+@pytest.fixture(scope="module")
+def snapshot(cubo, tmp_path_factory):
+    return SnapshotMetricas(gravar_snapshot_metricas(cubo, FONTE, str(tmp_path_factory.mktemp("metricas")), processos=1))
+
+
+def test_snapshot_igual_ao_cubo_fatiado(snapshot, cubo):
+    tipo, diretoria = snapshot.combinacoes[-1]
+    do_snapshot = snapshot.resultados(tipo, diretoria)
+    do_cubo = ResultadosCubo(fatiar(cubo, {'Tipo de Viagem': tipo, 'Diretoria': diretoria}))
+    assert do_snapshot.metricas() == pytest.approx(do_cubo.metricas(), nan_ok=True)
+    pd.testing.assert_frame_equal(do_snapshot.conjunto('diretorias'), do_cubo.conjunto('diretorias'),
+                                  check_dtype=False, check_categorical=False)
+    assert snapshot.resultados('Inexistente', None) is None
+
+
+def test_conjunto_vazio_em_todas_as_combinacoes_mantem_as_colunas(preparado, tmp_path):
+    sem_pais = preparado.head(40).copy()
+    sem_pais['País_Inglês'] = sem_pais['País_Inglês'].cat.set_categories([])
+    snapshot = SnapshotMetricas(gravar_snapshot_metricas(construir_cubo(sem_pais), FONTE, str(tmp_path), processos=1))
+
+    paises = snapshot.resultados(None, None).conjunto('paises')
+    assert paises.empty
+    assert list(paises.columns) == ['País', 'Total_Viagens', 'Servidores_Unicos', 'Duração_Media', 'ISO_Code']
+
+
+def test_alias_aceito_invalida_o_snapshot(preparado, tmp_path, monkeypatch):
+    resolvedor = ResolvedorPaises(arquivo=str(tmp_path / "aliases.json"))
+    monkeypatch.setattr(metricas, "RESOLVEDOR", resolvedor)
+    destino = str(tmp_path / "metricas")
+    versao = versao_fonte(FONTE)
+    gravar_snapshot_metricas(construir_cubo(preparado.head(40)), FONTE, destino, processos=1)
+    assert localizar_snapshot_metricas(FONTE, destino) is not None
+
+    resolvedor.aceitar("Brasilzinho", "Brazil")
+    assert versao_fonte(FONTE) != versao
+    assert localizar_snapshot_metricas(FONTE, destino) is None
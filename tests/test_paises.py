@@ -0,0 +1,73 @@
+import json
+
+import pandas as pd
+
+from afastamentos import paises
+from afastamentos.paises import (ResolvedorPaises, chave_pais, normalizar_paises, paises_nao_resolvidos,
+                                 resolver_pais)
+from afastamentos.preprocessamento import preparar_dados
+
+
+def test_chave_ignora_acento_caixa_e_espacos():
+    assert chave_pais('  Suíça ') == chave_pais('suica') == 'suica'
+    assert chave_pais('Trinidad   e  Tobago') == 'trinidad e tobago'
+
+
+def test_resolve_nomes_em_portugues_e_ingles():
+    assert resolver_pais('Bolívia') == ('Bolivia', 'BOL')
+    assert resolver_pais('bolivia') == ('Bolivia', 'BOL')
+    assert resolver_pais('EUA') == ('United States', 'USA')
+    assert resolver_pais(None) == (None, None)
+    assert resolver_pais('nan') == (None, None)
+
+
+def test_normalizar_equivale_a_resolver_linha_a_linha(bruto):
+    serie = bruto['País'].astype(str).str.strip()
+    normalizado = normalizar_paises(serie)
+
+    assert isinstance(normalizado['País_Inglês'].dtype, pd.CategoricalDtype)
+    assert normalizado.index.equals(serie.index)
+    esperado = [resolver_pais(valor) for valor in serie]
+    assert normalizado['País_Inglês'].astype(object).where(normalizado['País_Inglês'].notna(), None).tolist() \
+        == [e[0] for e in esperado]
+    assert normalizado['ISO_Code'].astype(object).where(normalizado['ISO_Code'].notna(), None).tolist() \
+        == [e[1] for e in esperado]
+
+
+def test_nulos_continuam_nulos():
+    normalizado = normalizar_paises(pd.Series(['Peru', None, 'Peru', 'nan']))
+    assert normalizado['País_Inglês'].isna().tolist() == [False, True, False, True]
+
+
+def test_lista_de_paises_fica_so_como_sugestao(bruto, tmp_path, monkeypatch):
+    resolvedor = ResolvedorPaises(arquivo=str(tmp_path / "aliases.json"))
+    monkeypatch.setattr(paises, "RESOLVEDOR", resolvedor)
+    fonte = bruto.head(30).copy()
+    fonte['País'] = ['Canadá e EUA', 'Peru/Chile', 'Trinidad e Tobago'] * 10
+
+    df, _ = preparar_dados(fonte)
+    assert set(df['País_Inglês'].dropna()) == {'Trinidad and Tobago'}
+    assert resolvedor.automaticos() == []
+    pendentes = paises_nao_resolvidos(df).set_index('País')
+    assert pendentes.loc['Canadá e EUA', 'Sugestão'] == 'Canada'
+
+
+def test_preparo_so_sugere_alias_e_grava_quando_confirmado(bruto, tmp_path, monkeypatch):
+    arquivo = tmp_path / "aliases.json"
+    resolvedor = ResolvedorPaises(arquivo=str(arquivo))
+    monkeypatch.setattr(paises, "RESOLVEDOR", resolvedor)
+    versao = resolvedor.versao()
+    fonte = bruto.head(30).copy()
+    fonte['País'] = 'Argentinna'
+
+    df, _ = preparar_dados(fonte)
+    assert set(df['País_Inglês'].dropna()) == {'Argentina'}
+    assert resolvedor.versao() != versao
+    assert not arquivo.exists()
+    assert resolvedor.automaticos() == [('Argentinna', 'Argentina', 0.857)]
+
+    assert resolvedor.gravar_automaticos() == 1
+    assert json.loads(arquivo.read_text())['aliases']['argentinna']['origem'] == 'automatico'
+    assert resolvedor.automaticos() == []
+    # Um processo novo lê o arquivo e chega à mesma versão da tabela
+    assert ResolvedorPaises(arquivo=str(arquivo)).versao() == resolvedor.versao()
@@ -0,0 +1,43 @@
+import json
+
+from afastamentos.perfil import PerfilExecucao, etapa, marcar_falha_cache, perfil_atual
+
+
+def test_sem_perfil_ativo_etapa_nao_mede():
+    assert perfil_atual() is None
+    with etapa('solta') as registro:
+        marcar_falha_cache()
+    assert registro == {}
+
+
+def test_etapas_aninhadas_com_linhas_e_cache():
+    dados = list(range(10))
+    with PerfilExecucao("teste") as perfil:
+        with etapa('fora', cacheavel=True):
+            with etapa('dentro', lambda: len(dados)) as registro:
+                del dados[5:]
+            marcar_falha_cache()
+        with etapa('acerto', cacheavel=True):
+            pass
+    assert perfil_atual() is None
+
+    fora, dentro, acerto = perfil.etapas
+    assert (fora['nivel'], dentro['nivel']) == (0, 1)
+    assert (dentro['linhas_entrada'], dentro['linhas_saida']) == (10, 5)
+    assert registro is dentro
+    assert (fora['cache'], acerto['cache'], dentro['cache']) == ('falha', 'acerto', None)
+    assert fora['segundos'] >= dentro['segundos']
+    assert perfil.total_segundos >= fora['segundos']
+    json.dumps(perfil.como_dict())
+
+
+def test_memoria_da_etapa_de_fora_inclui_o_pico_da_de_dentro():
+    with PerfilExecucao("memoria") as perfil:
+        perfil.ligar_memoria()
+        with etapa('fora'):
+            with etapa('dentro'):
+                bloco = bytearray(4 * 2**20)
+                del bloco
+    fora, dentro = perfil.etapas
+    assert dentro['memoria_bytes'] >= 4 * 2**20
+    assert fora['memoria_bytes'] >= dentro['memoria_bytes']
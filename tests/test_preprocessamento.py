@@ -0,0 +1,91 @@
+import pandas as pd
+
+from afastamentos.preprocessamento import compactar_tipos, converter_datas, normalizar_cancelada, preparar_dados
+
+
+def test_preparar_dados_nao_altera_a_entrada(bruto):
+    copia = bruto.copy()
+    preparar_dados(bruto)
+    pd.testing.assert_frame_equal(bruto, copia)
+
+
+def test_preparar_dados_aplica_as_regras_do_relatorio(bruto):
+    df, relatorio = preparar_dados(bruto)
+
+    assert relatorio['linhas_lidas'] == len(bruto)
+    assert relatorio['linhas_nao_canceladas'] == int((normalizar_cancelada(bruto['Cancelada?']) == 'Não').sum())
+    assert relatorio['linhas_preparadas'] == len(df) == relatorio['linhas_com_antecedencia_valida']
+    assert (df['Duração (dias)'] >= 0).all()
+    assert (df['Antecedência (dias)'] >= 0).all()
+    assert df['Bem_Planejado'].equals(df['Antecedência (dias)'] >= 30)
+    assert df[['Início do Afastamento', 'Final do Afastamento']].notna().all().all()
+
+
+def test_seriais_do_excel_so_em_faixa_plausivel():
+    serie = pd.Series([45658, '45658', '2025', 2025, 45658.5, '31/12/2024'])
+    convertida, contagem = converter_datas(serie)
+
+    assert convertida[0] == convertida[1] == pd.Timestamp('2025-01-01')
+    # Número solto numa coluna de data não vira 1905
+    assert convertida[[2, 3]].isna().all()
+    assert convertida[4] == pd.Timestamp('2025-01-01 12:00')
+    assert convertida[5] == pd.Timestamp('2024-12-31')
+    assert contagem['invalido'] == 2
+
+
+def test_cada_formato_de_texto_e_detectado():
+    serie = pd.Series(['05/03/2025', '2025-03-05', '05.03.2025', '05/03/25', ' 05/03/2025 ', None, 'amanhã'])
+    convertida, contagem = converter_datas(serie)
+
+    assert (convertida[:5] == pd.Timestamp('2025-03-05')).all()
+    assert convertida[5:].isna().all()
+    assert contagem['formato %d/%m/%Y'] == 2
+    assert contagem['formato %Y-%m-%d'] == 1
+    assert contagem['vazio'] == 1
+    assert contagem['invalido'] == 1
+
+
+def test_coluna_ja_em_datetime_passa_direto():
+    serie = pd.Series(pd.to_datetime(['2025-01-02', None]))
+    convertida, contagem = converter_datas(serie)
+    assert convertida is serie
+    assert contagem == {'nativo': 1, 'vazio': 1}
+
+
+def test_conversao_por_distintos_equivale_a_por_celula(bruto):
+    coluna = bruto['Início do Afastamento']
+    convertida, _ = converter_datas(coluna)
+    por_celula = pd.concat([converter_datas(coluna.iloc[[i]])[0] for i in range(len(coluna))])
+    pd.testing.assert_series_equal(convertida, por_celula)
+
+
+def test_compactar_tipos_preserva_valores_e_reduz_memoria():
+    df = pd.DataFrame({
+        'Diretoria': ['DIPRO', 'DILIC', 'DIPRO', 'DIPRO'],
+        'Processo': ['a', 'b', 'c', 'd'],
+        'Dias': pd.Series([1, 2, 300, 4], dtype='int64'),
+        'Antecedência': [1.0, 2.0, float('nan'), 4.0],
+        'Custo': [10.1, 20.2, 30.3, 40.4],
+        'Trimestre': ['T4', 'T1', 'T2', 'T1'],
+    })
+    original = df.copy()
+    compacto, memoria = compactar_tipos(df.copy())
+
+    assert isinstance(compacto['Diretoria'].dtype, pd.CategoricalDtype)
+    # Alta cardinalidade continua texto
+    assert not isinstance(compacto['Processo'].dtype, pd.CategoricalDtype)
+    assert compacto['Dias'].dtype == 'int16'
+    assert compacto['Antecedência'].dtype == 'float32'
+    # Valores em reais não cabem exatos em float32
+    assert compacto['Custo'].dtype == 'float64'
+    assert compacto['Trimestre'].cat.ordered and list(compacto['Trimestre'].cat.categories) == ['T1', 'T2', 'T3', 'T4']
+
+    pd.testing.assert_frame_equal(compacto, original, check_dtype=False, check_categorical=False)
+    assert memoria['Dias'] == {'tipo_antes': 'int64', 'tipo_depois': 'int16', 'bytes_antes': 32, 'bytes_depois': 8}
+
+
+def test_relatorio_de_memoria_do_dataset_preparado(preparado, bruto):
+    memoria = preparar_dados(bruto)[1]['memoria']
+    assert set(memoria) == set(preparado.columns)
+    assert sum(m['bytes_depois'] for m in memoria.values()) < sum(m['bytes_antes'] for m in memoria.values())
+    assert preparado['Mês_Início'].cat.ordered
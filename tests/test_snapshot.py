@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+import pytest
+
+from afastamentos import snapshot
+
+ABA = "Afastamentos 2025"
+
+
+def _gravar(caminho, linhas):
+    """Planilha mínima com a aba de afastamentos: textos, números e datas."""
+    pd.DataFrame({
+        'Servidor': [f"Servidor {i}" for i in range(linhas)],
+        'País': [['Argentina', 'Chile', 'Peru'][i % 3] for i in range(linhas)],
+        'Início do Afastamento': pd.date_range('2025-01-06', periods=linhas, freq='D'),
+        'Custo': [1500.0 + i for i in range(linhas)],
+        'Cancelada?': ['Não'] * linhas,
+    }).to_excel(caminho, sheet_name=ABA, index=False)
+
+
+@pytest.fixture
+def planilha_minima(tmp_path):
+    caminho = tmp_path / "afastamentos.xlsx"
+    _gravar(caminho, 50)
+    return str(caminho)
+
+
+def test_snapshot_reconstruido_so_quando_a_planilha_muda(planilha_minima, monkeypatch, tmp_path):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+
+    df, fonte = snapshot.carregar_snapshot(planilha_minima, ABA)
+    pd.testing.assert_frame_equal(df, pd.read_excel(planilha_minima, sheet_name=ABA))
+    arquivos = os.listdir(snapshot.SNAPSHOT_DIR)
+
+    # Sem mudança: mesma chave e nenhum arquivo novo
+    _, de_novo = snapshot.carregar_snapshot(planilha_minima, ABA)
+    assert de_novo.chave == fonte.chave
+    assert sorted(os.listdir(snapshot.SNAPSHOT_DIR)) == sorted(arquivos)
+
+    _gravar(planilha_minima, 60)
+    df_novo, fonte_nova = snapshot.carregar_snapshot(planilha_minima, ABA)
+    assert fonte_nova.chave != fonte.chave
+    assert len(df_novo) == 60
+    # O snapshot anterior da mesma aba é removido
+    assert len([a for a in os.listdir(snapshot.SNAPSHOT_DIR) if a.endswith(".arrow")]) == 1
+
+
+def test_colunas_mistas_viram_texto():
+    df = pd.DataFrame({'Custo': ['Com ônus', 1500.0, None], 'Viagens': [1, 2, 3]})
+    tipado = snapshot._tipar_colunas(df)
+    assert tipado['Custo'].tolist()[:2] == ['Com ônus', '1500.0']
+    assert tipado['Custo'].isna().tolist() == [False, False, True]
+    assert tipado['Viagens'].tolist() == [1, 2, 3]